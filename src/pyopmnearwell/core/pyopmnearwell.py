@@ -4,15 +4,22 @@
 """Main script for pyopmnearwell"""
 
 import argparse
+import glob
+import logging
 import os
 import pathlib
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Any
 
+from pyopmnearwell.utils.estimate import estimate_run, format_estimate
 from pyopmnearwell.utils.inputvalues import process_input
 from pyopmnearwell.utils.runs import simulations
 from pyopmnearwell.utils.writefile import reservoir_files
 
+logger = logging.getLogger(__name__)
+
 
 def main(argv=None) -> None:
     """Main function for the pyopmnearwell executable"""
@@ -24,25 +31,29 @@ def main(argv=None) -> None:
         "-i",
         "--input",
         type=str.strip,
-        default="input.toml",
-        help="The base name of the input file",
+        nargs="+",
+        default=["input.toml"],
+        help="The base name of the input file(s); several files or glob patterns "
+        "(e.g., 'cases/*.toml') run as a batch",
     )
     parser.add_argument(
         "-o",
         "--output",
         type=str.strip,
         default="output",
-        help="The base name of the output folder",
+        help="The base name of the output folder (for a batch, each case is written "
+        "to a subfolder named after its input file)",
     )
     parser.add_argument(
         "-m",
         "--mode",
         type=str.strip,
-        choices=["deck", "flow", "single", "all"],
+        choices=["deck", "flow", "single", "all", "estimate"],
         default="all",
         help="Run the whole framework ('all'), only generate the deck ('deck'), "
-        "only run flow ('flow'), or generate the deck and run flow in the same "
-        "output folder ('single')",
+        "only run flow ('flow'), generate the deck and run flow in the same "
+        "output folder ('single'), or only print the estimated cells, file sizes, "
+        "and memory of the run without writing any file ('estimate')",
     )
     parser.add_argument(
         "-v",
@@ -60,20 +71,53 @@ def main(argv=None) -> None:
         default="0",
         help="Print Python warnings",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of cases of a batch that run at the same time",
+    )
     cmdargs = vars(parser.parse_known_args(argv)[0])
     if int(cmdargs["warnings"]) == 0:
         warnings.filterwarnings("ignore")
-    file = cmdargs["input"]
+    files = expand_inputs(cmdargs["input"])
     fol = os.path.abspath(cmdargs["output"])
     mode = cmdargs["mode"]
+    write = int(cmdargs["vectors"])
+    if len(files) == 1:
+        run_case(files[0], fol, mode, write)
+    else:
+        run_batch(files, fol, mode, write, cmdargs["jobs"])
+
+
+def expand_inputs(inputs: list[str]) -> list[str]:
+    """Expand the glob patterns in the input files, keeping the given order"""
+    files: list[str] = []
+    for entry in inputs:
+        matches = sorted(glob.glob(entry)) if glob.has_magic(entry) else [entry]
+        if not matches:
+            raise FileNotFoundError(f"No input files match '{entry}'")
+        files += [match for match in matches if match not in files]
+    stems = [pathlib.Path(file).stem for file in files]
+    if len(set(stems)) != len(stems):
+        raise ValueError("The input files in a batch need different base names")
+    return files
+
+
+def run_case(file: str, fol: str, mode: str, write: int) -> None:
+    """Generate the deck and/or run Flow for one configuration file"""
     dic: dict[str, Any] = {
         "pat": os.path.split(os.path.dirname(__file__))[0],
         "fol": fol,
         "mode": mode,
-        "write": int(cmdargs["vectors"]),
+        "write": write,
         "runname": pathlib.Path(file).stem,
     }
     dic = process_input(dic, file)
+    if mode == "estimate":
+        print(format_estimate(estimate_run(dic)))
+        return
     os.makedirs(fol, exist_ok=True)
     if mode == "single":
         dic["fprep"] = fol
@@ -84,6 +128,73 @@ def main(argv=None) -> None:
     if mode in ["all", "deck", "single"]:
         os.makedirs(dic["fprep"], exist_ok=True)
         reservoir_files(dic)
+        if dic["safutol"] > 0 and "satfun_points" in dic:
+            print(
+                f"The saturation function tables have {dic['satfun_points'][0]} "
+                + f"instead of {dic['satfun_points'][1]} points (safutol = "
+                + f"{dic['safutol']})"
+            )
     if mode in ["all", "flow", "single"]:
         os.makedirs(dic["foutp"], exist_ok=True)
         simulations(dic)
+
+
+def run_timed_case(
+    file: str, fol: str, mode: str, write: int
+) -> tuple[str, float, str]:
+    """Run one case of a batch and return its status, runtime in seconds, and error"""
+    start = time.perf_counter()
+    try:
+        run_case(file, fol, mode, write)
+        status, error = "done", ""
+    # pylint: disable-next=broad-exception-caught
+    except (Exception, SystemExit) as exception:
+        logger.exception("The case %s failed", file)
+        status, error = "failed", f"{type(exception).__name__}: {exception}"
+    return status, time.perf_counter() - start, error
+
+
+def format_batch_table(
+    files: list[str], results: dict[str, tuple[str, float, str]]
+) -> str:
+    """Table with the status, runtime, and error of each case of a batch"""
+    width = max(len("case"), *(len(pathlib.Path(file).stem) for file in files))
+    table = f"{'case':<{width}} status runtime [s] error\n"
+    for file in files:
+        status, runtime, error = results[file]
+        line = (
+            f"{pathlib.Path(file).stem:<{width}} {status:<6} {runtime:<11.2f} {error}"
+        )
+        table += line.rstrip() + "\n"
+    return table
+
+
+def run_batch(files: list[str], fol: str, mode: str, write: int, jobs: int) -> None:
+    """Run the cases on a process pool and write a status/runtime table
+
+    Each case is submitted on its own, so a free process picks up the next case as
+    soon as it finishes the previous one (no waiting for the slowest case of a wave).
+    The traceback of a failed case is logged, and its error is written to the table.
+
+    """
+    os.makedirs(fol, exist_ok=True)
+    results: dict[str, tuple[str, float, str]] = {}
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {
+            executor.submit(
+                run_timed_case,
+                file,
+                os.path.join(fol, pathlib.Path(file).stem),
+                mode,
+                write,
+            ): file
+            for file in files
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    table = format_batch_table(files, results)
+    print(table, end="")
+    with open(
+        os.path.join(fol, "batch_status.txt"), "w", encoding="utf8"
+    ) as status_file:
+        status_file.write(table)
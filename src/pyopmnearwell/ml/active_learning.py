@@ -0,0 +1,349 @@
+"""Adaptive sampling of an ensemble, driven by the uncertainty of a surrogate.
+
+Instead of simulating a large, uniformly sampled ensemble, the members are chosen in
+rounds. After each round, a bootstrap ensemble of cheap surrogate models is trained on
+all finished members. A pool of candidate parameter sets is scored by the predictive
+variance of the bootstrap ensemble and only the most uncertain candidates are set up and
+run with ``setup_ensemble`` and ``run_ensemble``.
+
+The out-of-bag error of the surrogate is recorded after each round, i.e., the accuracy
+can be compared against the number of simulations that were run.
+
+Example:
+    >>> result = active_learning(
+    >>>     flow, path, runspecs, makofile, ["PRESSURE"], [], ["WBHP:INJ0"],
+    >>>     target=lambda member_data: member_data["WBHP:INJ0"][-1],
+    >>>     num_initial=16, num_per_round=8, num_rounds=4,
+    >>> )
+    >>> result["history"]
+    [(16, 0.52), (24, 0.31), (32, 0.22), (40, 0.19), (48, 0.17)]
+
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import pathlib
+from collections.abc import Callable, Sequence
+from typing import Any, Literal, Optional
+
+import numpy as np
+from sklearn.base import RegressorMixin, clone
+from sklearn.neural_network import MLPRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler
+
+from pyopmnearwell.ml.ensemble import create_ensemble, run_ensemble, setup_ensemble
+
+logger = logging.getLogger(__name__)
+
+
+class BootstrapSurrogate:
+    """Ensemble of regressors, each trained on a bootstrap resample of the data.
+
+    The spread of the predictions of the single models estimates the uncertainty of
+    the surrogate. The members that were left out of a resample give an out-of-bag
+    estimate of the prediction error without a separate validation set.
+
+    """
+
+    def __init__(
+        self,
+        model: Optional[RegressorMixin] = None,
+        num_models: int = 8,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Create the (untrained) bootstrap ensemble.
+
+        Args:
+            model (Optional[RegressorMixin], optional): ``sklearn`` regressor that is
+                cloned for each bootstrap sample. Defaults to a small MLP on min-max
+                scaled inputs.
+            num_models (int, optional): Number of bootstrap models. Defaults to 8.
+            seed (Optional[int], optional): Seed for the resampling. Defaults to None.
+
+        """
+        if model is None:
+            model = make_pipeline(
+                MinMaxScaler(),
+                MLPRegressor(hidden_layer_sizes=(32, 32), max_iter=2000),
+            )
+        self.model: RegressorMixin = model
+        self.num_models: int = num_models
+        self.rng: np.random.Generator = np.random.default_rng(seed=seed)
+        self.models: list[RegressorMixin] = []
+        self.oob_masks: list[np.ndarray] = []
+        self._targets: np.ndarray = np.empty((0,))
+        self._features: np.ndarray = np.empty((0, 0))
+
+    def fit(self, features: np.ndarray, targets: np.ndarray) -> BootstrapSurrogate:
+        """Train one model per bootstrap resample.
+
+        Args:
+            features (np.ndarray): ``shape=(num_samples, num_features)``
+            targets (np.ndarray): ``shape=(num_samples,)`` or
+                ``shape=(num_samples, num_targets)``
+
+        Returns:
+            BootstrapSurrogate: The trained surrogate.
+
+        """
+        num_samples: int = features.shape[0]
+        self.models = []
+        self.oob_masks = []
+        for _ in range(self.num_models):
+            indices: np.ndarray = self.rng.integers(num_samples, size=num_samples)
+            oob_mask: np.ndarray = np.ones(num_samples, dtype=bool)
+            oob_mask[indices] = False
+            model: RegressorMixin = clone(self.model)
+            model.fit(features[indices], targets[indices])
+            self.models.append(model)
+            self.oob_masks.append(oob_mask)
+        self._features = features
+        self._targets = targets
+        return self
+
+    def predict(self, features: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Predict the mean and variance of the bootstrap models.
+
+        Args:
+            features (np.ndarray): ``shape=(num_samples, num_features)``
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Mean and variance of the predictions, each
+                with the shape of the targets.
+
+        """
+        # ``shape=(num_models, num_samples, ...)``
+        predictions: np.ndarray = np.array(
+            [model.predict(features) for model in self.models]
+        )
+        return predictions.mean(axis=0), predictions.var(axis=0)
+
+    def oob_error(self) -> float:
+        """Root mean squared out-of-bag error on the training data.
+
+        Each sample is predicted only by the models that did not see it during
+        training. Samples that were part of all resamples are skipped.
+
+        Returns:
+            float: The error, or ``nan`` if no sample was left out.
+
+        """
+        sums: np.ndarray = np.zeros_like(self._targets, dtype=float)
+        counts: np.ndarray = np.zeros(self._targets.shape[0])
+        for model, oob_mask in zip(self.models, self.oob_masks):
+            if np.any(oob_mask):
+                sums[oob_mask] += model.predict(self._features[oob_mask])
+                counts[oob_mask] += 1
+        has_oob: np.ndarray = counts > 0
+        if not np.any(has_oob):
+            return float("nan")
+        oob_predictions: np.ndarray = sums[has_oob] / counts[has_oob].reshape(
+            (-1,) + (1,) * (sums.ndim - 1)
+        )
+        return float(np.sqrt(np.mean((oob_predictions - self._targets[has_oob]) ** 2)))
+
+
+def parameters_to_features(
+    members: Sequence[dict[str, Any]], variables: list[str]
+) -> np.ndarray:
+    """Stack the varying parameters of ensemble members into a feature array.
+
+    ``"PERM"`` and ``"LOG"`` variables are log transformed, as they are sampled log
+    uniformly by ``create_ensemble``.
+
+    Args:
+        members (Sequence[dict[str, Any]]): Parameters of the ensemble members.
+        variables (list[str]): Names of the varying parameters.
+
+    Returns:
+        np.ndarray: ``shape=(len(members), len(variables))``
+
+    """
+    features: np.ndarray = np.array(
+        [[member[variable] for variable in variables] for member in members],
+        dtype=float,
+    ).reshape((len(members), len(variables)))
+    for i, variable in enumerate(variables):
+        if variable.startswith("PERM") or variable.startswith("LOG"):
+            features[:, i] = np.log(features[:, i])
+    return features
+
+
+def select_candidates(
+    surrogate: BootstrapSurrogate, candidates: np.ndarray, num_members: int
+) -> np.ndarray:
+    """Select the candidates with the highest predictive variance.
+
+    Args:
+        surrogate (BootstrapSurrogate): Trained surrogate.
+        candidates (np.ndarray): Features of the candidates,
+            ``shape=(num_candidates, num_features)``.
+        num_members (int): Number of candidates to select.
+
+    Returns:
+        np.ndarray: Indices of the selected candidates, most uncertain first.
+
+    """
+    _, variance = surrogate.predict(candidates)
+    # Sum over multiple targets.
+    scores: np.ndarray = variance.reshape((candidates.shape[0], -1)).sum(axis=-1)
+    return np.argsort(scores)[::-1][:num_members]
+
+
+def active_learning(  # pylint: disable=R0913, R0914, too-many-positional-arguments
+    flow_path: str | pathlib.Path,
+    ensemble_path: str | pathlib.Path,
+    runspecs: dict[str, Any],
+    makofile: str | pathlib.Path,
+    ecl_keywords: list[str],
+    init_keywords: list[str],
+    summary_keywords: list[str],
+    target: Callable[[dict[str, np.ndarray]], np.ndarray | float],
+    num_initial: int = 16,
+    num_per_round: int = 8,
+    num_rounds: int = 4,
+    num_candidates: int = 1024,
+    sampler: Literal["lhs", "sobol", "halton"] = "lhs",
+    surrogate: Optional[BootstrapSurrogate] = None,
+    seed: Optional[int] = None,
+    **kwargs,
+) -> dict[str, Any]:
+    """Run an ensemble in rounds, each time adding the most uncertain members.
+
+    The first round runs a space-filling design of ``num_initial`` members. Each
+    following round trains ``surrogate`` on all finished members, draws
+    ``num_candidates`` candidates from a new space-filling design and runs the
+    ``num_per_round`` candidates with the highest predictive variance. Each round is set
+    up and run in ``ensemble_path / f"round_{i}"``. If no member has finished yet, the
+    round runs a new initial design instead.
+
+    Args:
+        flow_path (str | pathlib.Path): Command to run OPM Flow.
+        ensemble_path (str | pathlib.Path): The path to the ensemble directory.
+        runspecs (dict[str, Any]): Same as for ``create_ensemble``. ``"npoints"`` is
+            ignored; ``"npruns"`` is passed to ``run_ensemble``.
+        makofile (str | pathlib.Path): The path to the Mako template file for the
+            pyopmnearwell deck for ensemble members.
+        ecl_keywords (list[str]): Passed to ``run_ensemble``.
+        init_keywords (list[str]): Passed to ``run_ensemble``.
+        summary_keywords (list[str]): Passed to ``run_ensemble``.
+        target (Callable[[dict[str, np.ndarray]], np.ndarray | float]): Maps the data
+            of a member (keyword to array, as extracted by ``run_ensemble``) to the
+            quantity the surrogate learns, e.g., the final bottom hole pressure.
+        num_initial (int, optional): Size of the initial design. Defaults to 16.
+        num_per_round (int, optional): Members added per round. Defaults to 8.
+        num_rounds (int, optional): Number of adaptive rounds. Defaults to 4.
+        num_candidates (int, optional): Size of the candidate pool of each round.
+            Defaults to 1024.
+        sampler (Literal["lhs", "sobol", "halton"], optional): Design for the initial
+            members and the candidates. Defaults to "lhs".
+        surrogate (Optional[BootstrapSurrogate], optional): Surrogate to score the
+            candidates. Defaults to a ``BootstrapSurrogate`` with default parameters.
+        seed (Optional[int], optional): Seed for the designs and the surrogate.
+            Defaults to None.
+        **kwargs: Passed to ``setup_ensemble`` (``recalc_*``) and ``run_ensemble``
+            (``num_report_steps``, ``step_size_*``, ``flags``).
+
+    Returns:
+        dict[str, Any]: With keys
+
+            - "members": Parameters of all finished members.
+            - "features": ``parameters_to_features`` of the finished members.
+            - "targets": The targets of the finished members.
+            - "history": ``(num_simulations, oob_error)`` after each round with
+              finished members. The number of simulations includes disregarded
+              members.
+            - "surrogate": The surrogate trained on all finished members.
+
+    """
+    ensemble_path = pathlib.Path(ensemble_path)
+    if surrogate is None:
+        surrogate = BootstrapSurrogate(seed=seed)
+    variables: list[str] = list(runspecs["variables"].keys())
+    setup_kwargs: dict[str, Any] = {
+        key: value for key, value in kwargs.items() if key.startswith("recalc_")
+    }
+    run_kwargs: dict[str, Any] = {
+        key: value for key, value in kwargs.items() if key not in setup_kwargs
+    }
+
+    members: list[dict[str, Any]] = []
+    targets: list[np.ndarray] = []
+    history: list[tuple[int, float]] = []
+    num_simulations: int = 0
+    for round_index in range(num_rounds + 1):
+        # Use a different design for each round, such that the candidates differ.
+        round_seed: Optional[int] = None if seed is None else seed + round_index
+        if not members:
+            selected: list[dict[str, Any]] = list(
+                create_ensemble(
+                    {**runspecs, "npoints": num_initial},
+                    seed=round_seed,
+                    sampler=sampler,
+                )
+            )
+        else:
+            candidates = create_ensemble(
+                {**runspecs, "npoints": num_candidates},
+                seed=round_seed,
+                sampler=sampler,
+            )
+            indices: np.ndarray = select_candidates(
+                surrogate,
+                parameters_to_features(candidates, variables),
+                num_per_round,
+            )
+            selected = [candidates[i] for i in indices]
+
+        round_path: pathlib.Path = ensemble_path / f"round_{round_index}"
+        round_path.mkdir(parents=True, exist_ok=True)
+        setup_ensemble(round_path, selected, makofile, **setup_kwargs)
+        store = run_ensemble(
+            flow_path,
+            round_path,
+            {**runspecs, "npoints": len(selected)},
+            ecl_keywords,
+            init_keywords,
+            summary_keywords,
+            store_path=round_path / "store",
+            **run_kwargs,
+        )
+        num_simulations += len(selected)
+        for j in np.flatnonzero(store.valid):
+            members.append(selected[j])
+            targets.append(
+                np.asarray(target({keyword: store[keyword][j] for keyword in store}))
+            )
+
+        if not members:
+            logger.warning(
+                "Round %d: none of %d simulations finished",
+                round_index,
+                num_simulations,
+            )
+            continue
+        features: np.ndarray = parameters_to_features(members, variables)
+        surrogate.fit(features, np.array(targets))
+        history.append((num_simulations, surrogate.oob_error()))
+        logger.info(
+            f"Round {round_index}: {len(members)} of {num_simulations} simulations "
+            + f"finished, out-of-bag error {history[-1][1]:.3e}"
+        )
+
+    with (ensemble_path / "active_learning.csv").open(
+        "w", newline="", encoding="utf-8"
+    ) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["num_simulations", "oob_error"])
+        writer.writerows(history)
+
+    return {
+        "members": members,
+        "features": parameters_to_features(members, variables),
+        "targets": np.array(targets),
+        "history": history,
+        "surrogate": surrogate,
+    }
@@ -0,0 +1,255 @@
+"""Select the Flow flags of an ensemble on a representative subset of its members.
+
+The flag sets are the ``ensemble.FLAGS`` (or any other base flags) with some of the
+options replaced, e.g., by a grid (``grid_flag_sets``) or random search
+(``random_flag_sets``) over the linear solver and the tolerances. Each set is run with
+the ``FlowRunner`` on the decks of a few members that were written by
+``setup_ensemble``, one run at a time to have comparable wall times. Members that share
+an initialization restart from it, so it is run with the same flags first. The fastest
+set whose failure rate (runs that fail, time out, or do not reach the last report step)
+is within the limit is recommended for the remaining members. The table with the wall
+time and failure rate of each set is written to ``autotune.txt`` in the ensemble folder.
+
+Example:
+    >>> result = tune_flags(
+    >>>     "flow",
+    >>>     path,
+    >>>     grid_flag_sets({"linear-solver": ["cprw", "ilu0"], "tolerance-mb": ["1e-7",
+    >>>     "1e-6"]}),
+    >>>     representative_members(runspecs["npoints"], 4),
+    >>>     timeout=600,
+    >>> )
+    >>> run_ensemble("flow", path, runspecs, ecl_keywords, [], [],
+    >>>     flags=result["best"])
+
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import pathlib
+import shlex
+import shutil
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+import numpy as np
+
+from pyopmnearwell.ml.ensemble import FLAGS, read_initializations
+from pyopmnearwell.utils.runner import FlowRunner
+
+logger = logging.getLogger(__name__)
+
+AUTOTUNE: str = "autotune"
+"""Folder (and base name of the table) of the tuning runs in the ensemble folder."""
+
+
+def merge_flags(base: str, options: dict[str, str]) -> str:
+    """Replace or add the options (e.g., ``{"linear-solver": "ilu0"}``) in the flags.
+
+    Args:
+        base (str): Flags of the form ``--name=value``.
+        options (dict[str, str]): Values of the options, without the leading dashes.
+
+    Returns:
+        str: Flags with each option only once.
+
+    """
+    flags: dict[str, Optional[str]] = {}
+    for flag in shlex.split(base):
+        name, equal, value = flag.lstrip("-").partition("=")
+        flags[name] = value if equal else None
+    flags.update(options)
+    return " ".join(
+        f"--{name}" if value is None else f"--{name}={value}"
+        for name, value in flags.items()
+    )
+
+
+def grid_flag_sets(
+    options: Mapping[str, Sequence[str]], base: str = FLAGS
+) -> list[str]:
+    """Flag sets of all combinations of the option values.
+
+    Args:
+        options (Mapping[str, Sequence[str]]): Values of each option.
+        base (str, optional): Flags in which the options are replaced. Defaults to
+            ``ensemble.FLAGS``.
+
+    Returns:
+        list[str]: One flag set per combination.
+
+    """
+    return [
+        merge_flags(base, dict(zip(options, values)))
+        for values in itertools.product(*options.values())
+    ]
+
+
+def random_flag_sets(
+    options: Mapping[str, Sequence[str]],
+    num_sets: int,
+    base: str = FLAGS,
+    seed: Optional[int] = None,
+) -> list[str]:
+    """Flag sets of randomly drawn combinations of the option values.
+
+    Args:
+        options (Mapping[str, Sequence[str]]): Values of each option.
+        num_sets (int): Number of sets. At most all combinations are returned.
+        base (str, optional): Flags in which the options are replaced. Defaults to
+            ``ensemble.FLAGS``.
+        seed (Optional[int], optional): Seed of the random generator. Defaults to None.
+
+    Returns:
+        list[str]: Distinct flag sets.
+
+    """
+    sets: list[str] = grid_flag_sets(options, base)
+    rng: np.random.Generator = np.random.default_rng(seed)
+    indices: np.ndarray = rng.choice(len(sets), min(num_sets, len(sets)), replace=False)
+    return [sets[i] for i in indices]
+
+
+def representative_members(num_members: int, size: int) -> list[int]:
+    """Evenly spaced members of an ensemble, including the first and the last one."""
+    return sorted(
+        {int(i) for i in np.linspace(0, num_members - 1, min(size, num_members))}
+    )
+
+
+def tune_flags(  # pylint: disable=R0913, R0917
+    flow_path: str | pathlib.Path,
+    ensemble_path: str | pathlib.Path,
+    flag_sets: Sequence[str],
+    members: Sequence[int],
+    timeout: Optional[float] = None,
+    max_failure_rate: float = 0.0,
+    keep_result_files: bool = False,
+) -> dict[str, Any]:
+    """Run the members with each flag set and recommend the fastest robust set.
+
+    Args:
+        flow_path (str | pathlib.Path): Flow executable (without flags).
+        ensemble_path (str | pathlib.Path): Path to the ensemble directory, with the
+            decks of the members written by ``setup_ensemble``.
+        flag_sets (Sequence[str]): Flags to run Flow with.
+        members (Sequence[int]): Members that are run with each flag set, see
+            ``representative_members``.
+        timeout (Optional[float], optional): Wall-clock limit of each run [s]. Runs
+            that exceed it count as failed. Defaults to None.
+        max_failure_rate (float, optional): Maximum fraction of failed runs of the
+            recommended set. Defaults to 0.
+        keep_result_files (bool, optional): Keep the results of the tuning runs in
+            ``ensemble_path / "autotune"``, and of the shared initializations. Defaults
+            to False.
+
+    Returns:
+        dict[str, Any]: ``best`` flags (None if no set is robust), and the ``table``
+            with the ``flags``, ``runs``, ``failures``, ``failure_rate``, total
+            ``walltime`` [s] of all runs (including the initializations),
+            ``max_walltime`` of the members, and ``mean_walltime`` of the successful
+            members of each set.
+
+    Raises:
+        ValueError: If no flag sets or members are given.
+
+    """
+    if not flag_sets or not members:
+        raise ValueError("At least one flag set and one member are needed.")
+    ensemble_path = pathlib.Path(ensemble_path)
+    runner: FlowRunner = FlowRunner(str(flow_path), timeout=timeout)
+    initializations: list[dict[str, Any]] = read_initializations(ensemble_path, members)
+    table: list[dict[str, Any]] = []
+    for k, flags in enumerate(flag_sets):
+        table.append(
+            run_flag_set(runner, ensemble_path, k, flags, members, initializations)
+        )
+        logger.info(
+            f"Flag set {k}: {table[-1]['failures']}/{len(members)} failed, mean wall "
+            + f"time {table[-1]['mean_walltime']:.2f} s"
+        )
+    if not keep_result_files:
+        shutil.rmtree(ensemble_path / AUTOTUNE, ignore_errors=True)
+        for init in initializations:
+            shutil.rmtree(ensemble_path / init["folder"] / "output", ignore_errors=True)
+    robust: list[dict[str, Any]] = [
+        row
+        for row in table
+        if row["failure_rate"] <= max_failure_rate and row["failures"] < row["runs"]
+    ]
+    best: Optional[dict[str, Any]] = min(
+        robust, key=lambda row: row["mean_walltime"], default=None
+    )
+    if best is None:
+        logger.warning("No flag set is within the maximum failure rate.")
+    (ensemble_path / f"{AUTOTUNE}.txt").write_text(
+        format_table(table, best), encoding="utf-8"
+    )
+    return {"best": None if best is None else best["flags"], "table": table}
+
+
+def run_flag_set(  # pylint: disable=R0913, R0917
+    runner: FlowRunner,
+    ensemble_path: pathlib.Path,
+    k: int,
+    flags: str,
+    members: Sequence[int],
+    initializations: Sequence[dict[str, Any]] = (),
+) -> dict[str, Any]:
+    """Run the members with a flag set and return its row of the tuning table.
+
+    The shared initializations of the members are run first, as the members restart
+    from them. A run fails if Flow fails, times out, or does not reach the last report
+    step, and the members of a failed initialization fail without being run.
+    """
+    walltimes: np.ndarray = np.zeros(len(members))
+    failed: np.ndarray = np.zeros(len(members), dtype=bool)
+    init_walltime: float = 0.0
+    skipped: set[int] = set()
+    for init in initializations:
+        result: dict[str, Any] = runner.run(
+            ensemble_path / init["folder"] / "preprocessing" / f"{init['deck']}.DATA",
+            ensemble_path / init["folder"] / "output",
+            shlex.split(flags),
+        )
+        init_walltime += result["walltime"]
+        if result["status"] != "done":
+            skipped.update(init["members"])
+    for i, j in enumerate(members):
+        if j in skipped:
+            failed[i] = True
+            continue
+        result = runner.run(
+            ensemble_path / f"runfiles_{j}" / "preprocessing" / f"RUN_{j}.DATA",
+            ensemble_path / AUTOTUNE / f"flags_{k}" / f"results_{j}",
+            shlex.split(flags),
+        )
+        walltimes[i] = result["walltime"]
+        failed[i] = result["status"] != "done" or (
+            result["report_steps"] is not None
+            and result["steps"] < result["report_steps"]
+        )
+    return {
+        "flags": flags,
+        "runs": len(members),
+        "failures": int(failed.sum()),
+        "failure_rate": float(failed.mean()),
+        "walltime": init_walltime + float(walltimes.sum()),
+        "max_walltime": float(walltimes.max()),
+        "mean_walltime": (
+            float(walltimes[~failed].mean()) if not failed.all() else np.nan
+        ),
+    }
+
+
+def format_table(table: list[dict[str, Any]], best: Optional[dict[str, Any]]) -> str:
+    """Table with one flag set per line, with the recommended set marked by ``*``."""
+    lines: list[str] = ["set   failed mean [s]  max [s] flags"]
+    for k, row in enumerate(table):
+        lines.append(
+            f"{k:<3}{'*' if row is best else ' '} {row['failures']:>3}/{row['runs']:<3}"
+            + f"{row['mean_walltime']:>8.2f} {row['max_walltime']:>8.2f} {row['flags']}"
+        )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,102 @@
+"""Persistent state of an ensemble campaign to checkpoint and resume long runs.
+
+The state of each member (pending, running, done, failed, or disregarded) is recorded in
+an SQLite file. ``setup_ensemble`` and ``run_ensemble`` accept the file via the
+``state_file`` kwarg. If a campaign is killed, calling them again with the same file
+skips the members that are done (or disregarded) and re-queues only the unfinished ones.
+The extracted data of finished members is kept in an ``EnsembleStore`` on disk.
+
+Example:
+    >>> setup_ensemble(path, ensemble, makofile, state_file=path / "campaign.db")
+    >>> data = run_ensemble(
+    >>>     flow, path, runspecs, ecl_keywords, [], [], state_file=path / "campaign.db"
+    >>> )
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import pathlib
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+
+PENDING: str = "pending"
+RUNNING: str = "running"
+DONE: str = "done"
+FAILED: str = "failed"
+DISREGARDED: str = "disregarded"
+
+FINISHED: tuple[str, ...] = (DONE, DISREGARDED)
+"""States of members that are not run again when a campaign is resumed."""
+
+
+class CampaignState:
+    """Status of each member of an ensemble campaign, stored in an SQLite file.
+
+    Note: Each call opens its own connection, so the state can be updated from the
+        threads that launch the simulations.
+
+    """
+
+    def __init__(self, path: str | pathlib.Path) -> None:
+        """Open the state file, creating it if it does not exist.
+
+        Args:
+            path (str | pathlib.Path): Path to the SQLite file.
+
+        """
+        self.path: pathlib.Path = pathlib.Path(path)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS members "
+                + "(member INTEGER PRIMARY KEY, status TEXT NOT NULL, updated REAL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and is always closed."""
+        connection: sqlite3.Connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def register(self, members: Iterable[int]) -> None:
+        """Add members as pending, keeping the status of known members."""
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO members VALUES (?, ?, ?)",
+                [(member, PENDING, time.time()) for member in members],
+            )
+
+    def set_status(self, member: int, status: str) -> None:
+        """Set the status of a member."""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO members VALUES (?, ?, ?)",
+                (member, status, time.time()),
+            )
+
+    def status(self, member: int) -> str:
+        """Return the status of a member (pending if unknown)."""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT status FROM members WHERE member = ?", (member,)
+            ).fetchone()
+        return PENDING if row is None else row[0]
+
+    def statuses(self) -> dict[int, str]:
+        """Return the status of all known members."""
+        with self._connect() as connection:
+            return dict(
+                connection.execute(
+                    "SELECT member, status FROM members ORDER BY member"
+                ).fetchall()
+            )
+
+    def is_finished(self, member: int) -> bool:
+        """Check if a member is done or disregarded, i.e., does not need to run."""
+        return self.status(member) in FINISHED
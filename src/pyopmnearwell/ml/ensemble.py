@@ -6,13 +6,23 @@ arguments.
 from __future__ import annotations
 
 import copy
+import hashlib
+import json
 import logging
 import math
-import os
 import pathlib
+import shlex
 import shutil
 from collections import OrderedDict
-from typing import Any, Optional
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from collections.abc import Sequence
+from typing import Any, Literal, Optional, overload
 
 import numpy as np
 import tensorflow as tf
@@ -21,9 +31,15 @@ from mako.template import Template
 from resdata import FileMode
 from resdata.resfile import ResdataFile
 from resdata.summary import Summary
+from scipy.stats import qmc
 
+from pyopmnearwell.ml import campaign, telemetry
+from pyopmnearwell.ml.store import EnsembleStore
 from pyopmnearwell.utils.formulas import area_squaredcircle, pyopmnearwell_correction
-from pyopmnearwell.utils.inputvalues import process_input
+from pyopmnearwell.utils.inputvalues import process_input_text
+from pyopmnearwell.utils.mako import get_template
+from pyopmnearwell.utils.runner import FlowRunner
+from pyopmnearwell.utils.schedules import initialization_deck, restart_deck
 from pyopmnearwell.utils.writefile import reservoir_files
 
 logging.basicConfig(level=logging.INFO)
@@ -41,12 +57,109 @@ FLAGS = (
     + " --min-time-step-before-shutting-problematic-wells-in-days=1e-1"
 )
 
+INITIALIZATIONS: str = "initializations.json"
+"""File with the groups of members that share an initialization."""
+
+Sampler = Literal["lhs", "sobol", "halton"]
+"""Quasi-Monte Carlo designs of ``create_ensemble``."""
+
+
+class LazyEnsemble(Sequence):
+    """Index-addressable ensemble that creates the members on access.
+
+    The meshed variables are stored as their value ranges only. A member index points to
+    a flat index into their cartesian product (in the order of ``np.meshgrid(...,
+    indexing="ij")``), which is decoded as a mixed-radix number with one digit per
+    variable. Memory efficiently sampled variables are stored as one value per member.
+
+    Example:
+        >>> ensemble = create_ensemble(runspecs)
+        >>> ensemble[3]
+        {"FLOW": "flow", "PERMZ": 1.3, "PRESSURE": 55.3, ...}
+
+    """
+
+    def __init__(
+        self,
+        constants: dict[str, Any],
+        meshed_variables: dict[str, np.ndarray],
+        indices: np.ndarray,
+        sampled_variables: Optional[dict[str, np.ndarray]] = None,
+    ) -> None:
+        """Create the ensemble.
+
+        Args:
+            constants (dict[str, Any]): Values that are the same for all members.
+            meshed_variables (dict[str, np.ndarray]): Value range of each meshed
+                variable.
+            indices (np.ndarray): Flat index into the cartesian product of the meshed
+                variables for each member, ``shape=(num_members,)``.
+            sampled_variables (Optional[dict[str, np.ndarray]], optional): Value of each
+                sampled variable for each member, ``shape=(num_members,)``. Defaults to
+                None.
+
+        """
+        self.constants: dict[str, Any] = constants
+        self.meshed_variables: dict[str, np.ndarray] = meshed_variables
+        self.indices: np.ndarray = np.asarray(indices, dtype=np.int64)
+        self.sampled_variables: dict[str, np.ndarray] = (
+            sampled_variables if sampled_variables is not None else {}
+        )
+        self.radices: tuple[int, ...] = tuple(
+            len(values) for values in meshed_variables.values()
+        )
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return LazyEnsemble(
+                self.constants,
+                self.meshed_variables,
+                self.indices[i],
+                {
+                    variable: values[i]
+                    for variable, values in self.sampled_variables.items()
+                },
+            )
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"Ensemble index {i} is out of range.")
+        member: dict[str, Any] = copy.deepcopy(self.constants)
+        digits: tuple[int, ...] = self.decode(int(self.indices[i]))
+        member.update(
+            {
+                variable: values[digit]
+                for (variable, values), digit in zip(
+                    self.meshed_variables.items(), digits
+                )
+            }
+        )
+        member.update(
+            {variable: values[i] for variable, values in self.sampled_variables.items()}
+        )
+        return member
+
+    def decode(self, index: int) -> tuple[int, ...]:
+        """Decode a flat index into the index of each meshed variable.
+
+        The last variable varies fastest, i.e., the order is the same as for
+        ``np.unravel_index``, but without a limit on the size of the product.
+
+        """
+        digits: list[int] = []
+        for radix in reversed(self.radices):
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+        return tuple(reversed(digits))
+
 
 def create_ensemble(
     runspecs: dict[str, Any],
     efficient_sampling: Optional[list[str]] = None,
     seed: Optional[int] = None,
-) -> list[dict[str, Any]]:
+    sampler: Optional[Sampler] = None,
+) -> LazyEnsemble:
     """Create an ensemble.
 
     Note:
@@ -80,21 +193,38 @@ def create_ensemble(
             is possible to deal with the complexity.
         seed: (Optional[int]): Seed for the ``np.random.Generator``. Is passed to
             ``memory_efficient_sample`` as well. Default is ``None``.
+        sampler (Optional[Sampler]): Create a space-filling design of
+            ``runspecs["npoints"]`` members with a Latin hypercube, scrambled Sobol or
+            scrambled Halton sampler from ``scipy.stats.qmc`` instead of the cartesian
+            product. The ``npoints`` of the single variables and
+            ``efficient_sampling`` are ignored in this case. Default is ``None``.
 
     Note: The ensemble is generated as the cartesian product of all variable ranges. The
         total number of ensemble members is thus the product of all individual
         ``npoints``. If ``runspecs["npoints"]`` is lower than the product, a random
-        sample of size ``runspecs["npoints"]`` of the full ensemble is returned.
+        sample (without replacement) of size ``runspecs["npoints"]`` of the full
+        ensemble is returned. The product is never built; memory and time scale with
+        ``runspecs["npoints"]`` only.
 
     Returns:
-        ensemble (list[dict[str, Any]]): List containing a dict with the specified
-            variable values for each ensemble member.
+        ensemble (LazyEnsemble): Sequence containing a dict with the specified variable
+            values for each ensemble member.
 
     Raises:
         ValueError: If ``runspecs["npoints"]`` is larger than the number of generated
-            ensemble members.
+            ensemble members or if ``sampler`` is unknown.
 
     """
+    if sampler is not None:
+        return LazyEnsemble(
+            runspecs["constants"],
+            {},
+            np.zeros(runspecs["npoints"], dtype=np.int64),
+            space_filling_sample(
+                runspecs["variables"], runspecs["npoints"], sampler, seed=seed
+            ),
+        )
+
     if efficient_sampling is None:
         efficient_sampling = []
 
@@ -117,12 +247,10 @@ def create_ensemble(
         else:
             # Generate a uniform distribution for all other variables.
             variables[variable] = rng.uniform(min_val, max_val, npoints)
-    constants: dict[str, float] = runspecs["constants"]
 
     # Differentiate between variables whose data ranges are sampled memory efficiently
-    # and then added to the ensemble and variables whose data ranges are fully meshed
-    # together and then added to the ensemble.
-    # NOTE: At the end, the ensemble gets sampled again if it is too large.
+    # and then added to the ensemble and variables whose data ranges are meshed
+    # together.
     variables_to_sample: dict[str, np.ndarray] = OrderedDict(
         {
             variable: values
@@ -138,60 +266,55 @@ def create_ensemble(
         }
     )
     logger.info(
-        f"Sampling the following variables individually: {variables_to_sample.keys}"
+        "Sampling the following variables individually: "
+        + f"{list(variables_to_sample.keys())}"
     )
     logger.info(
-        f"Meshing the following variables and sampling afterwards: {variables_to_mesh.keys}"
+        "Meshing the following variables and sampling afterwards: "
+        + f"{list(variables_to_mesh.keys())}"
     )
 
-    # Mesh/sample all values to get the ensemble and put the values back into a
-    # dictionary.
-    meshed_variables: list[np.ndarray] = [
-        array.flatten()
-        for array in np.meshgrid(*variables_to_mesh.values(), indexing="ij")
-    ]
-    if len(variables_to_sample) > 0:
-        sampled_variables: np.ndarray | list = memory_efficient_sample(
-            np.array(list(variables_to_sample.values())),
-            num_members=runspecs["npoints"],
-            seed=seed,
-        )
-    else:
-        sampled_variables = []
-
-    ensemble: list[dict[str, float]] = []
-    for values in zip(*meshed_variables, *sampled_variables):
-        member: dict[str, Any] = copy.deepcopy(constants)
-        member.update(
-            {
-                (list(variables_to_mesh.keys()) + list(variables_to_sample.keys()))[
-                    i
-                ]: value
-                for i, value in enumerate(values)
-            }
+    ensemble_size: int = math.prod(
+        npoints for _, __, npoints in runspecs["variables"].values()
+    )
+    if runspecs["npoints"] > ensemble_size:
+        raise ValueError(
+            f"runspecs['npoints']={runspecs['npoints']} is larger than the"
+            + f" ensemble_size={ensemble_size} generated from the variables."
         )
-        ensemble.append(member)
 
-    # Sample a subset of the ensemble if the ensemble size is larger than wanted.
-    ensemble_size: int = int(
-        np.prod([npoints for _, __, npoints in runspecs["variables"].values()])
-    )
-    if runspecs["npoints"] < ensemble_size:
+    # The meshed variables are never materialized. Instead, members are drawn as flat
+    # indices into the cartesian product, which ``LazyEnsemble`` decodes on access.
+    mesh_size: int = math.prod(len(values) for values in variables_to_mesh.values())
+    if runspecs["npoints"] < mesh_size:
         logger.info(
             "Sample size is larger than ensemble size. Randomly selecting a subset"
         )
-
-        idx = rng.integers(
-            len(ensemble),
-            size=runspecs["npoints"],
+        indices: np.ndarray = rng.choice(
+            mesh_size, size=runspecs["npoints"], replace=False
         )
-        ensemble = list(map(ensemble.__getitem__, idx))
-    elif runspecs["npoints"] > ensemble_size:
-        raise ValueError(
-            f"runspecs['npoints']={runspecs['npoints']} is larger than the"
-            + f" ensemble_size={ensemble_size} generated from the variables."
+    else:
+        # Use each point of the mesh. If the sampled variables make the ensemble
+        # larger than the mesh, the mesh points are repeated.
+        indices = np.resize(np.arange(mesh_size), runspecs["npoints"])
+
+    sampled_variables: dict[str, np.ndarray] = OrderedDict()
+    if len(variables_to_sample) > 0:
+        sampled_variables.update(
+            zip(
+                variables_to_sample.keys(),
+                memory_efficient_sample(
+                    np.array(list(variables_to_sample.values())),
+                    num_members=runspecs["npoints"],
+                    seed=seed,
+                ),
+            )
         )
 
+    ensemble: LazyEnsemble = LazyEnsemble(
+        runspecs["constants"], variables_to_mesh, indices, sampled_variables
+    )
+
     logger.info("Created ensemble")
 
     return ensemble
@@ -221,29 +344,121 @@ def memory_efficient_sample(
     return variables[np.arange(variables.shape[0])[..., None], indices]
 
 
+def space_filling_sample(
+    variables: dict[str, tuple[float, float, int]],
+    num_members: int,
+    sampler: Sampler,
+    seed: Optional[int] = None,
+) -> dict[str, np.ndarray]:
+    """Sample all variables jointly with a quasi-Monte Carlo design.
+
+    The design covers the unit hypercube, with one dimension per variable. Each
+    dimension is then scaled to the interval of the variable. The same conventions as
+    in ``create_ensemble`` apply, i.e., ``"PERM"`` and ``"LOG"`` variables are scaled
+    log uniformly and ``"INT"`` variables are floored to integers in :math:`[min,
+    max)`.
+
+    Args:
+        variables (dict[str, tuple[float, float, int]]): ``(min, max, npoints)`` for
+            each variable. ``npoints`` is ignored.
+        num_members (int): Number of samples.
+        sampler (Sampler): Latin hypercube, scrambled Sobol or scrambled Halton
+            design. For Sobol, ``num_members`` should be a power of 2.
+        seed: (Optional[int]): Seed for the sampler. Default is ``None``.
+
+    Raises:
+        ValueError: If ``sampler`` is unknown.
+
+    Returns:
+        dict[str, np.ndarray]: The values of each variable, ``shape=(num_members,)``.
+
+    """
+    samplers: dict[str, type[qmc.QMCEngine]] = {
+        "lhs": qmc.LatinHypercube,
+        "sobol": qmc.Sobol,
+        "halton": qmc.Halton,
+    }
+    if sampler not in samplers:
+        raise ValueError(
+            f"Unknown sampler {sampler}, choose one of {list(samplers.keys())}."
+        )
+    logger.info(f"Sampling {num_members} members with a {sampler} design")
+    # ``shape=(num_members, num_variables)``
+    unit_samples: np.ndarray = samplers[sampler](d=len(variables), seed=seed).random(
+        num_members
+    )
+
+    samples: dict[str, np.ndarray] = OrderedDict()
+    for (variable, (min_val, max_val, _)), unit_sample in zip(
+        variables.items(), unit_samples.T
+    ):
+        if variable.startswith("PERM") or variable.startswith("LOG"):
+            samples[variable] = np.exp(
+                math.log(min_val)
+                + unit_sample * (math.log(max_val) - math.log(min_val))
+            )
+        elif variable.startswith("INT"):
+            samples[variable] = np.floor(
+                min_val + unit_sample * (max_val - min_val)
+            ).astype(int)
+        else:
+            samples[variable] = min_val + unit_sample * (max_val - min_val)
+    return samples
+
+
 def setup_ensemble(
     ensemble_path: str | pathlib.Path,
-    ensemble: list[dict[str, Any]],
+    ensemble: Sequence[dict[str, Any]],
     makofile: str | pathlib.Path,
     **kwargs,
 ) -> None:
     """Create a deck file for each ensemble member.
 
+    The first member is set up first, as the other members include its files. The
+    remaining members are split into chunks that are set up in a pool of worker
+    processes.
+
     Args:
         ensemble_path (str | pathlib.Path): The path to the ensemble directory.
-        ensemble (list[dict[str, Any]]): A list of dictionaries containing the
+        ensemble (Sequence[dict[str, Any]]): A sequence of dictionaries containing the
             parameters for each ensemble member. Usually generated by
             ``create_ensemble``.
         makofile (str | pathlib.Path): The path to the Mako template file for the
             pyopmnearwell deck for ensemble members.
         **kwargs: kwargs are passed to ``reservoir_files``. Possible kwargs are:
 
-            - recalc_grid (bool, optional): Whether to recalculate ``GRID.INC`` for each
-                ensemble member. Defaults to False.
-            - recalc_tables (bool, optional): Whether to recalculate ``TABLES.INC`` for
-                each ensemble member. Defaults to False.
-            - recalc_sections (bool, optional): Whether to recalculate ``GEOLOGY.INC``
-                and ``REGIONS.INC`` for each ensemble member. Defaults to False.
+            - recalc_grid (bool | str, optional): Whether to recalculate the grid files
+                for each ensemble member. With ``"auto"``, the files of the first
+                member are included if they were generated from the same inputs.
+                Defaults to True.
+            - recalc_tables (bool | str, optional): Same for ``TABLES.INC``. Defaults
+                to True.
+            - recalc_sections (bool | str, optional): Same for ``GEOLOGY.INC``,
+                ``FLUXNUM.INC``, ``MULTPV.INC``, ``PERMFACT.INC``, and ``PCFACT.INC``.
+                Defaults to True.
+            - state_file (str | pathlib.Path, optional): SQLite file with the campaign
+                state (see ``pyopmnearwell.ml.campaign``). Members that are already
+                done or disregarded are not set up again. Defaults to None.
+            - num_setup_workers (int, optional): Number of processes that set up the
+                members. With 1, all members are set up in the calling process. More
+                workers pay off for large ensembles, as each worker imports
+                ``pyopmnearwell.ml`` (and TensorFlow) again. Defaults to 1.
+            - chunk_size (int, optional): Number of members that are passed to a
+                worker at once. Defaults to an even split into four chunks per worker.
+            - ecl_keywords (list[str], optional): Restart arrays that are extracted
+                by ``run_ensemble``. Only these are requested with RPTRST besides the
+                solution arrays (see ``pyopmnearwell.utils.output``). Defaults to the
+                arrays of the template.
+            - summary_keywords (list[str], optional): Summary vectors that are
+                extracted by ``run_ensemble``. The SUMMARY section only has these
+                vectors. Defaults to the vectors of the template.
+            - step_size_time (int, optional): Write the restart arrays only at every
+                ``step_size_time``-th report step. Pass the same value to
+                ``run_ensemble``. Defaults to 1.
+            - share_initialization (bool, optional): Group the members whose decks
+                and included files are identical before the SCHEDULE section. Each
+                group is initialized once and its members restart from the restart
+                file at t=0 (see ``share_initializations``). Defaults to False.
 
     Raises:
         Exception: If there is an error rendering the Mako template.
@@ -254,6 +469,23 @@ def setup_ensemble(
     """
     # Ensure ``ensemble_path`` is a ``Path`` object.
     ensemble_path = pathlib.Path(ensemble_path)
+    state: Optional[campaign.CampaignState] = None
+    if kwargs.get("state_file") is not None:
+        state = campaign.CampaignState(kwargs["state_file"])
+        state.register(range(len(ensemble)))
+    kwargs.pop("state_file", None)
+    num_workers: int = kwargs.pop("num_setup_workers", 1)
+    chunk_size: Optional[int] = kwargs.pop("chunk_size", None)
+    share_initialization: bool = kwargs.pop("share_initialization", False)
+    output: dict[str, Any] = {
+        name: kwargs.pop(key)
+        for name, key in [
+            ("rptrst", "ecl_keywords"),
+            ("summary", "summary_keywords"),
+            ("rptfreq", "step_size_time"),
+        ]
+        if key in kwargs
+    }
 
     # Update kwargs with the (future) relative path to the first  first ensemble member
     # from any other ensemble member.
@@ -261,9 +493,188 @@ def setup_ensemble(
         {"inc_folder": pathlib.Path("..") / ".." / "runfiles_0" / "preprocessing"}
     )
 
+    # When resuming a campaign, the decks of finished members are not needed anymore.
+    # The first member is kept, as the others include its files.
+    members: list[int] = [
+        i for i in range(1, len(ensemble)) if state is None or not state.is_finished(i)
+    ]
+
     logger.info(f"Filling templates for {len(ensemble)} members")
-    mytemplate: Template = Template(filename=str(makofile))
-    for i, member in enumerate(ensemble):
+    if len(ensemble) > 0:
+        setup_members(
+            ensemble_path, makofile, [(0, ensemble[0])], output=output, **kwargs
+        )
+    if num_workers == 1 or len(members) <= 1:
+        setup_members(
+            ensemble_path,
+            makofile,
+            [(i, ensemble[i]) for i in members],
+            output=output,
+            **kwargs,
+        )
+    else:
+        if chunk_size is None:
+            chunk_size = math.ceil(len(members) / (4 * num_workers))
+        with ProcessPoolExecutor(max_workers=num_workers) as workers:
+            chunks: list[Future] = [
+                workers.submit(
+                    setup_members,
+                    ensemble_path,
+                    makofile,
+                    [(i, ensemble[i]) for i in members[start : start + chunk_size]],
+                    output=output,
+                    **kwargs,
+                )
+                for start in range(0, len(members), chunk_size)
+            ]
+            for chunk in chunks:
+                # Raise errors of the workers.
+                chunk.result()
+    # pyopmnearwell creates these unneeded folders, so we remove them.
+    try:
+        shutil.rmtree(ensemble_path / "preprocessing")
+    except FileNotFoundError:
+        pass  # No preprocessing folder
+    (ensemble_path / INITIALIZATIONS).unlink(missing_ok=True)
+    if share_initialization and len(ensemble) > 0:
+        share_initializations(ensemble_path, [0] + members)
+    logger.info(f"Filled templates for {len(ensemble)} members")
+
+
+def initialization_key(deck: pathlib.Path) -> str:
+    """Hash of a deck before the SCHEDULE section, including the content of the
+    included files.
+
+    Args:
+        deck (pathlib.Path): Path to the deck. Included files are relative to its
+            folder.
+
+    Returns:
+        str: Hex digest that is equal for decks with the same initialization.
+
+    """
+    digest = hashlib.sha256()
+    text: str = deck.read_text(encoding="utf8")
+    lines: list[str] = text.split("\nSCHEDULE")[0].splitlines()
+    files: list[str] = []
+    while lines:
+        line: str = lines.pop(0).split("--")[0].strip()
+        digest.update(line.encode())
+        if line in ["INCLUDE", "GDFILE"] and lines:
+            # The content of the file counts, not its path (the members include the
+            # files of the first member or their own ones).
+            name: str = lines.pop(0).split("--")[0].strip().rstrip("/").strip()
+            path: pathlib.Path = deck.parent / name.strip("'")
+            if name in files or not path.is_file():
+                digest.update(name.encode())
+                continue
+            files.append(name)
+            if line == "GDFILE":
+                digest.update(path.read_bytes())
+            else:
+                # Files included from the included files are relative to the deck.
+                lines = path.read_text(encoding="utf8").splitlines() + lines
+    return digest.hexdigest()
+
+
+def share_initializations(ensemble_path: pathlib.Path, members: list[int]) -> None:
+    """Initialize the members with the same initialization from one restart file.
+
+    The members are grouped by ``initialization_key``. For each group with more than
+    one member, a deck that only initializes the model is written to
+    ``initialization_{k}/preprocessing`` (next to a copy of the files of the first
+    member of the group), and the decks of the members restart from its restart file at
+    t=0. The groups are written to ``INITIALIZATIONS`` and ``run_ensemble`` runs the
+    initializations before the members.
+
+    Args:
+        ensemble_path (pathlib.Path): The path to the ensemble directory.
+        members (list[int]): Indices of the members that were set up.
+
+    """
+    groups: dict[str, list[int]] = {}
+    for i in members:
+        deck: pathlib.Path = (
+            ensemble_path / f"runfiles_{i}" / "preprocessing" / f"RUN_{i}.DATA"
+        )
+        groups.setdefault(initialization_key(deck), []).append(i)
+    initializations: list[dict[str, Any]] = []
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        k: int = len(initializations)
+        folder: pathlib.Path = ensemble_path / f"initialization_{k}"
+        shutil.rmtree(folder, ignore_errors=True)
+        shutil.copytree(
+            ensemble_path / f"runfiles_{group[0]}" / "preprocessing",
+            folder / "preprocessing",
+            ignore=shutil.ignore_patterns("*.DATA"),
+        )
+        text: str = (
+            ensemble_path
+            / f"runfiles_{group[0]}"
+            / "preprocessing"
+            / f"RUN_{group[0]}.DATA"
+        ).read_text(encoding="utf8")
+        (folder / "preprocessing" / f"INIT_{k}.DATA").write_text(
+            initialization_deck(text), encoding="utf8"
+        )
+        root: pathlib.Path = folder.resolve() / "output" / f"INIT_{k}"
+        for i in group:
+            deck = ensemble_path / f"runfiles_{i}" / "preprocessing" / f"RUN_{i}.DATA"
+            deck.write_text(
+                restart_deck(deck.read_text(encoding="utf8"), str(root), 0),
+                encoding="utf8",
+            )
+        initializations.append(
+            {"folder": folder.name, "deck": f"INIT_{k}", "members": group}
+        )
+    logger.info(
+        f"{sum(len(init['members']) for init in initializations)} members share "
+        + f"{len(initializations)} initializations"
+    )
+    with (ensemble_path / INITIALIZATIONS).open("w", encoding="utf8") as file:
+        json.dump(initializations, file, indent=2)
+
+
+def read_initializations(
+    ensemble_path: pathlib.Path, members: Sequence[int]
+) -> list[dict[str, Any]]:
+    """Shared initializations (see ``share_initializations``) of any of the members."""
+    if not (ensemble_path / INITIALIZATIONS).exists():
+        return []
+    with (ensemble_path / INITIALIZATIONS).open("r", encoding="utf8") as file:
+        return [init for init in json.load(file) if set(init["members"]) & set(members)]
+
+
+def setup_members(
+    ensemble_path: pathlib.Path,
+    makofile: str | pathlib.Path,
+    members: list[tuple[int, dict[str, Any]]],
+    output: Optional[dict[str, Any]] = None,
+    **kwargs,
+) -> None:
+    """Render the pyopmnearwell decks of some ensemble members and write their files.
+
+    Called by ``setup_ensemble`` for each chunk of members, possibly in a worker
+    process.
+
+    Args:
+        ensemble_path (pathlib.Path): The path to the ensemble directory.
+        makofile (str | pathlib.Path): The path to the Mako template file for the
+            pyopmnearwell deck for ensemble members.
+        members (list[tuple[int, dict[str, Any]]]): Index and parameters of each
+            member.
+        output (Optional[dict[str, Any]]): Selected output (``rptrst``, ``summary``,
+            and ``rptfreq``) that overrides the one of the rendered decks.
+        **kwargs: Passed to ``reservoir_files`` for all members except the first one.
+
+    Raises:
+        Exception: If there is an error rendering the Mako template.
+
+    """
+    mytemplate: Template = get_template(filename=makofile)
+    for i, member in members:
         try:
             filledtemplate = mytemplate.render(**member)
         except Exception as error:
@@ -272,42 +683,22 @@ def setup_ensemble(
 
         (ensemble_path / f"runfiles_{i}").mkdir(exist_ok=True)
         (ensemble_path / f"runfiles_{i}" / "preprocessing").mkdir(exist_ok=True)
-        # NOTE: It might be possible to skip the writing and deleting of the toml file
-        with open(
-            f"{ensemble_path}/runfiles_{i}/input.toml",
-            "w",
-            encoding="utf8",
-        ) as file:
-            file.write(filledtemplate)
-        dic = process_input(
+        dic = process_input_text(
             {
                 "pat": dirname / "..",  # Path to pyopmnearwell.
                 "fol": ensemble_path / f"runfiles_{i}",
             },
-            f"{ensemble_path}/runfiles_{i}/input.toml",
+            filledtemplate,
         )
-        os.system(f"rm {ensemble_path}/runfiles_{i}/input.toml")
         dic.update({"runname": f"RUN_{i}"})
+        dic.update(output or {})
         dic["fprep"] = f"{dic['fol']}/preprocessing"
         dic["foutp"] = f"{dic['fol']}/output"
         # Always calculate geology, grid, tables, etc. for the first ensemble member.
         if i == 0:
             reservoir_files(dic)
         else:
-            reservoir_files(
-                dic,
-                **kwargs,
-                # recalc_grid=recalc_grid,
-                # recalc_tables=recalc_tables,
-                # recalc_sections=recalc_sections,
-                # inc_folder=pathlib.Path("..") / ".." / "runfiles_0" / "preprocessing",
-            )
-    # pyopmnearwell creates these unneeded folders, so we remove them.
-    try:
-        shutil.rmtree(ensemble_path / "preprocessing")
-    except FileNotFoundError:
-        pass  # No preprocessing folder
-    logger.info(f"Filled templates for {len(ensemble)} members")
+            reservoir_files(dic, **kwargs)
 
 
 def get_flags(
@@ -335,6 +726,38 @@ def get_flags(
         return (" ").join(command_line_args).rstrip()
 
 
+@overload
+def run_ensemble(
+    flow_path: str | pathlib.Path,
+    ensemble_path: str | pathlib.Path,
+    runspecs: dict[str, Any],
+    ecl_keywords: list[str],
+    init_keywords: list[str],
+    summary_keywords: list[str],
+    num_report_steps: Optional[int] = None,
+    keep_result_files: bool = False,
+    *,
+    store_path: str | pathlib.Path,
+    **kwargs,
+) -> EnsembleStore: ...
+
+
+@overload
+def run_ensemble(
+    flow_path: str | pathlib.Path,
+    ensemble_path: str | pathlib.Path,
+    runspecs: dict[str, Any],
+    ecl_keywords: list[str],
+    init_keywords: list[str],
+    summary_keywords: list[str],
+    num_report_steps: Optional[int] = None,
+    keep_result_files: bool = False,
+    *,
+    store_path: None = None,
+    **kwargs,
+) -> dict[str, Any]: ...
+
+
 def run_ensemble(
     flow_path: str | pathlib.Path,
     ensemble_path: str | pathlib.Path,
@@ -344,10 +767,17 @@ def run_ensemble(
     summary_keywords: list[str],
     num_report_steps: Optional[int] = None,
     keep_result_files: bool = False,
+    *,
+    store_path: Optional[str | pathlib.Path] = None,
     **kwargs,
-) -> dict[str, Any]:
+) -> dict[str, Any] | EnsembleStore:
     """Run OPM Flow for each ensemble member and store data.
 
+    Up to ``runspecs["npruns"]`` Flow processes run at all times; as soon as one member
+    finishes, the next one is launched. The data of finished members is extracted in a
+    separate pool of worker processes, i.e., extraction overlaps with the running
+    simulations.
+
     Note: The initial time step (i.e., t=0) is always disregarded.
 
     Args:
@@ -360,17 +790,41 @@ def run_ensemble(
         num_report_steps (Optional[int], optional): Disregard an ensemble simulation if
             it did not run to the last report step. Defaults to None.
         keep_result_files (bool): Keep result files of all ensemble members, not
-            only the first one. Defaults to False.
+            only the first one, and of the shared initializations (see
+            ``setup_ensemble``). Defaults to False.
+        store_path (Optional[str | pathlib.Path], optional): Write the data of each
+            member to an on-disk ``EnsembleStore`` at this path as soon as it is
+            extracted, instead of keeping it in memory. The store is returned instead of
+            the ``dict``. Defaults to None.
         **kwargs: Possible parameters are:
 
             - step_size_time (int): Save data only for every ``step_size_time`` report
-              step. Default is 1.
+              step. If the members were set up with a ``step_size_time``, the restart
+              arrays are only in the files at these report steps. Default is 1.
             - step_size_cell (int): Save data only for every ``step_size_cell`` grid
               cell. Default is 1.
             - flags (str): Flags to run OPM Flow with.
+            - timeout (float): Wall-clock limit of each Flow run [s]. Runs that exceed
+              it are killed (see ``pyopmnearwell.utils.runner``). Default is None.
+            - telemetry (bool): Run Flow with ``--output-extra-convergence-info=steps``
+              and write the time steps, chops, iterations, and well convergence
+              failures of each member to ``telemetry_runs.csv`` and
+              ``telemetry_steps.csv`` in ``ensemble_path`` (see
+              ``pyopmnearwell.ml.telemetry``). Default is False.
+            - num_extraction_workers (int): Number of processes that extract the data
+              of finished members. Default is 1.
+            - state_file (str | pathlib.Path): SQLite file with the campaign state (see
+              ``pyopmnearwell.ml.campaign``). Members that are done or disregarded are
+              skipped, i.e., an interrupted campaign can be resumed by calling
+              ``run_ensemble`` again. Members whose Flow run, extraction, or shared
+              initialization fails are marked as failed instead of stopping the
+              campaign. If no ``store_path`` is given, the data is kept in
+              ``ensemble_path / "store"``, such that the data of finished members
+              survives a restart. Default is None.
 
     Returns:
-        dict[str, Any]: _description_
+        dict[str, Any] | EnsembleStore: Data of the valid members (a list of arrays
+            per keyword), or the ``EnsembleStore`` if a ``store_path`` is given.
 
     """
     # Ensure ``ensemble_path`` is a ``Path`` object.
@@ -385,106 +839,305 @@ def run_ensemble(
     # extracting the data.
     step_size_time: int = kwargs.get("step_size_time", 1)
     step_size_cell: int = kwargs.get("step_size_cell", 1)
+    flags: list[str] = shlex.split(kwargs.get("flags", ""))
+    collect_telemetry: bool = kwargs.get("telemetry", False)
+    if collect_telemetry:
+        flags.append(telemetry.INFOSTEP_FLAG)
+    telemetry_runs: list[dict[str, Any]] = []
+    telemetry_steps: dict[int, dict[str, np.ndarray]] = {}
+    runner: FlowRunner = FlowRunner(str(flow_path), timeout=kwargs.get("timeout"))
+    store: Optional[EnsembleStore] = None
+    if store_path is not None:
+        store = EnsembleStore(store_path, num_members=runspecs["npoints"])
+    state: Optional[campaign.CampaignState] = None
+    if kwargs.get("state_file") is not None:
+        state = campaign.CampaignState(kwargs["state_file"])
+        state.register(range(runspecs["npoints"]))
+        if store is None:
+            store = EnsembleStore(
+                ensemble_path / "store", num_members=runspecs["npoints"]
+            )
+    members: list[int] = [
+        j
+        for j in range(runspecs["npoints"])
+        if state is None or not state.is_finished(j)
+    ]
+    if state is not None:
+        logger.info(
+            f"Resuming campaign: {runspecs['npoints'] - len(members)} members finished"
+        )
+    initializations: list[dict[str, Any]] = read_initializations(ensemble_path, members)
+
+    with (
+        ThreadPoolExecutor(max_workers=runspecs["npruns"]) as runners,
+        ProcessPoolExecutor(
+            max_workers=kwargs.get("num_extraction_workers", 1)
+        ) as extractors,
+    ):
+
+        def run_member(j: int) -> Future:
+            """Run Flow for member ``j`` and submit the extraction of its data."""
+            if state is not None:
+                state.set_status(j, campaign.RUNNING)
+            result: dict[str, Any] = runner.run(
+                ensemble_path / f"runfiles_{j}" / "preprocessing" / f"RUN_{j}.DATA",
+                ensemble_path / f"results_{j}",
+                flags,
+            )
+            if result["status"] != "done":
+                logger.warning(
+                    f"Flow {result['status']} for ensemble run {j} after "
+                    + f"{result['walltime']:.1f} s at report step {result['steps']}"
+                )
+            if collect_telemetry:
+                # Read the telemetry before the extraction removes the result folder.
+                totals, steps = telemetry.run_telemetry(
+                    ensemble_path / f"results_{j}", f"RUN_{j}"
+                )
+                telemetry_runs.append(
+                    {
+                        "member": j,
+                        "status": result["status"],
+                        "walltime": result["walltime"],
+                        "report_steps": result["steps"],
+                    }
+                    | totals
+                )
+                telemetry_steps[j] = steps
+            return extractors.submit(
+                extract_member_data,
+                ensemble_path,
+                j,
+                ecl_keywords,
+                init_keywords,
+                summary_keywords,
+                num_report_steps,
+                step_size_time,
+                step_size_cell,
+                # Remove the run files and result folder (except for the first one
+                # that remains to check if everything went right).
+                not keep_result_files and j > 0,
+            )
 
-    for i in range(round(runspecs["npoints"] / runspecs["npruns"])):
-        command = " ".join(
+        # The members that share an initialization restart from its restart file, i.e.,
+        # they are not run if the initialization failed.
+        skipped: set[int] = set()
+        for init, initialization in zip(
+            initializations,
             [
-                f"{flow_path}"
-                + f" {ensemble_path / f'runfiles_{j}' / 'preprocessing' / f'RUN_{j}.DATA'}"
-                + f" --output-dir={ensemble_path / f'results_{j}'}"
-                + f" {kwargs.get('flags', '')} & "
-                for j in range(runspecs["npruns"] * i, runspecs["npruns"] * (i + 1))
-            ]
-        )
-        # TODO: Possibly better to use subprocess?
-        os.system(command + "wait")
-        for j in range(runspecs["npruns"] * i, runspecs["npruns"] * (i + 1)):
-            simulation_finished: bool = True
+                runners.submit(
+                    runner.run,
+                    ensemble_path
+                    / init["folder"]
+                    / "preprocessing"
+                    / f"{init['deck']}.DATA",
+                    ensemble_path / init["folder"] / "output",
+                    flags,
+                )
+                for init in initializations
+            ],
+        ):
+            result: dict[str, Any] = initialization.result()
+            if result["status"] == "done":
+                continue
+            logger.warning(
+                f"Flow {result['status']} for initialization {init['deck']} after "
+                + f"{result['walltime']:.1f} s, its members are not run"
+            )
+            group: set[int] = set(init["members"]) & set(members)
+            skipped |= group
+            for j in sorted(group):
+                if state is not None:
+                    state.set_status(j, campaign.FAILED)
+                    continue
+                if store is not None:
+                    store.invalidate(j)
+                num_disregarded_runs += 1
+        runs: dict[Future, int] = {
+            runners.submit(run_member, j): j for j in members if j not in skipped
+        }
+        # Handle the members as soon as their data is extracted, such that the data of
+        # finished members is written to the store instead of waiting in memory behind
+        # a slow member.
+        extracted: dict[int, dict[str, np.ndarray]] = {}
+        pending: set[Future] = set(runs)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                j = runs[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    if state is None:
+                        raise error
+                    state.set_status(j, campaign.FAILED)
+                    logger.warning(f"Ensemble run {j} failed: {error}")
+                    continue
+                if isinstance(result, Future):
+                    # Flow finished, wait for the extraction of the data.
+                    runs[result] = j
+                    pending.add(result)
+                    continue
+                if result is not None and store is not None:
+                    store.write_member(j, result)
+                elif result is not None:
+                    extracted[j] = result
+                else:
+                    if store is not None:
+                        store.invalidate(j)
+                    num_disregarded_runs += 1
+                    logger.info(f"Disregarded ensemble run {j}")
+                if state is not None:
+                    state.set_status(
+                        j, campaign.DONE if result is not None else campaign.DISREGARDED
+                    )
+        # Keep the data in the order of the members.
+        for j in sorted(extracted):
+            for keyword, values in extracted.pop(j).items():
+                data[keyword].append(values)
+    logger.info(f"Disregarded {num_disregarded_runs} of {len(members)} runs")
+    if collect_telemetry:
+        telemetry.write_telemetry(ensemble_path, telemetry_runs, telemetry_steps)
+    if not keep_result_files:
+        for init in initializations:
+            shutil.rmtree(ensemble_path / init["folder"] / "output", ignore_errors=True)
+
+    if store is not None and store_path is None:
+        # The store was only created to checkpoint the campaign. Return the data of all
+        # finished members in the usual format.
+        valid_members: np.ndarray = np.flatnonzero(store.valid)
+        return {
+            keyword: (
+                [np.asarray(store[keyword][j]) for j in valid_members]
+                if keyword in store
+                else []
+            )
+            for keyword in data
+        }
+    return data if store is None else store
+
+
+def extract_member_data(
+    ensemble_path: pathlib.Path,
+    j: int,
+    ecl_keywords: list[str],
+    init_keywords: list[str],
+    summary_keywords: list[str],
+    num_report_steps: Optional[int] = None,
+    step_size_time: int = 1,
+    step_size_cell: int = 1,
+    remove_files: bool = False,
+) -> Optional[dict[str, np.ndarray]]:
+    """Extract the data of a finished ensemble member.
 
-            resdata_file: ResdataFile = ResdataFile(
-                str(ensemble_path / f"results_{j}" / f"RUN_{j}.UNRST"),
+    Args:
+        ensemble_path (pathlib.Path): The path to the ensemble directory.
+        j (int): Index of the ensemble member.
+        ecl_keywords (list[str]): Keywords to extract from the ``*.UNRST`` file.
+        init_keywords (list[str]): Keywords to extract from the ``*.INIT`` file.
+        summary_keywords (list[str]): Keywords to extract from the ``*.SMSPEC`` file.
+        num_report_steps (Optional[int], optional): Disregard the member if it did not
+            run to the last report step. Defaults to None.
+        step_size_time (int, optional): Save data only for every ``step_size_time``
+            report step. Defaults to 1.
+        step_size_cell (int, optional): Save data only for every ``step_size_cell``
+            grid cell. Defaults to 1.
+        remove_files (bool, optional): Remove the run files and result folder of the
+            member after extracting the data. Defaults to False.
+
+    Returns:
+        Optional[dict[str, np.ndarray]]: The data for each keyword, or ``None`` if the
+            member is disregarded.
+
+    """
+    simulation_finished: bool = True
+
+    resdata_file: ResdataFile = ResdataFile(
+        str(ensemble_path / f"results_{j}" / f"RUN_{j}.UNRST"),
+        flags=FileMode.CLOSE_STREAM,
+    )
+    # With ``rptfreq`` (see ``setup_ensemble``), only every ``stride``-th report step is
+    # in the file. The data is then taken at the report steps ``stride``,
+    # ``stride + step_size_time``, etc.
+    report_list: list[int] = list(resdata_file.report_list)
+    stride: int = report_list[1] - report_list[0] if len(report_list) > 1 else 1
+    # The file of a run from scratch starts with the initial state (report step 0),
+    # which is disregarded. Flow does not write the restart step again, hence the file
+    # of a member that restarts from a shared initialization (see
+    # ``share_initializations``) starts at the first report step after t=0.
+    first: int = 1 if report_list[:1] == [0] else 0
+    if step_size_time % stride != 0:
+        raise ValueError(
+            f"step_size_time={step_size_time} is not a multiple of the {stride} report "
+            + "steps between the restart arrays"
+        )
+    # Skip result, if the simulation did not run to the last time step.
+    if (
+        num_report_steps is not None
+        and resdata_file.num_report_steps() < num_report_steps // stride
+    ):
+        simulation_finished = False
+
+    # Check again if the simulation data is available for all time steps.
+    # It seems that sometimes the keyword array has zero report steps, even
+    # though `resdata_file.num_report_steps()` is nonzero.
+    member_data: dict[str, np.ndarray] = {}
+    for keyword in ecl_keywords:
+        # Append the data corresponding to the keyword for all chosen report
+        # steps and cells.
+        member_data[keyword] = np.array(resdata_file.iget_kw(keyword))[
+            first :: step_size_time // stride, ::step_size_cell
+        ]
+        if (
+            num_report_steps is not None
+            and member_data[keyword].shape[0] < num_report_steps // step_size_time
+        ):
+            simulation_finished = False
+
+        # Disregard the result if an `inf` value is returned.
+        elif np.any(np.isinf(member_data[keyword])):
+            simulation_finished = False
+
+    # Only return data if the simulation finished.
+    if simulation_finished:
+        # Get additional data from init and summary file.
+        if len(init_keywords) > 0:
+            init_file: ResdataFile = ResdataFile(
+                str(ensemble_path / f"results_{j}" / f"RUN_{j}.INIT"),
                 flags=FileMode.CLOSE_STREAM,
             )
-            # Skip result, if the simulation did not run to the last time step.
-            if (
-                num_report_steps is not None
-                and resdata_file.num_report_steps() < num_report_steps
-            ):
-                simulation_finished = False
-
-            # Check again if the simulation data is available for all time steps.
-            # It seems that sometimes the keyword array has zero report steps, even
-            # though `resdata_file.num_report_steps()` is nonzero.
-            member_data: dict[str, np.ndarray] = {}
-            for keyword in ecl_keywords:
-                # Append the data corresponding to the keyword for all chosen report
-                # steps and cells. Disregard the zeroth time step.
-                member_data[keyword] = np.array(resdata_file.iget_kw(keyword))[
-                    1::step_size_time, ::step_size_cell
+            for keyword in init_keywords:
+                # Append the data corresponding to the keyword for all chosen
+                # cells.
+                # NOTE: The array has shape ``[1, num_cells]``, hence no axis
+                # needs to be added.
+                member_data[keyword] = np.array(init_file.iget_kw(keyword))[
+                    ::step_size_cell
                 ]
-                if (
-                    num_report_steps is not None
-                    and member_data[keyword].shape[0]
-                    < num_report_steps // step_size_time
-                ):
-                    simulation_finished = False
-
-                # Disregard the result if an `inf` value is returned.
-                elif np.any(np.isinf(member_data[keyword])):
-                    simulation_finished = False
-
-            # Only append data if the simulation finished.
-            if simulation_finished:
-                for keyword in ecl_keywords:
-                    data[keyword].append(member_data[keyword])
-
-                # Get additional data from init and summary file.
-                if len(init_keywords) > 0:
-                    init_file: ResdataFile = ResdataFile(
-                        str(ensemble_path / f"results_{j}" / f"RUN_{j}.INIT"),
-                        flags=FileMode.CLOSE_STREAM,
-                    )
-                    for keyword in init_keywords:
-                        # Append the data corresponding to the keyword for all chosen
-                        # cells.
-                        # NOTE: The array has shape ``[1, num_cells]``, hence no axis
-                        # needs to be added.
-                        data[keyword].append(
-                            np.array(init_file.iget_kw(keyword))[::step_size_cell]
-                        )
-
-                if len(summary_keywords):
-                    # TODO: Check if lazyload option for ``Summary`` is faster or
-                    # slower.
-                    summary_file: Summary = Summary(
-                        str(ensemble_path / f"results_{j}" / f"RUN_{j}.SMSPEC")
-                    )
-                    for keyword in summary_keywords:
-                        # Append the data corresponding to the keyword for all chosen report
-                        # steps (not for all time steps). The ``*.SMSPEC`` file does not
-                        # include the zeroth report step. Add a dimension to make the array
-                        # broadcastable to data from the ``*.UNRST`` and ``*.INIT`` files.
-                        data[keyword].append(
-                            np.array(
-                                summary_file.get_values(keyword, report_only=True)
-                            )[::step_size_time, None]
-                        )
-                    # NOTE: There does not seem to be a way to specify that a
-                    # ``Summary`` object shall be closed after use. Also, there is no
-                    # context manager for ``Summary`` and ``ResdataFile`` objects.
 
-            else:
-                num_disregarded_runs += 1
-                logger.info(f"Disregarded ensemble run {j}")
+        if len(summary_keywords):
+            # TODO: Check if lazyload option for ``Summary`` is faster or
+            # slower.
+            summary_file: Summary = Summary(
+                str(ensemble_path / f"results_{j}" / f"RUN_{j}.SMSPEC")
+            )
+            for keyword in summary_keywords:
+                # Append the data corresponding to the keyword for all chosen report
+                # steps (not for all time steps). The ``*.SMSPEC`` file does not
+                # include the zeroth report step. Add a dimension to make the array
+                # broadcastable to data from the ``*.UNRST`` and ``*.INIT`` files.
+                member_data[keyword] = np.array(
+                    summary_file.get_values(keyword, report_only=True)
+                )[stride - 1 :: step_size_time, None]
+            # NOTE: There does not seem to be a way to specify that a
+            # ``Summary`` object shall be closed after use. Also, there is no
+            # context manager for ``Summary`` and ``ResdataFile`` objects.
 
-            # Remove the run files and result folder (except for the first one that
-            # remains to check if everything went right).
-            if not keep_result_files and j > 0:
-                shutil.rmtree(ensemble_path / f"results_{j}")
-                shutil.rmtree(ensemble_path / f"runfiles_{j}")
-        logger.info(f"Disregarded {num_disregarded_runs} of {runspecs['npoints']} runs")
+    if remove_files:
+        shutil.rmtree(ensemble_path / f"results_{j}")
+        shutil.rmtree(ensemble_path / f"runfiles_{j}")
 
-    return data
+    return member_data if simulation_finished else None
 
 
 def calculate_radii(
@@ -614,9 +1267,11 @@ def calculate_WI(
 
 
 def extract_features(
-    data: dict[str, Any],
+    data: dict[str, Any] | EnsembleStore,
     keywords: list[str],
     keyword_scalings: Optional[dict[str, float]] = None,
+    chunk_size: int = 64,
+    savepath: Optional[str | pathlib.Path] = None,
 ) -> np.ndarray:
     r"""Extract features from a ``run_ensemble`` run into a numpy array.
 
@@ -630,11 +1285,19 @@ def extract_features(
     - Saturation: [unitless]
     - Time: []
 
+    If ``data`` is an ``EnsembleStore``, the valid members are read lazily in chunks of
+    ``chunk_size`` members, such that only one chunk is in memory at a time.
+
     Args:
-        data (dict[str, Any]): Data generated by ``run_ensemble``.
+        data (dict[str, Any] | EnsembleStore): Data generated by ``run_ensemble``.
         keywords (list[str]): Keywords to extract. The features will be in the order of
         the keywords.
         keyword_scalings (Optional[dict[str, float]]): Scalings for the features.
+        chunk_size (int): Number of members read at once from an ``EnsembleStore``.
+            Default is 64.
+        savepath (Optional[str | pathlib.Path]): If given, the features are written to
+            a memory-mapped ``.npy`` file at this path, which is returned. Default is
+            None.
 
     Returns:
         feature_array: (numpy.ndarray): ``shape=(ensemble_size, num_report_steps, num_cells, num_features)``
@@ -644,6 +1307,32 @@ def extract_features(
         ValueError: If no data is found for one of the keywords.
 
     """
+    if isinstance(data, EnsembleStore):
+        feature_array: Optional[np.ndarray] = None
+        row: int = 0
+        for chunks in zip(
+            *[data.iter_chunks(keyword, chunk_size) for keyword in keywords]
+        ):
+            chunk_features: np.ndarray = extract_features(
+                {keyword: chunk for keyword, (_, chunk) in zip(keywords, chunks)},
+                keywords,
+                keyword_scalings,
+            )
+            if feature_array is None:
+                shape: tuple = (int(np.sum(data.valid)),) + chunk_features.shape[1:]
+                feature_array = (
+                    np.empty(shape, dtype=chunk_features.dtype)
+                    if savepath is None
+                    else np.lib.format.open_memmap(
+                        savepath, mode="w+", dtype=chunk_features.dtype, shape=shape
+                    )
+                )
+            feature_array[row : row + len(chunk_features)] = chunk_features
+            row += len(chunk_features)
+        if feature_array is None:
+            raise ValueError("The store has no valid members.")
+        return feature_array
+
     if keyword_scalings is None:
         keyword_scalings = {}
     features: list[np.ndarray] = []
@@ -661,9 +1350,12 @@ def extract_features(
     broadcasted_shape = np.broadcast_shapes(*[feature.shape for feature in features])
     features = [np.broadcast_to(feature, broadcasted_shape) for feature in features]
 
-    return np.stack(
+    feature_array = np.stack(
         features, axis=-1
     )  # ``shape=(ensemble_size, num_report_steps, num_cells, num_features)``
+    if savepath is not None:
+        np.save(savepath, feature_array)
+    return feature_array
 
 
 def integrate_fine_scale_value(
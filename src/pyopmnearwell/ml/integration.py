@@ -25,7 +25,8 @@ from typing import Any, Optional
 from mako import exceptions
 from mako.template import Template
 
-from pyopmnearwell.utils.mako import fill_template
+from pyopmnearwell.core.pyopmnearwell import main
+from pyopmnearwell.utils.mako import fill_template, get_template
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -153,7 +154,7 @@ def run_integration(
     variables: dict[str, list[float]] = runspecs["variables"]
     constants: dict[str, float] = runspecs["constants"]
 
-    mytemplate: Template = Template(filename=str(makofile))
+    mytemplate: Template = get_template(filename=makofile)
     if len({len(value) for value in variables.values()}) != 1:
         raise ValueError("All variables need to have the same number of values.")
     # Ignore MyPy complaining.
@@ -178,5 +179,4 @@ def run_integration(
         # Use our pyopmnearwell friend to run the 3D simulations and compare the
         # results.
         logger.info(f"Run {i}th integration run")
-        os.chdir(savepath)
-        os.system(f"pyopmnearwell -i run_{i}.toml -o run_{i} -p off")
+        main(["-i", str(savepath / f"run_{i}.toml"), "-o", str(savepath / f"run_{i}")])
@@ -0,0 +1,181 @@
+"""Out-of-core storage for the data of an ensemble run.
+
+``run_ensemble`` keeps the data of all members in memory by default. For large ensembles
+this does not fit into RAM. An ``EnsembleStore`` instead writes each member into
+preallocated, memory-mapped ``.npy`` arrays on disk, one per keyword, with layout
+``(member, report_step, cell)``. A validity mask marks the members that finished and were
+not disregarded.
+
+Example:
+    >>> store = run_ensemble(..., store_path=path)
+    >>> features = extract_features(store, ["PRESSURE", "SGAS"])
+
+    The store can be opened again later on without rerunning the ensemble:
+
+    >>> store = EnsembleStore(path)
+
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+from collections.abc import Iterator, Mapping
+from typing import Optional
+
+import numpy as np
+
+METADATA: str = "store.json"
+VALID: str = "VALID.npy"
+
+
+class EnsembleStore(Mapping):
+    """Memory-mapped on-disk store with one array per keyword.
+
+    The arrays of the keywords are allocated when the first member with data is written,
+    as their shapes are not known before. Reading a keyword returns a read-only
+    ``np.memmap``, i.e., nothing is loaded into memory until it is sliced.
+
+    Note: Rows of members that were disregarded (or did not run yet) are zero. Use
+        ``valid`` or ``iter_chunks`` to access only members with data.
+
+    """
+
+    def __init__(
+        self, path: str | pathlib.Path, num_members: Optional[int] = None
+    ) -> None:
+        """Open an existing store or create a new one.
+
+        Args:
+            path (str | pathlib.Path): Folder of the store.
+            num_members (Optional[int], optional): Number of ensemble members. Needs to
+                be given to create a new store. Defaults to None.
+
+        Raises:
+            ValueError: If the store does not exist and ``num_members`` is not given,
+                or if ``num_members`` does not match an existing store.
+
+        """
+        self.path: pathlib.Path = pathlib.Path(path)
+        metadata_file: pathlib.Path = self.path / METADATA
+        if metadata_file.exists():
+            with metadata_file.open("r", encoding="utf-8") as file:
+                self.metadata: dict = json.load(file)
+            if num_members is not None and num_members != self.num_members:
+                raise ValueError(
+                    f"The store at {self.path} has {self.num_members} members, "
+                    + f"not {num_members}."
+                )
+            self._valid: np.memmap = np.lib.format.open_memmap(
+                self.path / VALID, mode="r+"
+            )
+        elif num_members is None:
+            raise ValueError(f"There is no store at {self.path}.")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.metadata = {"num_members": num_members, "keywords": {}}
+            self._valid = np.lib.format.open_memmap(
+                self.path / VALID, mode="w+", dtype=bool, shape=(num_members,)
+            )
+            self._write_metadata()
+        self._arrays: dict[str, np.memmap] = {}
+
+    @property
+    def num_members(self) -> int:
+        """Number of ensemble members (valid or not)."""
+        return self.metadata["num_members"]
+
+    @property
+    def valid(self) -> np.ndarray:
+        """Boolean mask of the members with data, ``shape=(num_members,)``."""
+        return np.asarray(self._valid)
+
+    def __getitem__(self, keyword: str) -> np.memmap:
+        if keyword not in self.metadata["keywords"]:
+            raise KeyError(keyword)
+        return np.lib.format.open_memmap(
+            self.path / self.metadata["keywords"][keyword]["file"], mode="r"
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.metadata["keywords"])
+
+    def __len__(self) -> int:
+        return len(self.metadata["keywords"])
+
+    def write_member(self, j: int, member_data: dict[str, np.ndarray]) -> None:
+        """Write the data of member ``j`` and mark it as valid.
+
+        Args:
+            j (int): Index of the ensemble member.
+            member_data (dict[str, np.ndarray]): Data of the member for each keyword.
+
+        Raises:
+            ValueError: If the shape of an array differs from the allocated one.
+
+        """
+        for keyword, values in member_data.items():
+            array: np.memmap = self._allocate(keyword, values)
+            if array.shape[1:] != values.shape:
+                raise ValueError(
+                    f"Member {j} has shape {values.shape} for {keyword}, the store "
+                    + f"expects {array.shape[1:]}."
+                )
+            array[j] = values
+            array.flush()
+        self._valid[j] = True
+        self._valid.flush()
+
+    def invalidate(self, j: int) -> None:
+        """Mark member ``j`` as disregarded."""
+        self._valid[j] = False
+        self._valid.flush()
+
+    def iter_chunks(
+        self, keyword: str, chunk_size: int = 64
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Iterate over the valid members of a keyword in chunks.
+
+        Args:
+            keyword (str): Keyword to read.
+            chunk_size (int, optional): Number of members (valid or not) read at once.
+                Defaults to 64.
+
+        Yields:
+            tuple[np.ndarray, np.ndarray]: The member indices and the data of the valid
+                members in the chunk.
+
+        """
+        array: np.memmap = self[keyword]
+        for start in range(0, self.num_members, chunk_size):
+            indices: np.ndarray = start + np.flatnonzero(
+                self._valid[start : start + chunk_size]
+            )
+            if indices.size > 0:
+                yield indices, np.asarray(array[indices])
+
+    def _allocate(self, keyword: str, values: np.ndarray) -> np.memmap:
+        """Return the array of a keyword, creating it on the first write."""
+        if keyword not in self._arrays:
+            if keyword in self.metadata["keywords"]:
+                self._arrays[keyword] = np.lib.format.open_memmap(
+                    self.path / self.metadata["keywords"][keyword]["file"],
+                    mode="r+",
+                )
+            else:
+                file: str = (
+                    f"{len(self.metadata['keywords'])}_{keyword.replace(':', '_')}.npy"
+                )
+                self._arrays[keyword] = np.lib.format.open_memmap(
+                    self.path / file,
+                    mode="w+",
+                    dtype=values.dtype,
+                    shape=(self.num_members,) + values.shape,
+                )
+                self.metadata["keywords"][keyword] = {"file": file}
+                self._write_metadata()
+        return self._arrays[keyword]
+
+    def _write_metadata(self) -> None:
+        with (self.path / METADATA).open("w", encoding="utf-8") as file:
+            json.dump(self.metadata, file, indent=2)
@@ -0,0 +1,298 @@
+"""Performance telemetry of the Flow runs of an ensemble.
+
+Flow writes one line per time step (including the failed ones that are chopped) to the
+``.INFOSTEP`` file if it is run with ``--output-extra-convergence-info=steps``, and
+reports the chopped time steps, well convergence failures, and the total iterations in
+the ``.PRT`` file. ``run_ensemble`` with ``telemetry=True`` adds the flag, reads both
+files of each member before its result folder is removed, and writes a per-run table
+(``telemetry_runs.csv``) and a per-step table (``telemetry_steps.csv``) next to the
+ensemble data. ``telemetry_report`` links the slowest members to their sampled
+parameters.
+
+Example:
+    >>> run_ensemble(flow, path, runspecs, ecl_keywords, [], [], telemetry=True)
+    >>> runs, steps = read_telemetry(path)
+    >>> print(telemetry_report(runs, ensemble))
+
+"""
+
+from __future__ import annotations
+
+import csv
+import pathlib
+import re
+from collections.abc import Sequence
+from typing import Any, Optional
+
+import numpy as np
+
+INFOSTEP_FLAG: str = "--output-extra-convergence-info=steps"
+RUNS_TABLE: str = "telemetry_runs.csv"
+STEPS_TABLE: str = "telemetry_steps.csv"
+
+PRT_COUNTS: dict[str, re.Pattern] = {
+    "chops": re.compile(r"Timestep chopped to"),
+    "convergence_failures": re.compile(r"Solver convergence failure"),
+    "well_failures": re.compile(
+        r"well.*(did not converge|failed to converge|solution failed)", re.IGNORECASE
+    ),
+}
+"""Events that are counted in the ``.PRT`` file (one per line)."""
+
+PRT_VALUES: dict[str, re.Pattern] = {
+    "simulation_time": re.compile(
+        r"^\s*(?:Simulation|Total) time[^:]*:\s*([\d.eE+-]+)"
+    ),
+    "linearizations": re.compile(r"^\s*Overall Linearizations:\s*(\d+)"),
+    "newton_iterations": re.compile(r"^\s*Overall Newton Iterations:\s*(\d+)"),
+    "linear_iterations": re.compile(r"^\s*Overall Linear Iterations:\s*(\d+)"),
+}
+"""Totals in the performance summary at the end of the ``.PRT`` file."""
+
+
+def column_name(header: str) -> str:
+    """Column name of an ``.INFOSTEP`` header, e.g., ``TStep(day)`` -> ``tstep``."""
+    return header.split("(")[0].lower()
+
+
+def read_infostep(path: str | pathlib.Path) -> dict[str, np.ndarray]:
+    """Read the per-step table of an ``.INFOSTEP`` file.
+
+    Args:
+        path (str | pathlib.Path): Path to the file.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column, e.g., ``time`` and ``tstep``
+            [days], the ``assembly`` and ``lsolve`` times [s], ``newtit`` and ``linit``
+            iterations, and ``conv`` (0 for the time steps that were chopped).
+
+    """
+    lines: list[str] = [
+        line
+        for line in pathlib.Path(path).read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+    if not lines:
+        return {}
+    names: list[str] = [column_name(header) for header in lines[0].split()]
+    values: np.ndarray = np.array(
+        [[float(value) for value in line.split()] for line in lines[1:]]
+    ).reshape(-1, len(names))
+    return {name: values[:, i] for i, name in enumerate(names)}
+
+
+def read_prt(path: str | pathlib.Path) -> dict[str, float]:
+    """Count the failure events and read the iteration totals of a ``.PRT`` file.
+
+    Args:
+        path (str | pathlib.Path): Path to the file.
+
+    Returns:
+        dict[str, float]: Counts of ``PRT_COUNTS`` and values of ``PRT_VALUES`` (NaN if
+            the run did not write the performance summary).
+
+    """
+    telemetry: dict[str, float] = {name: 0 for name in PRT_COUNTS}
+    telemetry.update({name: np.nan for name in PRT_VALUES})
+    with pathlib.Path(path).open("r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            for name, pattern in PRT_COUNTS.items():
+                if pattern.search(line):
+                    telemetry[name] += 1
+            for name, pattern in PRT_VALUES.items():
+                match: Optional[re.Match] = pattern.match(line)
+                if match is not None and np.isnan(telemetry[name]):
+                    telemetry[name] = float(match[1])
+    return telemetry
+
+
+def run_telemetry(
+    folder: str | pathlib.Path, deck: str
+) -> tuple[dict[str, float], dict[str, np.ndarray]]:
+    """Per-run and per-step telemetry of a Flow run.
+
+    Args:
+        folder (str | pathlib.Path): Output folder of the run.
+        deck (str): Name of the deck without extension, e.g., ``RUN_0``.
+
+    Returns:
+        tuple[dict[str, float], dict[str, np.ndarray]]: Totals of the run (number of
+            ``timesteps`` and ``cut_timesteps``, the sums of the ``.INFOSTEP`` columns,
+            and the ``.PRT`` telemetry), and the ``.INFOSTEP`` table. Missing files
+            give NaN totals and an empty table.
+
+    """
+    folder = pathlib.Path(folder)
+    steps: dict[str, np.ndarray] = {}
+    if (folder / f"{deck}.INFOSTEP").exists():
+        steps = read_infostep(folder / f"{deck}.INFOSTEP")
+    totals: dict[str, float] = {
+        "timesteps": len(steps["conv"]) if "conv" in steps else np.nan,
+        "cut_timesteps": (
+            float(np.sum(steps["conv"] == 0)) if "conv" in steps else np.nan
+        ),
+    }
+    for name, values in steps.items():
+        if name not in ["time", "tstep", "conv"]:
+            totals[name] = float(np.sum(values))
+    if (folder / f"{deck}.PRT").exists():
+        totals.update(read_prt(folder / f"{deck}.PRT"))
+    else:
+        totals.update({name: np.nan for name in list(PRT_COUNTS) + list(PRT_VALUES)})
+    return totals, steps
+
+
+def write_telemetry(
+    ensemble_path: str | pathlib.Path,
+    runs: Sequence[dict[str, Any]],
+    steps: dict[int, dict[str, np.ndarray]],
+) -> None:
+    """Write the per-run and per-step tables next to the ensemble data.
+
+    Rows of members that are already in the tables (e.g., of a resumed campaign) are
+    replaced.
+
+    Args:
+        ensemble_path (str | pathlib.Path): Path to the ensemble directory.
+        runs (Sequence[dict[str, Any]]): Per-run telemetry with the ``member`` index.
+        steps (dict[int, dict[str, np.ndarray]]): ``.INFOSTEP`` table of each member.
+
+    """
+    ensemble_path = pathlib.Path(ensemble_path)
+    members: set[int] = {int(run["member"]) for run in runs}
+    old_runs, old_steps = read_telemetry(ensemble_path)
+    run_rows: list[dict[str, Any]] = [
+        row for row in table_rows(old_runs) if int(row["member"]) not in members
+    ] + list(runs)
+    step_rows: list[dict[str, Any]] = [
+        row for row in table_rows(old_steps) if int(row["member"]) not in members
+    ]
+    for member, table in steps.items():
+        step_rows += [{"member": member} | row for row in table_rows(table)]
+    write_rows(ensemble_path / RUNS_TABLE, sorted(run_rows, key=member_key))
+    write_rows(ensemble_path / STEPS_TABLE, sorted(step_rows, key=member_key))
+
+
+def member_key(row: dict[str, Any]) -> int:
+    """Sort key of the rows of a table."""
+    return int(row["member"])
+
+
+def table_rows(table: dict[str, np.ndarray]) -> list[dict[str, Any]]:
+    """Rows of a columnar table."""
+    columns: list[str] = list(table)
+    num_rows: int = len(table[columns[0]]) if columns else 0
+    return [{name: table[name][i] for name in columns} for i in range(num_rows)]
+
+
+def write_rows(path: pathlib.Path, rows: list[dict[str, Any]]) -> None:
+    """Write rows with possibly different keys to a CSV file."""
+    columns: list[str] = list(dict.fromkeys(name for row in rows for name in row))
+    with path.open("w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns, restval="nan")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_table(path: pathlib.Path) -> dict[str, np.ndarray]:
+    """Read a CSV table into columns (float arrays, except for non-numeric columns)."""
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8", newline="") as file:
+        rows: list[dict[str, str]] = list(csv.DictReader(file))
+    table: dict[str, np.ndarray] = {}
+    for name in rows[0] if rows else []:
+        values: list[str] = [row[name] for row in rows]
+        try:
+            table[name] = np.array(values, dtype=float)
+        except ValueError:
+            table[name] = np.array(values)
+    return table
+
+
+def read_telemetry(
+    ensemble_path: str | pathlib.Path,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """Read the per-run and per-step tables of an ensemble.
+
+    Args:
+        ensemble_path (str | pathlib.Path): Path to the ensemble directory.
+
+    Returns:
+        tuple[dict[str, np.ndarray], dict[str, np.ndarray]]: Columns of the per-run and
+            per-step tables (empty if there is no telemetry).
+
+    """
+    ensemble_path = pathlib.Path(ensemble_path)
+    return read_table(ensemble_path / RUNS_TABLE), read_table(
+        ensemble_path / STEPS_TABLE
+    )
+
+
+def cost_statistics(keyword: str, cost: np.ndarray, num_runs: int) -> str:
+    """Line with the median and maximum of the finite cost values of the runs.
+
+    Both are NaN without values, e.g., the iterations if no ``.INFOSTEP`` was written.
+    """
+    median, maximum = (np.median(cost), np.max(cost)) if cost.size else (np.nan, np.nan)
+    return (
+        f"{keyword}: median {median:.3g}, max {maximum:.3g} "
+        + f"({maximum / median:.1f} x median) over {num_runs} runs"
+    )
+
+
+def telemetry_report(
+    runs: dict[str, np.ndarray],
+    ensemble: Sequence[dict[str, Any]],
+    keyword: str = "walltime",
+    top: int = 5,
+) -> str:
+    """Aggregate report that links the slow members to their sampled parameters.
+
+    Args:
+        runs (dict[str, np.ndarray]): Per-run table, see ``read_telemetry``.
+        ensemble (Sequence[dict[str, Any]]): Parameters of each member, as passed to
+            ``setup_ensemble``.
+        keyword (str, optional): Column that measures the cost of a run. Defaults to
+            ``"walltime"``.
+        top (int, optional): Number of slowest members to list. Defaults to 5.
+
+    Returns:
+        str: Statistics of the cost, the slowest members with their telemetry and
+            parameters, and the correlation of each numeric parameter with the cost.
+
+    """
+    members: np.ndarray = runs["member"].astype(int)
+    cost: np.ndarray = runs[keyword]
+    finite: np.ndarray = np.isfinite(cost)
+    lines: list[str] = [
+        cost_statistics(keyword, cost[finite], len(members)),
+        "",
+        f"Slowest {min(top, len(members))} runs:",
+    ]
+    columns: list[str] = [
+        name
+        for name in ["status", "timesteps", "cut_timesteps", "chops", "well_failures"]
+        if name in runs
+    ]
+    for i in np.argsort(-np.nan_to_num(cost, nan=-np.inf))[:top]:
+        telemetry: str = ", ".join(f"{name} = {runs[name][i]}" for name in columns)
+        parameters: str = ", ".join(
+            f"{name} = {value}" for name, value in ensemble[members[i]].items()
+        )
+        lines.append(
+            f"  member {members[i]}: {keyword} = {cost[i]:.3g}, {telemetry}; "
+            + parameters
+        )
+    lines += ["", f"Correlation of the parameters with {keyword}:"]
+    for name in ensemble[members[0]] if len(members) else []:
+        values: list[Any] = [ensemble[j][name] for j in members]
+        if not all(isinstance(value, (int, float)) for value in values):
+            continue
+        if np.sum(finite) < 2 or np.ptp(np.array(values)[finite]) == 0:
+            continue
+        correlation: float = float(
+            np.corrcoef(np.array(values)[finite], cost[finite])[0, 1]
+        )
+        lines.append(f"  {name}: {correlation:+.2f}")
+    return "\n".join(lines) + "\n"
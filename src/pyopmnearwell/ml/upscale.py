@@ -12,7 +12,7 @@ in the ``Upscaler`` protocol.
 import math
 import pathlib
 from abc import ABC, abstractmethod
-from typing import Protocol
+from typing import Callable, Protocol
 
 import numpy as np
 
@@ -143,6 +143,46 @@ class BaseUpscaler(ABC):
             pass
         return feature[:, ::step_size_t, ::, ::step_size_x]
 
+    def apply_in_chunks(
+        self: Upscaler,
+        method: Callable[..., np.ndarray],
+        features: np.ndarray,
+        *args,
+        chunk_size: int = 64,
+        **kwargs,
+    ) -> np.ndarray:
+        """Apply a feature method of the upscaler to chunks of ensemble members.
+
+        Intended for features that do not fit into memory, e.g., a memory-mapped array
+        returned by ``ensemble.extract_features`` for an ``EnsembleStore``. Only one
+        chunk of members is read at a time.
+
+        Example:
+            >>> upscaler.apply_in_chunks(
+            >>>     upscaler.get_vertically_averaged_values, features, feature_index=0
+            >>> )
+
+        Args:
+            method (Callable[..., np.ndarray]): Bound method of the upscaler that takes
+                the features as first argument, e.g.,
+                ``self.get_vertically_averaged_values``.
+            features (np.ndarray): The features, first axis are the ensemble members.
+            *args: Passed to ``method``.
+            chunk_size (int, optional): Number of members per chunk. Defaults to 64.
+            **kwargs: Passed to ``method``.
+
+        Returns:
+            np.ndarray: The results of ``method`` for all members.
+
+        """
+        # The methods check the shape of their results only after the first axis, so
+        # they work on any number of members.
+        results: list[np.ndarray] = [
+            method(np.asarray(features[start : start + chunk_size]), *args, **kwargs)
+            for start in range(0, features.shape[0], chunk_size)
+        ]
+        return np.concatenate(results, axis=0)
+
     def get_vertically_averaged_values(
         self: Upscaler,
         features: np.ndarray,
@@ -166,10 +206,10 @@ class BaseUpscaler(ABC):
 
         if disregard_first_xcell:
             feature = feature[..., 1:]
-            assert feature.shape == self.single_feature_shape
+            assert feature.shape[1:] == self.single_feature_shape[1:]
 
         else:
-            assert feature.shape[:-1] == self.single_feature_shape[:-1]
+            assert feature.shape[1:-1] == self.single_feature_shape[1:-1]
             assert feature.shape[-1] == self.single_feature_shape[-1] + 1
 
         return feature
@@ -264,7 +304,7 @@ class BaseUpscaler(ABC):
             feature, cell_boundary_radii, block_sidelengths, axis=-1
         ) / (block_sidelengths**2)
 
-        assert integrated_feature.shape == self.single_feature_shape
+        assert integrated_feature.shape[1:] == self.single_feature_shape[1:]
         return integrated_feature
 
     def get_homogeneous_values(
@@ -290,7 +330,7 @@ class BaseUpscaler(ABC):
         if disregard_first_xcell:
             feature = feature[..., 1:]
 
-        assert feature.shape == self.single_feature_shape
+        assert feature.shape[1:] == self.single_feature_shape[1:]
         return feature
 
     def get_analytical_PI(  # pylint: disable=invalid-name
@@ -318,7 +358,7 @@ class BaseUpscaler(ABC):
             r_e=radii,
             r_w=well_radius,
         )
-        assert analytical_PI.shape == self.single_feature_shape
+        assert analytical_PI.shape[1:] == self.single_feature_shape[1:]
         return analytical_PI
 
     # pylint: disable-next=invalid-name, too-many-positional-arguments, too-many-locals, too-many-arguments
@@ -478,5 +518,5 @@ class BaseUpscaler(ABC):
         # Check that we do not divide by zero.
         assert np.all(bhps - pressures)
         WI_data: np.ndarray = injection_rate_per_second_per_cell / (bhps - pressures)
-        assert WI_data.shape == self.single_feature_shape
+        assert WI_data.shape[1:] == self.single_feature_shape[1:]
         return WI_data
@@ -53,7 +53,7 @@ GRIDFILE
 % endif
 
 % if dic['grid']=='cpg3d':
-INCLUDE
+${'GDFILE' if dic['egrid'] else 'INCLUDE'}
 ${dic['grid_file']} /
 % else:
 DX 	
@@ -239,7 +239,11 @@ SOLUTION
 -------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT /
+% endif
 % endif
 
 EQUIL
@@ -251,6 +255,9 @@ RSVD
 -------------------------------------------------------------------------
 SUMMARY
 ----------------------------------------------------------------------------
+% if dic['summary']:
+${dic['summary_section']}
+% else:
 PERFORMA
 FPR 
 FGIP
@@ -321,12 +328,17 @@ WWPT
 INJW
 INJG
 PROD /
+% endif
 -------------------------------------------------------------------------
 SCHEDULE
 -------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT /
+% endif
 
 % endif
 WELSPECS
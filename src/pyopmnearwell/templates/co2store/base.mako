@@ -32,7 +32,7 @@ EQLDIMS
 /
 
 TABDIMS
-${f"{(1*(dic['hysteresis']!=0)+1)*(dic['satnum']+dic['perforations'][0])} /" if (1*(dic["hysteresis"]!=0)+1)*(dic['satnum']+dic['perforations'][0])>1 else "/"}
+${f"{max(dic['satfun_tables'])} /" if max(dic['satfun_tables'])>1 else "/"}
 % if dic["hysteresis"]!=0:
 
 SATOPTS
@@ -55,11 +55,11 @@ GRIDFILE
 % if dic["fluxnum"]:
 
 INCLUDE
-FLUXNUM.INC /
+${dic['fluxnum_file']} /
 % endif
 
 INCLUDE
-GEOLOGY.INC /
+${dic['geology_file']} /
 % if dic["pvmult"]>0:
 ----------------------------------------------------------------------------
 EDIT
@@ -71,7 +71,7 @@ ${dic['multpv_file']} /
 PROPS
 ----------------------------------------------------------------------------
 INCLUDE
-TABLES.INC /
+${dic['tables_file']} /
 % if dic["hysteresis"]!=0:
 
 EHYSTR
@@ -106,7 +106,17 @@ FLUXNUM SATNUM /
 /
 % else:
 IMBNUM
-${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*2 /
+${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*${dic['satfun_tables'][-1]} /
+% endif
+% if dic["fluxnum"] and dic['satfun_tables'] != list(range(1, len(dic['satfun_tables']) + 1)):
+
+EQUALREG
+% for i, table in enumerate(dic['satfun_tables']):
+% if table != i + 1:
+${'SATNUM' if i < len(dic["rock"]) else 'IMBNUM'} ${table} ${i % len(dic["rock"]) + 1} F /
+% endif
+% endfor
+/
 % endif
 % endif
 ----------------------------------------------------------------------------
@@ -124,11 +134,18 @@ ${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*0 /
 % if dic['write']==1:
 
 RPTRST 
-BASIC=2 DEN RPORV /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN RPORV /
+% endif
 % endif
 ----------------------------------------------------------------------------
 SUMMARY
 ----------------------------------------------------------------------------
+% if dic['summary']:
+${dic['summary_section']}
+% else:
 PERFORMA
 FGMIP
 FGMIT
@@ -165,19 +182,24 @@ WWPR
 /
 WPI
 /
+% endif
 ----------------------------------------------------------------------------
 SCHEDULE
 ----------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DEN RPORV /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN RPORV /
+% endif
 
 % endif
 WELSPECS
 % if dic['grid']=='core':
 INJ0 G1 1 ${1+mt.floor(dic['nocells'][2]/2)} 1* ${'GAS' if dic['inj'][0][2]>0 else 'WATER'} 3* ${'NO' if dic["xflow"]>0 else ''} /
 % else:
-INJ0 G1 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1* ${'GAS' if dic['inj'][0][2]>0 else 'WATER'} 3* ${'NO' if dic["xflow"]>0 else ''} /
+INJ0 G1 ${dic['well_ij']} ${dic['well_ij']} 1* ${'GAS' if dic['inj'][0][2]>0 else 'WATER'} 3* ${'NO' if dic["xflow"]>0 else ''} /
 % endif
 % if dic["pvmult"]==0 or dic['grid']=='core':
 % if dic['grid']=='core':
@@ -197,13 +219,13 @@ COMPDAT
 % if dic['grid']=='core':
 INJ0 1 ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} OPEN 2* ${dic['diameter']} /
 % else:
-INJ0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${dic['nocells'][2]} OPEN 2* ${dic['diameter']} /
+INJ0 ${dic['well_ij']} ${dic['well_ij']} 1 ${dic['nocells'][2]} OPEN 2* ${dic['diameter']} /
 % endif
 % else:
 % if dic['grid']=='core':
 INJ0 1 ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} OPEN 1* ${dic["confact"]} /
 % else:
-INJ0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${dic['nocells'][2]} OPEN 1* ${dic["confact"]*2*np.pi*dic['rock'][0][0]*dic['dims'][2]/dic['nocells'][2]} /
+INJ0 ${dic['well_ij']} ${dic['well_ij']} 1 ${dic['nocells'][2]} OPEN 1* ${dic["confact"]*2*np.pi*dic['rock'][0][0]*dic['dims'][2]/dic['nocells'][2]} /
 % endif
 % endif
 % if dic["pvmult"]==0 or dic['grid']=='core':
@@ -219,6 +241,11 @@ PRO3 ${dic['nocells'][0]} ${dic['nocells'][0]} 1 ${0*dic['nocells'][2]+1} OPEN 2
 % endif
 % endif
 /
+% if dic['symmetry']:
+WPIMULT
+'*' ${dic['wpimult']} /
+/
+% endif
 % for j in range(len(dic['inj'])):
 
 % if dic["tuning"]:
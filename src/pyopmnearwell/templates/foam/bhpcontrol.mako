@@ -55,7 +55,7 @@ GRIDFILE
 % endif
 
 % if dic['grid']=='cpg3d':
-INCLUDE
+${'GDFILE' if dic['egrid'] else 'INCLUDE'}
 ${dic['grid_file']} /
 % else:
 DX 	
@@ -242,7 +242,11 @@ SOLUTION
 -------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT FOAM /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT FOAM /
+% endif
 % endif
 
 EQUIL
@@ -254,6 +258,9 @@ RSVD
 -------------------------------------------------------------------------
 SUMMARY
 ----------------------------------------------------------------------------
+% if dic['summary']:
+${dic['summary_section']}
+% else:
 PERFORMA
 FPR 
 FGIP
@@ -333,12 +340,17 @@ FTADSFOA
 FTDCYFOA
 FTMOBFOA
 FTIPTFOA
+% endif
 -------------------------------------------------------------------------
 SCHEDULE
 -------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT FOAM /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DENG DENO DENW BO BG BW KRG KRO KRW VGAS VOIL VWAT FOAM /
+% endif
 
 % endif
 WELSPECS
@@ -30,7 +30,7 @@ EQLDIMS
 /
 
 TABDIMS
-${f"{(1*(dic['hysteresis']!=0)+1)*(dic['satnum']+dic['perforations'][0])} /" if (1*(dic["hysteresis"]!=0)+1)*(dic['satnum']+dic['perforations'][0])>1 else "/"}
+${f"{max(dic['satfun_tables'])} /" if max(dic['satfun_tables'])>1 else "/"}
 % if dic["hysteresis"]!=0:
 
 SATOPTS
@@ -53,17 +53,17 @@ GRIDFILE
 % if dic["fluxnum"]:
 
 INCLUDE
-FLUXNUM.INC /
+${dic['fluxnum_file']} /
 % endif
 
 INCLUDE
-GEOLOGY.INC /
+${dic['geology_file']} /
 % if dic["pvmult"]>0:
 ----------------------------------------------------------------------------
 EDIT
 ----------------------------------------------------------------------------
 INCLUDE
-MULTPV.INC /
+${dic['multpv_file']} /
 % endif
 ----------------------------------------------------------------------------
 PROPS
@@ -111,7 +111,7 @@ PVTG
 /
 
 INCLUDE
-TABLES.INC /
+${dic['tables_file']} /
 
 % if dic["hysteresis"]!=0:
 EHYSTR
@@ -141,7 +141,17 @@ FLUXNUM SATNUM /
 /
 % else:
 IMBNUM
-${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*2 /
+${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*${dic['satfun_tables'][-1]} /
+% endif
+% if dic["fluxnum"] and dic['satfun_tables'] != list(range(1, len(dic['satfun_tables']) + 1)):
+
+EQUALREG
+% for i, table in enumerate(dic['satfun_tables']):
+% if table != i + 1:
+${'SATNUM' if i < len(dic["rock"]) else 'IMBNUM'} ${table} ${i % len(dic["rock"]) + 1} F /
+% endif
+% endfor
+/
 % endif
 % endif
 ----------------------------------------------------------------------------
@@ -163,11 +173,18 @@ ${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*0 /
 % if dic['write']==1:
 
 RPTRST 
-BASIC=2 DEN /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN /
+% endif
 % endif
 ----------------------------------------------------------------------------
 SUMMARY
 ----------------------------------------------------------------------------
+% if dic['summary']:
+${dic['summary_section']}
+% else:
 PERFORMA
 FPR 
 FGIP
@@ -197,12 +214,17 @@ WOPR
 /
 WPI
 /
+% endif
 ----------------------------------------------------------------------------
 SCHEDULE
 ----------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST
-BASIC=2 DEN /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN /
+% endif
 
 % endif
 WELSPECS
@@ -210,8 +232,8 @@ WELSPECS
 INJ0 G1 1 ${1+mt.floor(dic['nocells'][2]/2)} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
 PRO0 G1 1 ${1+mt.floor(dic['nocells'][2]/2)} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
 % else:
-INJ0 G1 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
-PRO0 G1 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
+INJ0 G1 ${dic['well_ij']} ${dic['well_ij']} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
+PRO0 G1 ${dic['well_ij']} ${dic['well_ij']} 1* GAS 2* STOP ${'NO' if dic["xflow"]>0 else ''} /
 % endif
 % if dic["pvmult"]==0 or dic['grid']=='core':
 % if dic['grid']=='core':
@@ -228,15 +250,15 @@ PRO4 G1 ${dic['nocells'][0]} ${dic['nocells'][0]} 1* OIL /
 /
 COMPDAT
 % if dic["confact"]==0:
-INJ0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${0*dic['nocells'][2]+1} OPEN 2* ${dic['diameter']} /
-PRO0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${0*dic['nocells'][2]+1} OPEN 2* ${dic['diameter']} /
+INJ0 ${dic['well_ij']} ${dic['well_ij']} 1 ${0*dic['nocells'][2]+1} OPEN 2* ${dic['diameter']} /
+PRO0 ${dic['well_ij']} ${dic['well_ij']} 1 ${0*dic['nocells'][2]+1} OPEN 2* ${dic['diameter']} /
 % else:
 % if dic['grid']=='core':
 INJ0 1 ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} OPEN 1* ${dic["confact"]} /
 PRO0	1 ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} ${1+mt.floor(dic['nocells'][2]/2)} OPEN 1* ${dic["confact"]} /
 % else:
-INJ0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${0*dic['nocells'][2]+1} OPEN 1* ${dic["confact"]} /
-PRO0 ${max(1, 1+mt.floor(dic['nocells'][1]/2))} ${max(1, 1+mt.floor(dic['nocells'][1]/2))} 1 ${0*dic['nocells'][2]+1} OPEN 1* ${dic["confact"]} /
+INJ0 ${dic['well_ij']} ${dic['well_ij']} 1 ${0*dic['nocells'][2]+1} OPEN 1* ${dic["confact"]} /
+PRO0 ${dic['well_ij']} ${dic['well_ij']} 1 ${0*dic['nocells'][2]+1} OPEN 1* ${dic["confact"]} /
 % endif
 % endif
 % if dic["pvmult"]==0 or dic['grid']=='core':
@@ -252,6 +274,11 @@ PRO4 ${dic['nocells'][0]} ${dic['nocells'][0]} 1 ${dic['nocells'][2]} OPEN 2* ${
 % endif
 % endif
 /
+% if dic['symmetry']:
+WPIMULT
+'*' ${dic['wpimult']} /
+/
+% endif
 % for j in range(len(dic['inj'])):
 
 % if dic["tuning"]:
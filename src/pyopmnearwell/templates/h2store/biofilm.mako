@@ -31,7 +31,7 @@ EQLDIMS
 /
 
 TABDIMS
-${(dic["hysteresis"]+1)*(dic['satnum']+dic['perforations'][0])} /
+${max(dic['satfun_tables'])} /
 % if dic["hysteresis"]!=0:
 
 SATOPTS
@@ -54,23 +54,23 @@ GRIDFILE
 % if dic["fluxnum"]:
 
 INCLUDE
-FLUXNUM.INC /
+${dic['fluxnum_file']} /
 % endif
 
 INCLUDE
-GEOLOGY.INC /
+${dic['geology_file']} /
 % if dic["pvmult"]>0:
 ----------------------------------------------------------------------------
 EDIT
 ----------------------------------------------------------------------------
 INCLUDE
-MULTPV.INC /
+${dic['multpv_file']} /
 % endif
 ----------------------------------------------------------------------------
 PROPS
 ----------------------------------------------------------------------------
 INCLUDE
-TABLES.INC /
+${dic['tables_file']} /
 % if dic["hysteresis"]!=0:
 
 EHYSTR
@@ -84,11 +84,11 @@ ${dic['biof'][int(dic["layers"][i])][0]} ${dic['biof'][int(dic["layers"][i])][1]
 % endfor
 
 INCLUDE
-PERMFACT.INC /
+${dic['permfact_file']} /
 
 % if dic["pcfact"]>0:
 INCLUDE
-PCFACT.INC /
+${dic['pcfact_file']} /
 % endif
 
 % if dic["rockcomp"]>0:
@@ -119,7 +119,17 @@ FLUXNUM SATNUM /
 /
 % else:
 IMBNUM
-${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*2 /
+${dic['nocells'][0]*dic['nocells'][1]*dic['nocells'][2]}*${dic['satfun_tables'][-1]} /
+% endif
+% if dic["fluxnum"] and dic['satfun_tables'] != list(range(1, len(dic['satfun_tables']) + 1)):
+
+EQUALREG
+% for i, table in enumerate(dic['satfun_tables']):
+% if table != i + 1:
+${'SATNUM' if i < len(dic["rock"]) else 'IMBNUM'} ${table} ${i % len(dic["rock"]) + 1} F /
+% endif
+% endfor
+/
 % endif
 % endif
 ----------------------------------------------------------------------------
@@ -140,11 +150,18 @@ SBIOF ${dic['biof'][int(dic["layers"][i])][8]} 4* ${i+1} ${i+1} /
 % if dic['write']==1:
 
 RPTRST 
-BASIC=2 DEN FLOWS /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN FLOWS /
+% endif
 % endif
 ----------------------------------------------------------------------------
 SUMMARY
 ----------------------------------------------------------------------------
+% if dic['summary']:
+${dic['summary_section']}
+% else:
 PERFORMA
 FGMIP
 FGMIT
@@ -182,12 +199,17 @@ WWPR
 /
 WPI
 /
+% endif
 ----------------------------------------------------------------------------
 SCHEDULE
 ----------------------------------------------------------------------------
 % if dic['write']==1:
 RPTRST 
-BASIC=2 DEN FLOWS /
+% if dic['rptrst']:
+${dic['rptrst_record']} /
+% else:
+BASIC=${dic['rptrst_basic']} DEN FLOWS /
+% endif
 % endif
 
 WELSPECS
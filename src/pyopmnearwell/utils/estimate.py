@@ -0,0 +1,272 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Estimate the size of a run from the configuration file, without writing the deck
+
+The grid and include files are set up as in ``writefile.reservoir_files``, but kept in
+memory: the cells are counted from the grid coordinates, the small include files are
+generated to measure them, and the large grid files are extrapolated from one layer.
+The sizes of the Flow output files are computed from the number of active cells, the
+report steps in ``inj``, and the restart arrays requested with ``RPTRST`` in the
+template (or selected with ``rptrst`` and ``rptfreq``). The memory of Flow is a rough
+rule of thumb (FLOW_BASE and FLOW_CELL).
+"""
+
+from __future__ import annotations
+
+import copy
+import math
+import os
+import re
+from typing import Any
+
+import numpy as np
+
+from pyopmnearwell.utils.schedules import count_report_steps
+from pyopmnearwell.utils.writefile import (
+    HEADER,
+    compact_format,
+    cpg3d_coord,
+    cpg3d_zcorn,
+    generate_fluxnum,
+    generate_geology,
+    generate_multpv,
+    generate_pcfact,
+    generate_permfact,
+    get_2dcorners,
+    get_core_active,
+    get_satfun_tables,
+    get_spaces,
+    get_tables,
+    handle_core,
+    has_permfact,
+    initialize_files,
+    initialize_layers,
+    initialize_xcor,
+    initialize_xcorc,
+    round_like_e,
+)
+
+FLOW_BASE = 200 * 2**20
+"""Memory of Flow without cells [bytes]"""
+
+FLOW_CELL = 1000
+"""Memory of Flow per active cell and phase [bytes]"""
+
+INIT_ARRAYS = 20
+"""Number of cell arrays in the INIT file (PORV, PERMX, TRANX, SATNUM, etc.)"""
+
+PHASES = {
+    "co2eor": ["WAT", "OIL", "GAS"],
+    "foam": ["WAT", "OIL", "GAS"],
+}
+"""Phases of the models (water and gas if not listed)"""
+
+SOLUTION = {
+    "co2eor": ["RS", "RV"],
+    "foam": ["RS", "RV", "SFOAM"],
+    "saltprec": ["RSW", "RVW", "SALT", "SALTP"],
+}
+"""Restart arrays of BASIC besides the pressure and saturations (RSW and RVW if not
+listed)"""
+
+
+def estimate_run(dic: dict[str, Any]) -> dict[str, Any]:
+    """Estimate the cells, include files, output files, and memory of a run
+
+    Args:
+        dic (dict): Global dictionary from ``process_input`` (it is not modified)
+
+    Returns:
+        dict: ``cells`` and ``active`` cells, sizes of the include ``files`` [bytes],
+        ``report_steps``, ``restart_arrays``, sizes of the ``egrid`` and ``init``
+        files, and of the ``unrst`` file per step and in total [bytes], and the
+        ``memory`` of Flow [bytes]
+
+    """
+    dic = copy.deepcopy(dic)
+    initialize_files(dic)
+    files = {}
+    initialize_xcor(dic)
+    nocells = dic["nocells"]
+    active = None
+    if dic["grid"] == "core":
+        active = int(np.count_nonzero(get_core_active(dic)))
+        handle_core(dic)
+    elif dic["grid"] in ["cartesian2d", "radial"]:
+        values = np.diff(dic["xcor"])
+        if dic["grid"] == "cartesian2d":
+            files["DX.INC"] = len("DX\n/") + compact_size(np.tile(values, nocells[2]))
+        else:
+            files["DRV.INC"] = len("DRV\n/") + compact_size(values)
+    elif dic["grid"] in ["cake", "tensor2d", "coord2d"]:
+        dic["slope"] = np.tan(0.5 * dic["dims"][1] * np.pi / 180)
+        coord, zcorn = get_2dcorners(dic)
+        files.update(grid_size(dic, compact_size(coord), compact_size(zcorn)))
+    else:
+        initialize_xcorc(dic)
+        files.update(d3_grid_sizes(dic))
+    cells = int(np.prod(nocells))
+    active = cells if active is None else active
+    initialize_layers(dic)
+    if dic["model"] not in ["co2eor", "foam"]:
+        files.update(section_sizes(dic))
+    phases = PHASES.get(dic["model"], ["WAT", "GAS"])
+    arrays = get_restart_arrays(dic, phases)
+    report_steps = count_report_steps(dic["inj"])
+    unrst_step = sum(keyword_size(active) for _ in arrays)
+    # With rptfreq = n, the restart arrays are written every n-th report step
+    unrst_steps = report_steps // max(1, dic["rptfreq"])
+    return {
+        "cells": cells,
+        "active": active,
+        "files": files,
+        "report_steps": report_steps,
+        "restart_arrays": arrays,
+        "egrid": egrid_size(dic) if dic["write"] == 1 else 0,
+        "init": INIT_ARRAYS * keyword_size(active) if dic["write"] == 1 else 0,
+        "unrst_step": unrst_step,
+        # The initial state is written as report step 0
+        "unrst": (unrst_steps + 1) * unrst_step,
+        "memory": FLOW_BASE + FLOW_CELL * len(phases) * active,
+    }
+
+
+def section_sizes(dic: dict[str, Any]) -> dict[str, int]:
+    """Sizes of the TABLES.INC and section include files"""
+    dic["satfun_tables"] = get_satfun_tables(dic)
+    sizes = {"TABLES.INC": sum(len(line) for line in get_tables(dic))}
+    get_spaces(dic)
+    sizes["GEOLOGY.INC"] = len(HEADER) + len(generate_geology(dic))
+    if dic["fluxnum"]:
+        sizes["FLUXNUM.INC"] = len(HEADER) + len(generate_fluxnum(dic))
+    if dic["pvmult"] > 0:
+        sizes["MULTPV.INC"] = len(HEADER) + len(generate_multpv(dic))
+    if has_permfact(dic):
+        lines = generate_permfact(dic)
+        sizes["PERMFACT.INC"] = len(HEADER) + sum(len(line) for line in lines)
+        if dic["pcfact"] != 0:
+            lines = generate_pcfact(dic)
+            sizes["PCFACT.INC"] = len(HEADER) + sum(len(line) for line in lines)
+    return sizes
+
+
+def d3_grid_sizes(dic: dict[str, Any]) -> dict[str, int]:
+    """Sizes of the 3D grid files, extrapolated from the first layers of cells"""
+    nocells = dic["nocells"]
+    if dic["grid"] == "cpg3d":
+        coord = sum(compact_size(row) for row in cpg3d_coord(dic))
+        layers = cpg3d_zcorn(dic)
+        first = compact_size(round_like_e(next(layers)))
+        second = compact_size(round_like_e(next(layers)))
+        return grid_size(dic, coord, first + (2 * nocells[2] - 1) * second)
+    if dic["model"] in ["co2eor", "foam"]:
+        return {}
+    dxarray = np.diff(dic["xcorc"])
+    layer = {
+        "DX.INC": np.tile(dxarray, nocells[1]),
+        "DY.INC": np.repeat(dxarray[: nocells[1]], nocells[1]),
+    }
+    return {
+        name: len(HEADER) + len("DX\n/\n") + nocells[2] * compact_size(values)
+        for name, values in layer.items()
+    }
+
+
+def grid_size(dic: dict[str, Any], coord: int, zcorn: int) -> dict[str, int]:
+    """Size of the GRID.INC (or GRID.EGRID) file from the size of its values"""
+    if dic["egrid"]:
+        return {"GRID.EGRID": egrid_size(dic)}
+    return {"GRID.INC": len(HEADER) + len("COORD\n/\nZCORN\n/\n") + coord + zcorn}
+
+
+def egrid_size(dic: dict[str, Any]) -> int:
+    """Size of an EGRID file with the corner-point grid of the deck [bytes]"""
+    nx, ny, nz = dic["nocells"]
+    return (
+        keyword_size(4)
+        + keyword_size(6 * (nx + 1) * (ny + 1))
+        + keyword_size(8 * nx * ny * nz)
+        + keyword_size(nx * ny * nz)
+    )
+
+
+def compact_size(values: np.ndarray) -> int:
+    """Length of the values in the format of the include files"""
+    return sum(len(value) for value in compact_format(values))
+
+
+def keyword_size(values: int, itemsize: int = 4) -> int:
+    """Size of a keyword in the binary output files [bytes]
+
+    Each keyword has a header record (name, length, and type) and its values are
+    written in records of at most 1000 values, each with two 4-byte markers.
+    """
+    return 24 + values * itemsize + 8 * math.ceil(values / 1000)
+
+
+def get_restart_arrays(dic: dict[str, Any], phases: list[str]) -> list[str]:
+    """Names of the cell arrays written to the restart file at each report step"""
+    if dic["write"] != 1:
+        return []
+    if dic["rptrst"]:
+        record = dic["rptrst_record"]
+    else:
+        with open(
+            os.path.join(
+                dic["pat"], "templates", dic["model"], f"{dic['template']}.mako"
+            ),
+            encoding="utf8",
+        ) as file:
+            match = re.search(r"^(BASIC=[^/\n]*)/", file.read(), flags=re.M)
+        if match is None:
+            return []
+        record = match.group(1)
+    arrays = []
+    for mnemonic in record.split():
+        name = mnemonic.split("=")[0]
+        if name == "FREQ":
+            continue
+        if name == "BASIC":
+            arrays += ["PRESSURE"] + [f"S{phase}" for phase in phases]
+            arrays += SOLUTION.get(dic["model"], ["RSW", "RVW"])
+        elif name == "DEN":
+            arrays += [f"{phase}_DEN" for phase in phases]
+        elif name == "FLOWS":
+            arrays += [f"FLO{phase}{i}+" for phase in phases for i in "IJK"]
+        else:
+            arrays.append(name)
+    return arrays
+
+
+def format_bytes(size: float) -> str:
+    """Size in bytes with a binary prefix"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size:.0f} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def format_estimate(estimate: dict[str, Any]) -> str:
+    """Table of the estimated sizes of a run"""
+    lines = [
+        f"Cells: {estimate['cells']} ({estimate['active']} active)",
+        "Include files:",
+    ]
+    for name, size in estimate["files"].items():
+        lines.append(f"  {name:<13} {format_bytes(size):>10}")
+    lines.append("Output files:")
+    for name, size in [
+        ("EGRID", estimate["egrid"]),
+        ("INIT", estimate["init"]),
+        ("UNRST", estimate["unrst"]),
+    ]:
+        lines.append(f"  {name:<13} {format_bytes(size):>10}")
+    lines.append(
+        f"  ({format_bytes(estimate['unrst_step'])} with "
+        + f"{len(estimate['restart_arrays'])} cell arrays per report step, "
+        + f"report steps: {estimate['report_steps']})"
+    )
+    lines.append(f"Flow memory:    {format_bytes(estimate['memory']):>10} (rough)")
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Select the telescopic x partition (xcn and xfac) for a target accuracy
+
+The candidate grids are set up with ``writefile.reservoir_files`` and run with
+``runs.simulations`` from the coarsest to the finest one, each in its own subfolder.
+A quantity of interest (a summary vector, e.g., WBHP:INJ0, or any function of the run,
+e.g., the plume radius) is compared against the one of the finest grid, and the grid
+with the fewest cells within the tolerance is selected. The convergence table (cells,
+runtime, and error of each grid) is written to ``grid_convergence.txt``.
+
+Example:
+    >>> result = optimize_grid(
+    >>>     dic, grid_candidates([10, 20, 40, 80], [2, 3]), "WBHP:INJ0", tol=0.01
+    >>> )
+    >>> result["best"]
+    {'xcn': [20], 'xfac': 3}
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import os
+import subprocess
+import time
+from collections.abc import Callable, Sequence
+from typing import Any, Optional, Union
+
+import numpy as np
+from numpy.typing import NDArray
+from resdata.summary import Summary
+
+from pyopmnearwell.utils.estimate import estimate_run
+from pyopmnearwell.utils.inputvalues import set_nocells
+from pyopmnearwell.utils.runs import simulations
+from pyopmnearwell.utils.writefile import reservoir_files
+
+
+def grid_candidates(xcn: Sequence[int], xfac: Sequence[float]) -> list[dict[str, Any]]:
+    """Candidates with the given numbers of x cells and telescopic factors
+
+    Args:
+        xcn (Sequence[int]): Numbers of x cells
+        xfac (Sequence[float]): Exponential factors of the telescopic partition
+
+    Returns:
+        list: Values of xcn and xfac of each combination
+
+    """
+    return [
+        {"xcn": [int(num)], "xfac": fac} for num, fac in itertools.product(xcn, xfac)
+    ]
+
+
+def set_grid(dic: dict[str, Any], values: dict[str, Any], fol: str) -> dict[str, Any]:
+    """Copy of the global dictionary with the grid values and run folders of a
+    candidate"""
+    dic = copy.deepcopy(dic)
+    dic.update(copy.deepcopy(values))
+    set_nocells(dic)
+    dic["fol"] = fol
+    dic["fprep"] = f"{fol}/preprocessing"
+    dic["foutp"] = f"{fol}/output"
+    return dic
+
+
+def summary_quantity(keyword: str) -> Callable[[dict[str, Any]], NDArray]:
+    """Function that reads a summary vector at the report steps of a run"""
+
+    def read(dic: dict[str, Any]) -> NDArray:
+        summary = Summary(f"{dic['foutp']}/{dic['runname'].upper()}.SMSPEC")
+        return summary.numpy_vector(keyword, report_only=True)
+
+    return read
+
+
+def relative_error(values: NDArray, reference: NDArray) -> float:
+    """Maximum difference to the reference, relative to the maximum of the reference"""
+    values, reference = np.asarray(values), np.asarray(reference)
+    if values.shape != reference.shape:
+        raise ValueError(
+            f"The quantity has shape {values.shape} instead of {reference.shape} as "
+            + "for the finest grid (the grids need the same report steps)"
+        )
+    scale = np.max(np.abs(reference))
+    difference = np.max(np.abs(values - reference), initial=0.0)
+    return float(difference / scale) if scale > 0 else float(difference)
+
+
+def optimize_grid(  # pylint: disable=R0914
+    dic: dict[str, Any],
+    candidates: Sequence[dict[str, Any]],
+    quantity: Union[str, Callable[[dict[str, Any]], NDArray]] = "WBHP:INJ0",
+    tol: float = 0.01,
+) -> dict[str, Any]:
+    """Run the candidate grids and select the cheapest one within the tolerance
+
+    Args:
+        dic (dict): Global dictionary from ``process_input``, with the ``fol`` in which
+            the candidates are run (it is not modified)
+        candidates (Sequence[dict]): Grid values (e.g., xcn and xfac) of each
+            candidate, see ``grid_candidates``
+        quantity (Union[str, Callable]): Summary keyword, or function of the global
+            dictionary of a finished run returning the values to compare
+        tol (float): Maximum relative error with respect to the finest grid
+
+    Returns:
+        dict: ``best`` grid values, and the convergence ``table`` with the ``values``,
+        ``cells``, ``runtime`` [s], ``status``, and relative ``error`` of each
+        candidate, from the coarsest to the finest grid (the error is NaN for the
+        failed candidates, i.e., if Flow fails, the quantity cannot be read, or the
+        run stops before the last report step)
+
+    Raises:
+        RuntimeError: If the simulation of the finest grid fails
+
+    """
+    if not candidates:
+        raise ValueError("At least one candidate grid is needed")
+    read = summary_quantity(quantity) if isinstance(quantity, str) else quantity
+    table: list[dict[str, Any]] = []
+    for values in candidates:
+        cdic = set_grid(dic, values, dic["fol"])
+        table.append({"values": values, "cells": estimate_run(cdic)["cells"]})
+    table.sort(key=lambda row: row["cells"])
+    results: list[Optional[NDArray]] = []
+    for i, row in enumerate(table):
+        cdic = set_grid(dic, row["values"], f"{dic['fol']}/grid_{i}")
+        os.makedirs(cdic["fprep"], exist_ok=True)
+        start = time.perf_counter()
+        try:
+            reservoir_files(cdic)
+            simulations(cdic)
+            results.append(read(cdic))
+            row["status"] = "done"
+        except (subprocess.CalledProcessError, KeyError, ValueError):
+            # Flow failed, or the quantity is not in the output of the run.
+            results.append(None)
+            row["status"] = "failed"
+        row["runtime"] = time.perf_counter() - start
+    if results[-1] is None:
+        raise RuntimeError("The simulation of the finest grid failed")
+    for row, result in zip(table, results):
+        row["error"] = np.nan
+        if result is None:
+            continue
+        try:
+            row["error"] = relative_error(result, results[-1])
+        except ValueError:
+            # The run stopped before the last report step of the finest grid.
+            row["status"] = "failed"
+    best = next(row for row in table if row["error"] <= tol)
+    with open(f"{dic['fol']}/grid_convergence.txt", "w", encoding="utf8") as file:
+        file.write(format_table(table))
+    return {"best": best["values"], "table": table}
+
+
+def format_table(table: list[dict[str, Any]]) -> str:
+    """Convergence table with one candidate grid per line"""
+    lines = ["grid   cells status runtime [s] error     values"]
+    for i, row in enumerate(table):
+        values = ", ".join(f"{key} = {value}" for key, value in row["values"].items())
+        lines.append(
+            f"{i:<4} {row['cells']:>7} {row['status']:<6} {row['runtime']:>11.2f} "
+            + f"{row['error']:<9.3e} {values}"
+        )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,241 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Content-addressed cache for the generated include files.
+
+The grid, table and section files only depend on a few entries of the global
+dictionary. Each group of files is stored under the sha256 of exactly these entries,
+together with the entries of the dictionary that the generation changed (e.g., the
+cell numbers of the grid). Runs and ensemble members with the same inputs then copy the
+files from the cache instead of generating them again.
+
+The cache is located in ``$PYOPMNEARWELL_CACHE_DIR`` (default
+``~/.cache/pyopmnearwell``) and the least recently used entries are removed when it is
+larger than ``$PYOPMNEARWELL_CACHE_SIZE`` MB (default 1024). Set
+``PYOPMNEARWELL_CACHE=0`` to disable it.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import pathlib
+import pickle
+import shutil
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+from pyopmnearwell import __version__
+
+DEPENDENCIES: dict[str, list[str]] = {
+    "grid": [
+        "grid",
+        "model",
+        "dims",
+        "nocells",
+        "xcor",
+        "xcn",
+        "xfac",
+        "zxy",
+        "removecells",
+        "diameter",
+        "rock",
+        "satnum",
+        "egrid",
+        "symmetry",
+    ],
+    "tables": [
+        "model",
+        "template",
+        "krw",
+        "krn",
+        "pcap",
+        "safu",
+        "imbnum",
+        "safutol",
+    ],
+    "geology": [
+        "grid",
+        "dims",
+        "nocells",
+        "homo",
+        "satnum",
+        "fluxnum",
+        "rock",
+        "diameter",
+        "egrid",
+        "grid_file",
+        "drv_file",
+        "dx_file",
+        "dy_file",
+    ],
+    "fluxnum": [
+        "grid",
+        "nocells",
+        "fluxnum",
+        "rock",
+        "satnum",
+        "layers",
+        "perforations",
+        "x_centers",
+        "symmetry",
+    ],
+    "multpv": [
+        "grid",
+        "template",
+        "nocells",
+        "pvmult",
+        "xcor",
+        "xcorc",
+        "coregeometry",
+        "symmetry",
+    ],
+    "permfact": ["model", "template", "popevals", "poroperm", "safu"],
+    "pcfact": ["model", "template", "popevals", "poroperm", "pcfact", "safu"],
+}
+"""Entries of the global dictionary that the files of each group are generated from"""
+
+MUTATIONS = "mutations.pkl"
+
+TEMPLATES = "mako"
+"""Folder of the compiled Mako templates in the cache (see ``utils.mako``)"""
+
+
+def get_cache_dir() -> pathlib.Path | None:
+    """Return the folder of the cache, or None if the cache is disabled"""
+    if os.environ.get("PYOPMNEARWELL_CACHE", "1").lower() in ["0", "false", "off"]:
+        return None
+    if "PYOPMNEARWELL_CACHE_DIR" in os.environ:
+        return pathlib.Path(os.environ["PYOPMNEARWELL_CACHE_DIR"])
+    cache_home = os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache")
+    return pathlib.Path(cache_home) / "pyopmnearwell"
+
+
+@functools.lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash of the code that writes the files, such that changes invalidate entries"""
+    sha = hashlib.sha256(__version__.encode())
+    sha.update((pathlib.Path(__file__).parent / "writefile.py").read_bytes())
+    return sha.hexdigest()
+
+
+def get_key(dic: dict, group: str) -> str:
+    """Hash the dictionary entries that the files of the group depend on"""
+    sha = hashlib.sha256(f"{code_version()}{group}".encode())
+    for name in DEPENDENCIES[group]:
+        sha.update(pickle.dumps((name, dic.get(name, "<missing>"))))
+    return sha.hexdigest()
+
+
+def run_cached(dic: dict, group: str, function: Callable[[dict], Any]) -> dict:
+    """Write the files of the group to dic['fprep'], from the cache if possible
+
+    Returns:
+        dict: The entries of the dictionary that the generation changed
+
+    """
+    cache_dir = get_cache_dir()
+    dic_before = {name: dump(value) for name, value in dic.items()}
+    if cache_dir is None:
+        function(dic)
+        return get_mutations(dic, dic_before)
+    key = get_key(dic, group)
+    mutations = restore(cache_dir / key, dic)
+    if mutations is not None:
+        return mutations
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = pathlib.Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir))
+    except OSError:
+        function(dic)  # A read-only cache must not stop the run
+        return get_mutations(dic, dic_before)
+    # Generate the files in the (hidden) new entry, such that exactly the files of the
+    # group end up in it
+    fprep = dic["fprep"]
+    dic["fprep"] = str(tmp)
+    try:
+        function(dic)
+    finally:
+        dic["fprep"] = fprep
+    for path in tmp.iterdir():
+        shutil.copyfile(path, pathlib.Path(fprep) / path.name)
+    mutations = get_mutations(dic, dic_before)
+    try:
+        with open(tmp / MUTATIONS, "wb") as file:
+            pickle.dump(mutations, file)
+        commit(tmp, cache_dir / key)
+        evict(
+            cache_dir, int(os.environ.get("PYOPMNEARWELL_CACHE_SIZE", "1024")) * 2**20
+        )
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return mutations
+
+
+def dump(value: Any) -> bytes | None:
+    """Pickle a dictionary entry (None for entries that cannot be cached)"""
+    try:
+        return pickle.dumps(value)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+def get_mutations(dic: dict, dic_before: dict[str, bytes | None]) -> dict:
+    """Entries of the dictionary that are new or changed since dic_before"""
+    return {
+        name: value
+        for name, value in dic.items()
+        if dic_before.get(name) != dump(value)
+    }
+
+
+def restore(entry: pathlib.Path, dic: dict) -> dict | None:
+    """Copy the files of a cache entry and apply its dictionary changes"""
+    try:
+        with open(entry / MUTATIONS, "rb") as file:
+            mutations = pickle.load(file)
+        for path in entry.iterdir():
+            if path.name != MUTATIONS:
+                shutil.copyfile(path, pathlib.Path(dic["fprep"]) / path.name)
+        os.utime(entry)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    apply_mutations(dic, mutations)
+    return mutations
+
+
+def apply_mutations(dic: dict, mutations: dict):
+    """Set the entries of the dictionary that a generation changed"""
+    for name, value in mutations.items():
+        # Keep references to the lists of the dictionary (e.g., ``nocells``) valid
+        if isinstance(dic.get(name), list) and isinstance(value, list):
+            dic[name][:] = value
+        else:
+            dic[name] = value
+
+
+def commit(tmp: pathlib.Path, entry: pathlib.Path):
+    """Make a complete entry visible with an atomic rename"""
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # Another process stored the same entry in the meantime
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def evict(cache_dir: pathlib.Path, max_size: int):
+    """Remove the least recently used entries until the cache fits into max_size"""
+    entries = []
+    for entry in cache_dir.iterdir():
+        if entry.name.startswith(".") or entry.name == TEMPLATES or not entry.is_dir():
+            continue
+        size = sum(file.stat().st_size for file in entry.iterdir())
+        entries.append((entry.stat().st_mtime, size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
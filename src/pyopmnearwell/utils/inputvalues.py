@@ -10,6 +10,17 @@ import numpy as np
 
 def process_input(dic, in_file):
     """Process the input file"""
+    with open(in_file, "rb") as file:
+        return process_values(dic, tomllib.load(file))
+
+
+def process_input_text(dic, text):
+    """Process the input given as a toml string (e.g., a rendered template)"""
+    return process_values(dic, tomllib.loads(text))
+
+
+def process_values(dic, values):
+    """Set the defaults, add the parsed input values, and derive the remaining ones"""
     for name in [
         "hysteresis",
         "rockcomp",
@@ -20,14 +31,19 @@ def process_input(dic, in_file):
         "xfac",
         "pcfact",
         "salinity",
+        "safutol",
+        "symmetry",
+        "timeout",
     ]:
         dic[name] = 0
     dic["zxy"] = "0*x"
     dic["adim"] = 1
     dic["perforations"] = [0, 0, 0]
+    dic["rptrst"] = []
+    dic["rptfreq"] = 1
+    dic["summary"] = []
     dic["ycn"] = [1]
-    with open(in_file, "rb") as file:
-        dic.update(tomllib.load(file))
+    dic.update(values)
     dic["satnum"] = len(dic["rock"]) - dic["perforations"][0]
     dic["fluxnum"] = len(dic["rock"]) > 1
     dic["imbnum"] = 2 if dic["hysteresis"] != 0 else 1
@@ -40,13 +56,18 @@ def process_input(dic, in_file):
                 dic["homo"] = False
             tmp = rock[3]
     dic["zcn"] = [znc]
+    set_nocells(dic)
+    dic["dims"] = [dic["xdim"], dic["adim"], zdim]
+    process_tuning(dic)
+    return dic
+
+
+def set_nocells(dic):
+    """Set the number of cells from the x and z partitions"""
     if dic["grid"] in ["coord2d", "coord3d"]:
         dic["nocells"] = [len(dic["xcn"]) - 1, 1, np.sum(dic["zcn"])]
     else:
         dic["nocells"] = [np.sum(dic["xcn"]), 1, np.sum(dic["zcn"])]
-    dic["dims"] = [dic["xdim"], dic["adim"], zdim]
-    process_tuning(dic)
-    return dic
 
 
 def process_tuning(dic):
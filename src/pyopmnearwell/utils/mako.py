@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import functools
+import os
 import pathlib
 from typing import Optional
 
 from mako import exceptions
 from mako.template import Template
 
+from pyopmnearwell.utils.includecache import TEMPLATES, get_cache_dir
+
 
 def fill_template(
     var: dict, filename: Optional[str | pathlib.Path] = None, text: Optional[str] = None
@@ -31,14 +35,54 @@ def fill_template(
         Error: When the template cannot be filled.
 
     """
-    # Convert filename to str
-    if isinstance(filename, pathlib.Path):
-        filename = str(filename)
-
-    mytemplate: Template = Template(filename=filename, text=text)
+    mytemplate: Template = get_template(filename=filename, text=text)
     try:
         filledtemplate = mytemplate.render(**var)
     except Exception as error:
         print(exceptions.text_error_template().render())
         raise error
     return filledtemplate
+
+
+def get_template(
+    filename: Optional[str | pathlib.Path] = None, text: Optional[str] = None
+) -> Template:
+    """
+    Return the compiled Mako template of a file or string.
+
+    Compiled templates are kept for the lifetime of the process, keyed by the path and
+    modification time of the file (or by the text), such that a template is only
+    compiled again after it changed. Templates from files are also compiled to Python
+    modules in the ``mako`` folder of the include cache (see ``includecache``), which
+    new processes (e.g., the workers of ``setup_ensemble``) import instead of compiling
+    the template again.
+
+    Args:
+        filename (Optional[str | pathlib.Path], optional): The path to the template
+            file. Defaults to None.
+        text (Optional[str], optional): The text of the template. Defaults to None.
+
+    Returns:
+        Template: The compiled template.
+
+    """
+    if filename is None:
+        return compile_text(text)
+    filename = os.path.abspath(filename)
+    return compile_file(filename, os.stat(filename).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_file(filename: str, mtime: int) -> Template:  # pylint: disable=W0613
+    """Compile a template file (mtime is only part of the key of the cache)"""
+    cache_dir = get_cache_dir()
+    return Template(
+        filename=filename,
+        module_directory=None if cache_dir is None else str(cache_dir / TEMPLATES),
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def compile_text(text: Optional[str]) -> Template:
+    """Compile a template string"""
+    return Template(text=text)
@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Selection of the restart arrays and summary vectors that Flow writes
+
+By default, the templates write their restart arrays (RPTRST) at every report step and
+their list of summary vectors. With ``rptrst`` (restart arrays, e.g., ["PRESSURE",
+"GAS_DEN"]), only the RPTRST mnemonics for these arrays are requested besides BASIC
+(the solution arrays, which are always written). With ``rptfreq = n``, the restart
+arrays are written only at every n-th report step (BASIC=3 FREQ=n). With ``summary``
+(summary vectors, e.g., ["FPR", "WBHP:INJ0", "RPR:1"]), the SUMMARY section only has
+these vectors.
+"""
+
+from __future__ import annotations
+
+BASIC_ARRAYS = [
+    "PRESSURE",
+    "SWAT",
+    "SGAS",
+    "SOIL",
+    "RS",
+    "RV",
+    "RSW",
+    "RVW",
+    "SALT",
+    "SALTP",
+    "SFOAM",
+    "TEMP",
+]
+"""Restart arrays written with BASIC (depending on the phases of the model)"""
+
+
+def set_output(dic):
+    """Set the RPTRST record and SUMMARY section from the selected output"""
+    if dic["rptfreq"] > 1:
+        dic["rptrst_basic"] = f"3 FREQ={dic['rptfreq']}"
+    else:
+        dic["rptrst_basic"] = "2"
+    dic["rptrst_record"] = " ".join(
+        [f"BASIC={dic['rptrst_basic']}"] + restart_mnemonics(dic["rptrst"])
+    )
+    dic["summary_section"] = "\n".join(
+        summary_entry(vector) for vector in dic["summary"]
+    )
+
+
+def restart_mnemonics(arrays: list[str]) -> list[str]:
+    """RPTRST mnemonics (besides BASIC) that write the restart arrays"""
+    mnemonics: list[str] = []
+    for array in arrays:
+        if array in BASIC_ARRAYS:
+            continue
+        if array.endswith("_DEN"):
+            mnemonic = "DEN"
+        elif array.startswith("FLO"):
+            mnemonic = "FLOWS"
+        else:
+            mnemonic = array
+        if mnemonic not in mnemonics:
+            mnemonics.append(mnemonic)
+    return mnemonics
+
+
+def summary_entry(vector: str) -> str:
+    """Lines of the SUMMARY section for a vector (e.g., FPR, WBHP:INJ0, RPR:1, or
+    BPR:1,1,1)"""
+    quantity, _, name = vector.partition(":")
+    if quantity[0] in "WG":
+        return f"{quantity}\n'{name}' /" if name else f"{quantity}\n/"
+    if quantity[0] == "R":
+        return f"{quantity}\n{name} /" if name else f"{quantity}\n/"
+    if quantity[0] == "B":
+        return f"{quantity}\n{name.replace(',', ' ')} /\n/"
+    if quantity[0] == "C":
+        well, _, cell = name.partition(":")
+        return f"{quantity}\n'{well}' {cell.replace(',', ' ')} /\n/"
+    return quantity
@@ -0,0 +1,185 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Run Flow as a subprocess with a log file, progress, and a wall-clock limit
+
+The Flow command (e.g., "flow --enable-tuning=true" or "mpirun -np 4 flow") is split
+into its arguments and launched without a shell. Its standard output and error are
+written line by line to ``<DECK>.LOG`` in the output folder (and optionally echoed to
+the terminal), and the "Report step n/N" lines that Flow prints are parsed into the
+number of report steps reached and an estimate of the remaining time. Runs that exceed
+the timeout are killed together with their child processes (e.g., the ranks of mpirun).
+
+Example:
+    >>> runner = FlowRunner("flow --enable-tuning=true", timeout=3600)
+    >>> result = runner.run("preprocessing/RUN.DATA", "output")
+    >>> result["status"], result["steps"], result["walltime"]
+    ('done', 100, 12.3)
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any, Optional, Union
+
+REPORT_STEP = re.compile(r"Report step\s+(\d+)\s*/\s*(\d+)")
+"""Progress line that Flow prints at the start of each report step"""
+
+
+class FlowRunner:
+    """Launch Flow runs and return a record of each run"""
+
+    def __init__(
+        self,
+        flow: Union[str, Sequence[str]],
+        timeout: Optional[float] = None,
+        echo: bool = False,
+        progress: Optional[Callable[[dict[str, Any]], None]] = None,
+    ) -> None:
+        """Set the command and the options shared by the runs
+
+        Args:
+            flow (Union[str, Sequence[str]]): Flow executable with its flags, as a
+                command line or a list of arguments
+            timeout (Optional[float]): Wall-clock limit of a run [s] (None or 0 for no
+                limit)
+            echo (bool): Print the output of Flow also to the terminal
+            progress (Optional[Callable]): Called with the ``steps`` reached, the total
+                ``report_steps``, the ``elapsed`` time [s], and the ``eta`` [s] each
+                time Flow starts a report step
+
+        """
+        self.command: list[str] = (
+            shlex.split(flow) if isinstance(flow, str) else [str(arg) for arg in flow]
+        )
+        self.timeout = timeout if timeout else None
+        self.echo = echo
+        self.progress = progress
+
+    def run(
+        self,
+        deck: Union[str, pathlib.Path],
+        output_dir: Union[str, pathlib.Path],
+        flags: Sequence[str] = (),
+        check: bool = False,
+    ) -> dict[str, Any]:
+        """Run Flow for a deck
+
+        Args:
+            deck (Union[str, pathlib.Path]): Path to the .DATA file
+            output_dir (Union[str, pathlib.Path]): Folder of the results and the log
+            flags (Sequence[str]): Flags added after the ones of the command
+            check (bool): Raise a CalledProcessError if the run fails or times out
+
+        Returns:
+            dict: ``status`` (done, failed, or timeout), ``returncode``, ``walltime``
+            [s], ``steps`` (report steps reached), ``report_steps`` (total, None if
+            Flow did not print it), the ``command``, and the path to the ``log``
+
+        """
+        # Flow runs in the output folder, so relative paths are resolved beforehand.
+        deck = pathlib.Path(deck).resolve()
+        output_dir = pathlib.Path(output_dir).resolve()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        command = self.command + [str(deck), f"--output-dir={output_dir}"] + list(flags)
+        result: dict[str, Any] = {
+            "command": command,
+            "log": str(output_dir / f"{deck.stem}.LOG"),
+            "steps": 0,
+            "report_steps": None,
+        }
+        start = time.perf_counter()
+        with (
+            open(result["log"], "w", encoding="utf8") as log,
+            subprocess.Popen(
+                command,
+                cwd=output_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                start_new_session=True,
+            ) as process,
+        ):
+            expired = threading.Event()
+
+            def expire() -> None:
+                expired.set()
+                kill(process)
+
+            timer = None
+            if self.timeout is not None:
+                timer = threading.Timer(self.timeout, expire)
+                timer.start()
+            try:
+                for line in process.stdout:  # type: ignore
+                    log.write(line)
+                    if self.echo:
+                        sys.stdout.write(line)
+                    self.update(result, line, time.perf_counter() - start)
+                process.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                # Flow runs in its own session, i.e., it does not get the SIGINT of
+                # the terminal and would survive an interrupt of the loop.
+                if process.poll() is None:
+                    kill(process)
+        result["walltime"] = time.perf_counter() - start
+        result["returncode"] = process.returncode
+        if expired.is_set():
+            result["status"] = "timeout"
+        elif process.returncode == 0:
+            result["status"] = "done"
+            if result["report_steps"] is not None:
+                result["steps"] = result["report_steps"]
+        else:
+            result["status"] = "failed"
+        if check and result["status"] != "done":
+            raise subprocess.CalledProcessError(process.returncode, command)
+        return result
+
+    def update(self, result: dict[str, Any], line: str, elapsed: float) -> None:
+        """Update the steps reached from a line of the output of Flow"""
+        match = REPORT_STEP.search(line)
+        if match is None:
+            return
+        result["steps"], result["report_steps"] = int(match[1]), int(match[2])
+        if self.progress is not None:
+            self.progress(
+                {
+                    "steps": result["steps"],
+                    "report_steps": result["report_steps"],
+                    "elapsed": elapsed,
+                    "eta": estimate_remaining(
+                        result["steps"], result["report_steps"], elapsed
+                    ),
+                }
+            )
+
+
+def estimate_remaining(
+    steps: int, report_steps: int, elapsed: float
+) -> Optional[float]:
+    """Remaining time [s] assuming that all report steps take the same time (None
+    before the first report step is finished)"""
+    if steps <= 0:
+        return None
+    return elapsed * max(report_steps - steps, 0) / steps
+
+
+def kill(process: subprocess.Popen) -> None:
+    """Kill a process and its children (e.g., the ranks of mpirun)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
@@ -4,23 +4,23 @@
 """Utility functions to run the studies"""
 
 import os
-import subprocess
+
+from pyopmnearwell.utils.runner import FlowRunner
 
 
 def simulations(dic):
-    """Run Flow"""
+    """Run Flow and return the record of the run (see ``runner.FlowRunner.run``)
+
+    Raises:
+        subprocess.CalledProcessError: If Flow fails or exceeds the ``timeout`` [s]
+
+    """
     if "foutp" not in dic:
         dic["foutp"] = f"{dic['fol']}/output"
     if "mode" not in dic:
         dic["mode"] = "all"
     os.makedirs(dic["foutp"], exist_ok=True)
-    command = (
-        f"{dic['flow']} --output-dir={dic['foutp']} "
-        f"{dic['fprep']}/{dic['runname'].upper()}.DATA"
-    )
-    subprocess.run(
-        command,
-        cwd=dic["foutp"],
-        shell=True,
-        check=True,
+    runner = FlowRunner(dic["flow"], timeout=dic.get("timeout"), echo=True)
+    return runner.run(
+        f"{dic['fprep']}/{dic['runname'].upper()}.DATA", dic["foutp"], check=True
     )
@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Run schedules with shared prefixes of injection rows only once
+
+Control studies simulate many schedules (``inj``) that start with the same rows. The
+schedules are arranged in a prefix tree: each node is a segment of rows shared by the
+schedules of its subtree, and it is simulated once, restarting from the last report
+step of its parent node. The decks of the nodes are generated from the same templates
+with ``writefile.reservoir_files``; for the nodes with a parent, the SOLUTION section is
+replaced by ``RESTART`` from the unified restart file of the parent and the history in
+the SCHEDULE section is skipped with ``SKIPREST``. The summary vectors of a schedule are
+stitched from the runs along its path in the tree with ``schedule_summary``.
+
+Example:
+    >>> nodes = run_schedules(dic, [inj_0, inj_1, inj_2], jobs=4)
+    >>> days, wbhp = schedule_summary(nodes, 1, "WBHP:INJ0")
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import re
+import subprocess
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+from numpy.typing import NDArray
+from resdata.summary import Summary
+
+from pyopmnearwell.utils.inputvalues import process_tuning
+from pyopmnearwell.utils.runs import simulations
+from pyopmnearwell.utils.writefile import reservoir_files
+
+SOLUTION_KEEP = ["RTEMPVD", "TEMPVD", "RTEMP", "RPTRST", "RPTSOL"]
+"""Keywords of the SOLUTION section that are kept in the restart decks (the initial
+state, e.g., EQUIL or RVW, is read from the restart file)"""
+
+
+def count_report_steps(inj: Sequence[Sequence[Any]]) -> int:
+    """Number of report steps (TSTEP entries) of the injection rows"""
+    return sum(max(1, round(row[0] / row[1])) for row in inj)
+
+
+def plan_schedules(schedules: Sequence[Sequence[list]]) -> list[dict[str, Any]]:
+    """Prefix tree of the schedules, with the parents before their children
+
+    Args:
+        schedules (Sequence): Injection rows (``inj``) of each schedule
+
+    Returns:
+        list: Nodes with the index of the ``parent`` node (None for the nodes that
+        start at t=0), the ``inj`` rows from t=0 to the end of the node, the report
+        step to ``restart`` from (0 for no restart), the total report ``steps``, and
+        the indices of the schedules (``members``) that end at the node
+
+    """
+    trie: list[dict[str, Any]] = [{"row": None, "children": {}, "members": []}]
+    for index, schedule in enumerate(schedules):
+        if len(schedule) == 0:
+            raise ValueError(f"Schedule {index} has no injection rows")
+        node = 0
+        for row in schedule:
+            key = repr(list(row))
+            if key not in trie[node]["children"]:
+                trie[node]["children"][key] = len(trie)
+                trie.append({"row": list(row), "children": {}, "members": []})
+            node = trie[node]["children"][key]
+        trie[node]["members"].append(index)
+    nodes: list[dict[str, Any]] = []
+    queue: list[tuple[int, Optional[int]]] = [
+        (child, None) for child in trie[0]["children"].values()
+    ]
+    while queue:
+        node, parent = queue.pop(0)
+        rows = [trie[node]["row"]]
+        # Rows without a branch or a schedule ending there are run in the same node
+        while len(trie[node]["children"]) == 1 and not trie[node]["members"]:
+            node = next(iter(trie[node]["children"].values()))
+            rows.append(trie[node]["row"])
+        prefix = [] if parent is None else nodes[parent]["inj"]
+        nodes.append(
+            {
+                "parent": parent,
+                "inj": copy.deepcopy(prefix + rows),
+                "restart": 0 if parent is None else nodes[parent]["steps"],
+                "steps": count_report_steps(prefix + rows),
+                "members": trie[node]["members"],
+            }
+        )
+        queue += [(child, len(nodes) - 1) for child in trie[node]["children"].values()]
+    return nodes
+
+
+def restart_deck(deck: str, root: str, step: int) -> str:
+    """Deck that restarts from a report step of the unified restart file of a run
+
+    Args:
+        deck (str): Text of the deck generated from the template
+        root (str): Path to the run without the extension (e.g., output/RUN)
+        step (int): Report step in the restart file
+
+    Returns:
+        str: Deck with ``UNIFIN`` in the RUNSPEC section (Flow reads a non-unified
+        restart file otherwise), ``RESTART`` instead of the initial state in the
+        SOLUTION section (only the SOLUTION_KEEP keywords are kept), and ``SKIPREST``
+        at the start of the SCHEDULE section
+
+    """
+    lines = deck.splitlines()
+    sections = [line.strip() for line in lines]
+    if not {"RUNSPEC", "SOLUTION", "SCHEDULE"} <= set(sections):
+        raise ValueError("The deck needs a RUNSPEC, SOLUTION, and SCHEDULE section")
+    if "UNIFIN" not in sections:
+        runspec = sections.index("RUNSPEC")
+        lines = lines[: runspec + 1] + ["UNIFIN"] + lines[runspec + 1 :]
+        sections = [line.strip() for line in lines]
+    start = sections.index("SOLUTION")
+    end = next(
+        i
+        for i in range(start + 1, len(lines))
+        if sections[i] in ["SUMMARY", "SCHEDULE"]
+    )
+    solution, keep = ["RESTART", f"'{root}' {step} /", ""], False
+    for line in lines[start + 1 : end]:
+        if re.fullmatch(r"[A-Z][A-Z0-9]{0,7}", line.strip()):
+            keep = line.strip() in SOLUTION_KEEP
+        if keep:
+            solution.append(line)
+    schedule = sections.index("SCHEDULE")
+    lines = (
+        lines[: start + 1]
+        + solution
+        + lines[end : schedule + 1]
+        + ["SKIPREST", ""]
+        + lines[schedule + 1 :]
+    )
+    return "\n".join(lines) + "\n"
+
+
+def initialization_deck(deck: str) -> str:
+    """Deck that only initializes the model and writes the restart file at t=0
+
+    Args:
+        deck (str): Text of the deck generated from the template
+
+    Returns:
+        str: Deck without the entries of the SCHEDULE section, with ``RPTRST`` in the
+        SOLUTION section
+
+    """
+    lines = deck.splitlines()
+    sections = [line.strip() for line in lines]
+    if "SOLUTION" not in sections or "SCHEDULE" not in sections:
+        raise ValueError("The deck needs a SOLUTION and a SCHEDULE section")
+    start = sections.index("SOLUTION")
+    end = next(
+        i
+        for i in range(start + 1, len(lines))
+        if sections[i] in ["SUMMARY", "SCHEDULE"]
+    )
+    schedule = sections.index("SCHEDULE")
+    if "RPTRST" not in sections[start:end]:
+        return (
+            "\n".join(
+                lines[:end] + ["", "RPTRST", "BASIC=2 /"] + lines[end : schedule + 1]
+            )
+            + "\n"
+        )
+    return "\n".join(lines[: schedule + 1]) + "\n"
+
+
+def node_dic(
+    dic: dict[str, Any], nodes: list[dict[str, Any]], index: int
+) -> dict[str, Any]:
+    """Copy of the global dictionary with the schedule and run folders of a node"""
+    node = nodes[index]
+    ndic = copy.deepcopy(dic)
+    ndic["inj"] = copy.deepcopy(node["inj"])
+    process_tuning(ndic)
+    ndic["fol"] = f"{dic['fol']}/node_{index}"
+    ndic["fprep"] = f"{ndic['fol']}/preprocessing"
+    ndic["foutp"] = f"{ndic['fol']}/output"
+    return ndic
+
+
+def run_schedules(
+    dic: dict[str, Any], schedules: Sequence[Sequence[list]], jobs: int = 1
+) -> list[dict[str, Any]]:
+    """Generate the decks of the prefix tree and run them level by level
+
+    Args:
+        dic (dict): Global dictionary from ``process_input``, with the ``fol`` in which
+            the nodes are run (it is not modified)
+        schedules (Sequence): Injection rows (``inj``) of each schedule
+        jobs (int): Number of nodes of the same level that run at the same time
+
+    Returns:
+        list: Nodes from ``plan_schedules``, with the ``root`` of the output files
+        (folder and deck name) and the ``status`` of each run (done, failed, or
+        skipped if the run of the parent failed)
+
+    """
+    nodes = plan_schedules(schedules)
+    if dic.get("write", 1) != 1 and any(node["parent"] is not None for node in nodes):
+        raise ValueError("The restarts need the restart files (write = 1)")
+    level = [i for i, node in enumerate(nodes) if node["parent"] is None]
+    while level:
+        dics = {}
+        for i in level:
+            parent = nodes[i]["parent"]
+            if parent is not None and nodes[parent]["status"] != "done":
+                nodes[i]["status"] = "skipped"
+                continue
+            dics[i] = node_dic(dic, nodes, i)
+            write_node(dics[i], nodes, i)
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            for i, status in zip(dics, executor.map(run_node, dics.values())):
+                nodes[i]["status"] = status
+        level = [i for i, node in enumerate(nodes) if node["parent"] in level]
+    return nodes
+
+
+def write_node(ndic: dict[str, Any], nodes: list[dict[str, Any]], index: int) -> None:
+    """Write the deck of a node, restarting from its parent"""
+    os.makedirs(ndic["fprep"], exist_ok=True)
+    reservoir_files(ndic)
+    nodes[index]["root"] = f"{ndic['foutp']}/{ndic['runname'].upper()}"
+    parent = nodes[index]["parent"]
+    if parent is None:
+        return
+    deck = f"{ndic['fprep']}/{ndic['runname'].upper()}.DATA"
+    with open(deck, "r", encoding="utf8") as file:
+        text = file.read()
+    with open(deck, "w", encoding="utf8") as file:
+        file.write(restart_deck(text, nodes[parent]["root"], nodes[index]["restart"]))
+
+
+def run_node(ndic: dict[str, Any]) -> str:
+    """Run Flow for the deck of a node and return the status"""
+    try:
+        simulations(ndic)
+    except subprocess.CalledProcessError:
+        return "failed"
+    return "done"
+
+
+def schedule_path(nodes: list[dict[str, Any]], member: int) -> list[int]:
+    """Indices of the nodes from t=0 to the end of a schedule"""
+    path = [next(i for i, node in enumerate(nodes) if member in node["members"])]
+    while nodes[path[0]]["parent"] is not None:
+        path.insert(0, nodes[path[0]]["parent"])
+    return path
+
+
+def schedule_summary(
+    nodes: list[dict[str, Any]], member: int, keyword: str
+) -> tuple[NDArray, NDArray]:
+    """Days and values of a summary vector of a schedule
+
+    The values are taken from the run of each node along the path of the schedule,
+    after the last day of the run of its parent.
+    """
+    days, values = np.zeros(0), np.zeros(0)
+    for index in schedule_path(nodes, member):
+        if nodes[index]["status"] != "done":
+            raise RuntimeError(f"The run of node {index} is {nodes[index]['status']}")
+        summary = Summary(f"{nodes[index]['root']}.SMSPEC")
+        ndays = np.array(summary.days, dtype=float)
+        keep = ndays > (days[-1] if len(days) else -np.inf)
+        days = np.concatenate((days, ndays[keep]))
+        values = np.concatenate((values, summary.numpy_vector(keyword)[keep]))
+    return days, values
@@ -0,0 +1,121 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Quarter-domain symmetry of the 3D grids around the vertical well
+
+With ``symmetry = 1``, only the quadrant x, y >= 0 of the cartesian, tensor3d, cpg3d,
+and coord3d grids is simulated. The well is in the corner cell (1, 1), and the cells
+along the symmetry planes are the halves of the cells around the well in the full grid
+(the corner cell is a quarter of the well cell). As for the angle of the cake grid, the
+injection rates and well connection factors are scaled to the quadrant, and
+``unfold_cells`` and ``unfold_summary`` map the results back to the full domain.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.typing import NDArray
+
+QUARTERS = 4
+"""Number of quadrants in the full domain"""
+
+SYMMETRY_GRIDS = ["cartesian", "tensor3d", "cpg3d", "coord3d"]
+"""Grids that can be reduced to one quadrant"""
+
+NO_CENTER_WELL = ["hwell", "hwellnoise", "biofilm", "gaswater"]
+"""Templates without a vertical well in the center of the 3D grids"""
+
+EXTENSIVE = [
+    # Surface rates and totals of the phases, reservoir volumes (V), solvent (N), and
+    # gas mass (GM)
+    *[f"{phase}{kind}" for phase in "OWGLVN" for kind in ["PR", "IR", "PT", "IT"]],
+    *[f"GM{kind}" for kind in ["PR", "IR", "PT", "IT"]],
+    # In-place volumes and masses, and pore volumes
+    *["OIP", "OIPL", "OIPG", "WIP", "GIP", "GIPL", "GIPG", "RPV", "HPV"],
+    *["GMIP", "GMDS", "GMGP", "GMTR", "GMST", "GMUS", "GCDI", "GCDM"],
+    # Productivity indices
+    *["PI", "PIO", "PIW", "PIG", "PIL"],
+]
+"""Summary quantities (without the field, group, region, or well prefix) that scale
+with the domain"""
+
+
+def check_symmetry(dic):
+    """Raise a ValueError if the configuration cannot be reduced to one quadrant"""
+    if not dic["symmetry"]:
+        return
+    if dic["grid"] not in SYMMETRY_GRIDS or dic["model"] in ["co2eor", "foam"]:
+        raise ValueError(
+            f"symmetry = 1 is only supported for the {', '.join(SYMMETRY_GRIDS)} grids "
+            + "of the co2store, h2store, and saltprec models"
+        )
+    if dic["pvmult"] == 0 or dic["template"] in NO_CENTER_WELL:
+        raise ValueError(
+            "symmetry = 1 needs a vertical well in the center of the grid and no "
+            + "producers on the boundaries (pvmult != 0)"
+        )
+
+
+def quarter_xcorc(xcorc: NDArray) -> NDArray:
+    """Coordinates of the quadrant from the ones of the full grid"""
+    if not np.allclose(xcorc, -xcorc[::-1]):
+        raise ValueError("symmetry = 1 needs grid coordinates symmetric around 0")
+    return np.concatenate(([0.0], xcorc[xcorc > 0]))
+
+
+def quarter_injection(inj: list[list]) -> list[list]:
+    """Injection schedule with a quarter of the rates (column 4)"""
+    return [row[:3] + [row[3] / QUARTERS] + row[4:] for row in inj]
+
+
+def quarter_wpimult(dic) -> float:
+    """Multiplier of the connection factors of the wells in the corner cell
+
+    Flow computes the connection factors as for a well in the center of the corner
+    cell, i.e., with the Peaceman radius 0.14 * sqrt(2) * dx of the corner cell. The
+    quarter of the well in the full grid has the Peaceman radius of the well cell, which
+    is twice as wide, and a quarter of its connection factor. Given connection factors
+    (confact) are only divided by four.
+    """
+    if dic["confact"] != 0:
+        return 1 / QUARTERS
+    radius = 0.5 * dic["diameter"]
+    peaceman = 0.14 * np.sqrt(2) * 2 * dic["xcorc"][1]
+    return float(
+        np.log(0.5 * peaceman / radius) / (QUARTERS * np.log(peaceman / radius))
+    )
+
+
+def unfold_cells(values: NDArray, extensive: bool = False) -> NDArray:
+    """Values in the cells of the full grid from the ones in the quadrant
+
+    Args:
+        values (NDArray): Values with the (j, i) cells of the quadrant in the last two
+            axes, e.g., a restart array reshaped to (nz, ny, nx)
+        extensive (bool): Whether the values are per cell (e.g., pore volumes or
+            masses) instead of per volume (e.g., pressures or saturations). The cells
+            on the symmetry planes are then added to their mirror images
+
+    Returns:
+        NDArray: Values with (2 ny - 1, 2 nx - 1) cells in the last two axes
+
+    """
+    values = np.array(values, dtype=float)
+    if extensive:
+        values[..., 0, :] *= 2
+        values[..., :, 0] *= 2
+    values = np.concatenate((np.flip(values[..., 1:], axis=-1), values), axis=-1)
+    return np.concatenate((np.flip(values[..., 1:, :], axis=-2), values), axis=-2)
+
+
+def unfold_summary(keyword: str, values: NDArray) -> NDArray:
+    """Values of a summary vector of the quadrant for the full domain
+
+    The ``EXTENSIVE`` quantities of the field, groups, regions, and wells, i.e., rates,
+    totals, in-place quantities, pore volumes, and productivity indices (e.g., FGIR,
+    WGIT, FGIP, FRPV, WPI), are multiplied by four, the other vectors (e.g., FPR, WBHP,
+    WSTAT) are returned unchanged.
+    """
+    if keyword.split(":")[0][1:] not in EXTENSIVE:
+        return np.asarray(values)
+    return QUARTERS * np.asarray(values)
@@ -8,11 +8,30 @@ from __future__ import annotations
 
 import os
 import pathlib
+import pickle
+from collections.abc import Iterable, Iterator
 
 import numpy as np
 from numpy.typing import NDArray
+from resdata import ResDataType
+from resdata.grid import Grid
+from resdata.resfile import ResdataKW
 
+from pyopmnearwell.utils.includecache import apply_mutations, get_key, run_cached
 from pyopmnearwell.utils.mako import fill_template
+from pyopmnearwell.utils.output import set_output
+from pyopmnearwell.utils.symmetry import (
+    check_symmetry,
+    quarter_injection,
+    quarter_wpimult,
+    quarter_xcorc,
+)
+
+POW10 = np.array([float(10**k) for k in range(23)])
+"""Powers of ten that are exactly representable as floats"""
+
+INCLUDES = "INCLUDES.pkl"
+"""Inputs and dictionary changes of the include files in a preprocessing folder"""
 
 HEADER = (
     "-- Copyright (C) 2023-2026 NORCE Research AS\n"
@@ -30,21 +49,28 @@ def reservoir_files(
         dic (dict): Global dictionary with required parameters
         **kwargs: Possible kwargs are:
 
-            - recalc_grid (bool): Whether to recalculate the ``GRID.INC`` file. Intended
-              for ensemble runs, where the saturation functions/geography/etc. do not
-              need to be recalculated for each ensemble member. Defaults to True.
-            - recalc_tables (bool): Whether to recalculate the ``TABLES.INC`` file.
-              Defaults to True.
-            - recalc_sections (bool): Whether to recalculate the ``GEOLOGY.INC`` and
-              ``FLUXNUM.INC`` files. Defaults to True.
+            - recalc_grid (bool | str): Whether to recalculate the grid files
+              (``GRID.INC``/``GRID.EGRID``, ``DX.INC``, ``DY.INC``, ``DRV.INC``).
+              Intended for ensemble runs, where the saturation functions/geography/etc.
+              do not need to be recalculated for each ensemble member. With ``"auto"``,
+              the files are only recalculated if their inputs differ from the ones of
+              the files in ``inc_folder``. Defaults to True.
+            - recalc_tables (bool | str): Same for the ``TABLES.INC`` file. Defaults to
+              True.
+            - recalc_sections (bool | str): Same for the ``GEOLOGY.INC``,
+              ``FLUXNUM.INC``, ``MULTPV.INC``, ``PERMFACT.INC``, and ``PCFACT.INC``
+              files, which are decided on one by one for ``"auto"``. Defaults to True.
             - inc_folder (pathlib.Path): If any of the mentioned files is not
-              recalculated, they are taken from this folder. Defaults to
-              ``pathlib.Path("")``.
+              recalculated, they are taken from this folder (relative to the
+              preprocessing folder). Defaults to ``pathlib.Path("")``.
 
     Note:
-        - All of the ``recalc_*`` options only work for
-          ``co2store no_disgas_no_diffusion`` on a ``cake`` grid so far.
-        - For other models or grids there will be errors.
+        - The inputs of each file are listed in ``includecache.DEPENDENCIES``. The
+          files are taken from the include cache if they were generated before for the
+          same inputs.
+        - The inputs and dictionary changes of the generated files are saved in
+          ``INCLUDES.pkl``, such that later runs can take the files from this folder
+          (e.g., the first member of an ensemble).
 
     Returns:
         dic (dict): Global dictionary with new added parameters
@@ -54,6 +80,85 @@ def reservoir_files(
     recalc_grid = kwargs.get("recalc_grid", True)
     recalc_tables = kwargs.get("recalc_tables", True)
     recalc_sections = kwargs.get("recalc_sections", True)
+    initialize_files(dic)
+    if "fprep" not in dic:
+        dic["fprep"] = f"{dic['fol']}/preprocessing"
+    reference = read_includes(pathlib.Path(dic["fprep"]) / inc_folder)
+    includes = {}
+    initialize_xcor(dic)
+    include_files(
+        dic,
+        "grid",
+        handle_core if dic["grid"] == "core" else manage_grid,
+        ["grid_file", "drv_file", "dx_file", "dy_file"],
+        recalc_grid,
+        inc_folder,
+        reference,
+        includes,
+    )
+    initialize_layers(dic)
+    # Cell (i, j) of the vertical well, in the corner of the quadrant with symmetry
+    dic["well_ij"] = 1 if dic["symmetry"] else 1 + dic["nocells"][1] // 2
+    if dic["symmetry"]:
+        dic["wpimult"] = quarter_wpimult(dic)
+    if dic["model"] not in ["co2eor", "foam"]:
+        dic["satfun_tables"] = get_satfun_tables(dic)
+        # The deck includes the tables and sections of the given folder if they are
+        # not recalculated, therefore they need to be decided on before filling it
+        include_files(
+            dic,
+            "tables",
+            manage_tables,
+            ["tables_file"],
+            recalc_tables,
+            inc_folder,
+            reference,
+            includes,
+        )
+        for group, function, name, needed in [
+            ("geology", manage_geology, "geology_file", True),
+            ("fluxnum", manage_fluxnum, "fluxnum_file", dic["fluxnum"]),
+            ("multpv", manage_multpv, "multpv_file", dic["pvmult"] > 0),
+            ("permfact", manage_permfact, "permfact_file", has_permfact(dic)),
+            (
+                "pcfact",
+                manage_pcfact,
+                "pcfact_file",
+                has_permfact(dic) and dic["pcfact"] != 0,
+            ),
+        ]:
+            if needed:
+                include_files(
+                    dic,
+                    group,
+                    function,
+                    [name],
+                    recalc_sections,
+                    inc_folder,
+                    reference,
+                    includes,
+                )
+    var = {"dic": dic}
+    if dic["symmetry"]:
+        var = {"dic": dic | {"inj": quarter_injection(dic["inj"])}}
+    filledtemplate: str = fill_template(
+        var,
+        filename=os.path.join(
+            dic["pat"], "templates", dic["model"], f"{dic['template']}.mako"
+        ),
+    )
+    with open(
+        os.path.join(dic["fprep"], f"{dic['runname'].upper()}.DATA"),
+        "w",
+        encoding="utf-8",
+    ) as file:
+        file.write(filledtemplate)
+    with open(os.path.join(dic["fprep"], INCLUDES), "wb") as file:
+        pickle.dump(includes, file)
+
+
+def initialize_files(dic):
+    """Set the names of the include files (and check the output options)"""
     dic.update(
         {
             "multpv_file": "MULTPV.INC",
@@ -64,12 +169,22 @@ def reservoir_files(
             "tables_file": "TABLES.INC",
             "geology_file": "GEOLOGY.INC",
             "fluxnum_file": "FLUXNUM.INC",
+            "permfact_file": "PERMFACT.INC",
+            "pcfact_file": "PCFACT.INC",
         }
     )
-    if "fprep" not in dic:
-        dic["fprep"] = f"{dic['fol']}/preprocessing"
     if "write" not in dic:
         dic["write"] = 1
+    if "egrid" not in dic:
+        dic["egrid"] = 0
+    if dic["egrid"]:
+        dic["grid_file"] = "GRID.EGRID"
+    check_symmetry(dic)
+    set_output(dic)
+
+
+def initialize_xcor(dic):
+    """Set the x coordinates of the 2D grids (and the number of x cells)"""
     dims = dic["dims"]
     nocells = dic["nocells"]
     grid = dic["grid"]
@@ -102,30 +217,10 @@ def reservoir_files(
         xcor = dic["xcor"]
         dic["xcor"] = xcor[(0.5 * dic["diameter"] < xcor) | (0 == xcor)]
     nocells[0] = len(dic["xcor"]) - 1
-    if recalc_grid:
-        if grid == "core":
-            handle_core(dic)
-        else:
-            manage_grid(dic)
-    else:
-        dic.update(
-            {
-                "grid_file": f"'{inc_folder / 'GRID.INC'}'",
-                "drv_file": f"'{inc_folder / 'DRV.INC'}'",
-                "dx_file": f"'{inc_folder / 'DX.INC'}'",
-                "dy_file": f"'{inc_folder / 'DY.INC'}'",
-            }
-        )
-    if not recalc_tables:
-        dic.update({"tables_file": f"'{inc_folder / 'TABLES.INC'}'"})
-    if not recalc_sections:
-        dic.update(
-            {
-                "geology_file": f"'{inc_folder / 'GEOLOGY.INC'}'",
-                "multpv_file": f"'{inc_folder / 'MULTPV.INC'}'",
-                "fluxnum_file": f"'{inc_folder / 'FLUXNUM.INC'}'",
-            }
-        )
+
+
+def initialize_layers(dic):
+    """Set the z coordinates and the rock layer of each cell"""
     rock = dic["rock"]
     increments = np.concatenate(
         [
@@ -143,24 +238,42 @@ def reservoir_files(
     dic["layers"] = np.sum(
         dic["z_centers"][:, None] > thickness[None, :], axis=1
     ).astype(float)
-    var = {"dic": dic}
-    filledtemplate: str = fill_template(
-        var,
-        filename=os.path.join(
-            dic["pat"], "templates", dic["model"], f"{dic['template']}.mako"
-        ),
-    )
-    with open(
-        os.path.join(dic["fprep"], f"{dic['runname'].upper()}.DATA"),
-        "w",
-        encoding="utf-8",
-    ) as file:
-        file.write(filledtemplate)
-    if dic["model"] not in ["co2eor", "foam"]:
-        if recalc_tables:
-            manage_tables(dic)
-        if recalc_sections:
-            manage_sections(dic)
+
+
+def include_files(
+    dic, group, function, names, recalc, inc_folder, reference, includes
+):  # pylint: disable=R0913, R0917
+    """Generate the files of the group, or include them from inc_folder
+
+    The files in inc_folder are used if recalc is False, or if recalc is 'auto' and
+    the files in inc_folder were generated from the same inputs (see
+    ``includecache.DEPENDENCIES``). The dictionary changes of the generation are
+    applied in both cases.
+    """
+    key = get_key(dic, group)
+    if recalc == "auto":
+        recalc = reference.get(group, {}).get("key") != key
+    if recalc:
+        includes[group] = {"key": key, "mutations": run_cached(dic, group, function)}
+        return
+    dic.update({name: f"'{inc_folder / dic[name]}'" for name in names})
+    if group in reference:
+        apply_mutations(dic, reference[group]["mutations"])
+        includes[group] = reference[group]
+
+
+def read_includes(folder):
+    """Inputs and dictionary changes of the files in the folder (see INCLUDES)"""
+    try:
+        with open(folder / INCLUDES, "rb") as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {}
+
+
+def has_permfact(dic):
+    """Whether the deck needs the PERMFACT (and possibly PCFACT) files"""
+    return dic["model"] in ["saltprec"] or dic["template"] in ["biofilm"]
 
 
 def generate_fluxnum(dic):
@@ -197,12 +310,16 @@ def generate_fluxnum(dic):
                     f"{spaces_step}{step} /\n"
                 )
             else:
-                center = np.ceil(dic["nocells"][1] / 2).astype(int)
                 sum_val = np.sum(dic["x_centers"] < dic["perforations"][2])
+                if dic["symmetry"]:
+                    first, last = 1, 1 + sum_val
+                else:
+                    center = np.ceil(dic["nocells"][1] / 2).astype(int)
+                    first, last = center - sum_val, center + sum_val
                 output += (
                     f"FLUXNUM {dic['satnum']+1} "
-                    f"{center - sum_val} {center + sum_val} "
-                    f"{center - sum_val} {center + sum_val} "
+                    f"{first} {last} "
+                    f"{first} {last} "
                     f"{spaces_step}{step} {spaces_step}{step} /\n"
                 )
     output += "/"
@@ -238,22 +355,28 @@ def generate_multpv(dic):
         nocells = dic["nocells"]
         pvmult = dic["pvmult"]
         xcorc = dic["xcorc"]
+        widths = [xcorc[i + 1] - xcorc[i] for i in range(nocells[0])]
+        if dic["symmetry"]:
+            # The cells on the symmetry planes are halves of the ones in the full grid
+            widths[0] *= 2
 
         def multpv_block():
             block = ""
             for k in range(nocells[2]):
                 for i in range(nocells[0]):
-                    block += f"{pvmult/(xcorc[i+1]-xcorc[i])} "
+                    block += f"{pvmult/widths[i]} "
                 block += "/\n" if k == nocells[2] - 1 else " "
             return block
 
-        output += f"BOX\n1 1 1 {nocells[0]} 2* / \nMULTPV\n"
-        output += multpv_block()
-        output += "ENDBOX\n\n"
+        # The first rows of cells are on the symmetry planes of a quadrant
+        if not dic["symmetry"]:
+            output += f"BOX\n1 1 1 {nocells[0]} 2* / \nMULTPV\n"
+            output += multpv_block()
+            output += "ENDBOX\n\n"
 
-        output += f"BOX\n1 {nocells[0]} 1 1 2* / \nMULTPV\n"
-        output += multpv_block()
-        output += "ENDBOX\n\n"
+            output += f"BOX\n1 {nocells[0]} 1 1 2* / \nMULTPV\n"
+            output += multpv_block()
+            output += "ENDBOX\n\n"
 
         output += f"BOX\n{nocells[1]} {nocells[1]} 1 {nocells[0]} 2* / \nMULTPV\n"
         output += multpv_block()
@@ -338,7 +461,7 @@ def generate_geology(dic):
         output += f"{nocells[0]}*0 /\n"
 
     elif dic["grid"] in ["cake", "tensor2d", "coord2d", "cpg3d"]:
-        output += "INCLUDE\n"
+        output += "GDFILE\n" if dic["egrid"] else "INCLUDE\n"
         output += f"{dic['grid_file']} /\n"
 
     else:
@@ -393,53 +516,72 @@ def generate_geology(dic):
 
 def manage_sections(dic):
     """Write the include files in the input deck"""
+    manage_geology(dic)
+    if dic["fluxnum"]:
+        manage_fluxnum(dic)
+    if dic["pvmult"] > 0:
+        manage_multpv(dic)
+    if has_permfact(dic):
+        manage_permfact(dic)
+        if dic["pcfact"] != 0:
+            manage_pcfact(dic)
+
+
+def manage_geology(dic):
+    """Write GEOLOGY.INC"""
     get_spaces(dic)
-    fprep = dic["fprep"]
-    result = generate_geology(dic)
     with open(
-        os.path.join(fprep, "GEOLOGY.INC"),
+        os.path.join(dic["fprep"], "GEOLOGY.INC"),
         "w",
         encoding="utf-8",
     ) as f:
         f.write(HEADER)
-        f.write(result)
-    if dic["fluxnum"]:
-        result = generate_fluxnum(dic)
-        with open(
-            os.path.join(fprep, "FLUXNUM.INC"),
-            "w",
-            encoding="utf-8",
-        ) as f:
-            f.write(HEADER)
-            f.write(result)
-    if dic["pvmult"] > 0:
-        result = generate_multpv(dic)
-        with open(
-            os.path.join(fprep, "MULTPV.INC"),
-            "w",
-            encoding="utf-8",
-        ) as f:
-            f.write(HEADER)
-            f.write(result)
+        f.write(generate_geology(dic))
 
-    if dic["model"] in ["saltprec"] or dic["template"] in ["biofilm"]:
-        result = generate_permfact(dic)
-        with open(
-            os.path.join(fprep, "PERMFACT.INC"),
-            "w",
-            encoding="utf-8",
-        ) as f:
-            f.writelines(HEADER)
-            f.writelines(result)
-        if dic["pcfact"] != 0:
-            result = generate_pcfact(dic)
-            with open(
-                os.path.join(fprep, "PCFACT.INC"),
-                "w",
-                encoding="utf-8",
-            ) as f:
-                f.writelines(HEADER)
-                f.writelines(result)
+
+def manage_fluxnum(dic):
+    """Write FLUXNUM.INC"""
+    get_spaces(dic)
+    with open(
+        os.path.join(dic["fprep"], "FLUXNUM.INC"),
+        "w",
+        encoding="utf-8",
+    ) as f:
+        f.write(HEADER)
+        f.write(generate_fluxnum(dic))
+
+
+def manage_multpv(dic):
+    """Write MULTPV.INC"""
+    with open(
+        os.path.join(dic["fprep"], "MULTPV.INC"),
+        "w",
+        encoding="utf-8",
+    ) as f:
+        f.write(HEADER)
+        f.write(generate_multpv(dic))
+
+
+def manage_permfact(dic):
+    """Write PERMFACT.INC"""
+    with open(
+        os.path.join(dic["fprep"], "PERMFACT.INC"),
+        "w",
+        encoding="utf-8",
+    ) as f:
+        f.writelines(HEADER)
+        f.writelines(generate_permfact(dic))
+
+
+def manage_pcfact(dic):
+    """Write PCFACT.INC"""
+    with open(
+        os.path.join(dic["fprep"], "PCFACT.INC"),
+        "w",
+        encoding="utf-8",
+    ) as f:
+        f.writelines(HEADER)
+        f.writelines(generate_pcfact(dic))
 
 
 def generate_pcfact(dic):
@@ -547,14 +689,110 @@ def get_spaces(dic):
 
 def manage_tables(dic):
     """Write the saturation function tables"""
-    model = dic["model"]
-    template = dic["template"].lower()
-    if model in ["co2store", "h2store", "saltprec"] and template != "h2ch4":
+    with open(f"{dic['fprep']}/TABLES.INC", "w", encoding="utf8") as f:
+        f.writelines(get_tables(dic))
+
+
+def get_tables(dic):
+    """Lines of the saturation function tables"""
+    dic["satfun_points"] = [0, 0]
+    if uses_format_2(dic):
         result = generate_saturation_functions_format_2(dic)
     else:
         result = generate_saturation_functions_format_1(dic)
-    with open(f"{dic['fprep']}/TABLES.INC", "w", encoding="utf8") as f:
-        f.writelines(result)
+    if dic["safutol"] > 0:
+        result.insert(
+            0,
+            f"-- {dic['satfun_points'][0]} of {dic['satfun_points'][1]} points "
+            + f"(safutol = {dic['safutol']})\n",
+        )
+    return result
+
+
+def uses_format_2(dic):
+    """Whether the tables are written with SGFN and SWFN (else with SGOF)"""
+    return (
+        dic["model"] in ["co2store", "h2store", "saltprec"]
+        and dic["template"].lower() != "h2ch4"
+    )
+
+
+def get_safu_rows(dic):
+    """Parameters of the gas and water saturation functions of each table"""
+    safug = [list(row) for row in dic["safu"]]
+    safuw = [list(row) for row in dic["safu"]]
+    if dic["imbnum"] == 2:
+        # The imbibition water tables use the residual gas of a drainage one
+        for i in range(len(dic["safu"])):
+            if len(dic["safu"]) / dic["imbnum"] <= i:
+                safuw[i][1] = dic["safu"][int(i % len(dic["safu"]) / dic["imbnum"])][1]
+    return safug, safuw
+
+
+def get_satfun_tables(dic):
+    """Number of the saturation function table of each SATNUM (and IMBNUM) region
+
+    Regions with the same parameters share one table, such that each table is only
+    evaluated and written once. The numbers are kept for the templates with other
+    tables per SATNUM region (PERMFACT, PCFACT, and BIOFPARA).
+    """
+    safug, safuw = get_safu_rows(dic)
+    if has_permfact(dic):
+        return list(range(1, len(safug) + 1))
+    if uses_format_2(dic):
+        rows = [(tuple(gas), tuple(water)) for gas, water in zip(safug, safuw)]
+    else:
+        rows = [tuple(row) for row in safug]
+    numbers = {}
+    return [numbers.setdefault(row, len(numbers) + 1) for row in rows]
+
+
+def get_unique_tables(dic):
+    """Index in safu of the first region of each saturation function table"""
+    tables = get_satfun_tables(dic)
+    return [tables.index(number) for number in range(1, max(tables) + 1)]
+
+
+def adapt_table(dic, x: NDArray, *columns: NDArray) -> tuple[NDArray, ...]:
+    """Keep only the points of a table that are needed to interpolate it within safutol
+
+    The points are refined as in the Ramer-Douglas-Peucker algorithm until linear
+    interpolation between them gives all columns at all the original points with an
+    error of at most safutol times the range of the column, such that the same
+    tolerance applies to the relative permeabilities (0 to 1) and the capillary
+    pressure (in bar). The number of kept and original points is added to
+    dic['satfun_points'].
+    """
+    points = dic.setdefault("satfun_points", [0, 0])
+    points[1] += len(x)
+    if dic["safutol"] <= 0:
+        points[0] += len(x)
+        return (x, *columns)
+    values = np.column_stack([np.broadcast_to(column, x.shape) for column in columns])
+    keep = np.zeros(len(x), dtype=bool)
+    # Constant columns (e.g., without capillary pressure) are compared in their units.
+    scale = np.ptp(values, axis=0)
+    scale[scale == 0] = 1.0
+    keep[[0, -1]] = True
+    if not np.all(np.isfinite(values)):
+        keep[:] = True
+    while not np.all(keep):
+        kept = np.flatnonzero(keep)
+        interpolated = np.column_stack(
+            [np.interp(x, x[kept], values[kept, i]) for i in range(len(columns))]
+        )
+        error = np.max(np.abs(interpolated - values) / scale, axis=1)
+        error[keep] = 0
+        # Add the point with the largest error in each segment that is not accurate
+        segment = np.searchsorted(kept, np.arange(len(x)), side="right")
+        order = np.lexsort((-error, segment))
+        worst = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        worst = worst[error[worst] > dic["safutol"]]
+        if len(worst) == 0:
+            break
+        keep[worst] = True
+    points[0] += np.count_nonzero(keep)
+    return (x[keep], *(values[keep, i] for i in range(len(columns))))
 
 
 def generate_saturation_functions_format_2(dic):
@@ -567,19 +805,10 @@ def generate_saturation_functions_format_2(dic):
 
     safeglob = {"__builtins__": {}, "np": np}
 
-    safug = [[0.0] * len(dic["safu"][0]) for _ in range(len(dic["safu"]))]
-    safuw = [[0.0] * len(dic["safu"][0]) for _ in range(len(dic["safu"]))]
-
-    for i in range(len(dic["safu"])):
-        for j in range(len(dic["safu"][i])):
-            value = dic["safu"][i][j]
-            safug[i][j] = value
-
-            if dic["imbnum"] == 2 and j == 1 and len(dic["safu"]) / dic["imbnum"] <= i:
-                idx = int(i % len(dic["safu"]) / dic["imbnum"])
-                safuw[i][j] = dic["safu"][idx][j]
-            else:
-                safuw[i][j] = value
+    safug, safuw = get_safu_rows(dic)
+    tables = get_unique_tables(dic)
+    safug = [safug[i] for i in tables]
+    safuw = [safuw[i] for i in tables]
 
     lines = []
     lines.append("SGFN\n")
@@ -611,13 +840,12 @@ def generate_saturation_functions_format_2(dic):
 
         krn_vals = np.maximum(0, krn_vals)
 
+        sco2, krn_vals = adapt_table(dic, sco2, krn_vals)
+
         if sco2[0] > 0:
             lines.append(f"{0:E} {0:E} {0:E}\n")
 
-        for i, value in enumerate(sco2[:-1]):
-            lines.append(f"{value:E} {krn_vals[i]:E} {0:E} \n")
-
-        lines.append(f"{sco2[-1]:E} {krn_vals[-1]:E} {0:E} \n")
+        lines += format_rows(format_e(sco2), format_e(krn_vals), f"{0:E}")
         lines.append("/\n")
 
     lines.append("SWFN\n")
@@ -665,13 +893,13 @@ def generate_saturation_functions_format_2(dic):
                 },
             )
 
-            for i, value in enumerate(swatc):
-                if value <= swi:
-                    lines.append(f"{value:E} {0:E} {pcw_vals[i]:E} \n")
-                elif value >= 1 - sni:
-                    lines.append(f"{value:E} {1:E} {pcw_vals[i]:E} \n")
-                else:
-                    lines.append(f"{value:E} {krw_vals[i]:E} {pcw_vals[i]:E} \n")
+            krw_vals = np.where(
+                swatc <= swi, 0.0, np.where(swatc >= 1 - sni, 1.0, krw_vals)
+            )
+            swatc, krw_vals, pcw_vals = adapt_table(dic, swatc, krw_vals, pcw_vals)
+            lines += format_rows(
+                format_e(swatc), format_e(krw_vals), format_e(pcw_vals)
+            )
 
         else:
             swatc = np.linspace(0, 1, para[10])
@@ -749,13 +977,16 @@ def generate_saturation_functions_format_2(dic):
                     + np.log10(pc_sls)
                 )
 
-            for i, value in enumerate(swatc):
-                if value <= sls:
-                    lines.append(f"{value:E} {krw_vals_low[i]:E} {cap_vals[i]:E} \n")
-                elif value >= 1 - sni:
-                    lines.append(f"{value:E} {1:E} {pcw_vals[i]:E} \n")
-                else:
-                    lines.append(f"{value:E} {krw_vals[i]:E} {pcw_vals[i]:E} \n")
+            krw_vals = np.where(
+                swatc <= sls,
+                krw_vals_low,
+                np.where(swatc >= 1 - sni, 1.0, krw_vals),
+            )
+            pcw_vals = np.where(swatc <= sls, cap_vals, pcw_vals)
+            swatc, krw_vals, pcw_vals = adapt_table(dic, swatc, krw_vals, pcw_vals)
+            lines += format_rows(
+                format_e(swatc), format_e(krw_vals), format_e(pcw_vals)
+            )
 
         lines.append("/\n")
 
@@ -771,11 +1002,7 @@ def generate_saturation_functions_format_1(dic):
 
     safeglob = {"__builtins__": {}, "np": np}
 
-    safu = [[0.0] * len(dic["safu"][0]) for _ in range(len(dic["safu"]))]
-
-    for i in range(len(dic["safu"])):
-        for j in range(len(dic["safu"][i])):
-            safu[i][j] = dic["safu"][i][j]
+    safu = [list(dic["safu"][i]) for i in get_unique_tables(dic)]
 
     lines = []
     lines.append("SGOF\n")
@@ -837,16 +1064,19 @@ def generate_saturation_functions_format_1(dic):
                 },
             )
 
+        snatc, krn_vals, krw_vals, pc_vals = adapt_table(
+            dic, snatc, krn_vals, krw_vals, pc_vals
+        )
+
         if sni > 0:
             lines.append(f"{0:E} {0:E} {1:E} {pc_vals[0]:E} \n")
 
-        for i, value in enumerate(snatc):
-            if i == 0:
-                lines.append(f"{value:E} {0:E} {krw_vals[i]:.6f} {pc_vals[i]:E} \n")
-            else:
-                lines.append(
-                    f"{value:E} {krn_vals[i]:.6f} {krw_vals[i]:.6f} {pc_vals[i]:E} \n"
-                )
+        lines += format_rows(
+            format_e(snatc),
+            np.concatenate(([f"{0:E}"], format_f(krn_vals[1:]))),
+            format_f(krw_vals),
+            format_e(pc_vals),
+        )
 
         lines.append("/\n")
 
@@ -883,32 +1113,156 @@ def manage_grid(dic):
         dic["slope"] = np.tan(0.5 * dic["dims"][1] * np.pi / 180)
         get_2dgrid(dic)
     else:
-        if grid == "coord3d":
-            dic["xcorc"] = dic["xcn"]
-        else:
-            create_3dgrid(dic)
-            if dic["model"] not in ["co2eor", "foam"]:
-                xcorc = dic["xcorc"]
-                dic["xcorc"] = np.concatenate((-xcorc[::-1], xcorc))
-        dic["xcorc"] = np.asarray(dic["xcorc"])
-        dxarray = np.diff(dic["xcorc"])
-        nocells[0] = len(dic["xcorc"]) - 1
-        nocells[1] = nocells[0]
-        d3_grids(dic, dxarray)
+        initialize_xcorc(dic)
+        d3_grids(dic, np.diff(dic["xcorc"]))
+
+
+def initialize_xcorc(dic):
+    """Set the x (and y) coordinates of the 3D grids (and the number of x/y cells)"""
+    nocells = dic["nocells"]
+    if dic["grid"] == "coord3d":
+        dic["xcorc"] = dic["xcn"]
+    else:
+        create_3dgrid(dic)
+        if dic["model"] not in ["co2eor", "foam"]:
+            xcorc = dic["xcorc"]
+            dic["xcorc"] = np.concatenate((-xcorc[::-1], xcorc))
+    dic["xcorc"] = np.asarray(dic["xcorc"])
+    if dic["symmetry"]:
+        dic["xcorc"] = quarter_xcorc(dic["xcorc"])
+    nocells[0] = len(dic["xcorc"]) - 1
+    nocells[1] = nocells[0]
 
 
 def round_like_e(v: NDArray) -> NDArray:
     """Keep only 8 significant digits to reduce size of created files"""
-    return np.asarray([float(f"{x:E}") for x in v])
+    x = np.asarray(v, dtype=float)
+    mant, exp, slow = split_e(x)
+    values = np.where(
+        exp >= 6,
+        mant * POW10[np.clip(exp - 6, 0, 22)],
+        mant / POW10[np.clip(6 - exp, 0, 22)],
+    )
+    values = np.copysign(values, x)
+    values[slow] = [float(f"{val:E}") for val in x[slow]]
+    return values
+
+
+def split_e(x: NDArray) -> tuple[NDArray, NDArray, NDArray]:
+    """Mantissa (as 7-digit integer) and exponent of f'{x:E}' for a float array.
+
+    The mantissa is obtained from a single correctly rounded multiplication/division by
+    an exact power of ten. Values for which this could round differently than the exact
+    decimal conversion (halfway cases, very large/small exponents, inf, nan) are marked
+    in the returned mask and need to be formatted with Python instead.
+    """
+    ax = np.abs(x)
+    zero = ax == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exp = np.floor(np.log10(ax))
+    exp[zero] = 0
+    slow = ~np.isfinite(exp)
+    exp[slow] = 0
+    exp = exp.astype(np.int64)
+    ax = np.where(slow, 0, ax)
+
+    def scale(exp):
+        return np.where(
+            exp <= 6,
+            ax * POW10[np.clip(6 - exp, 0, 22)],
+            ax / POW10[np.clip(exp - 6, 0, 22)],
+        )
+
+    for _ in range(2):
+        mant = np.rint(scale(exp))
+        # ``log10`` can be off by one next to powers of ten and the mantissa can round
+        # up to the next power of ten
+        exp += (mant >= 1e7).astype(np.int64) - ((mant < 1e6) & ~zero).astype(np.int64)
+    scaled = scale(exp)
+    mant = np.rint(scaled)
+    slow |= (mant >= 1e7) | ((mant < 1e6) & ~zero) | (exp < -16) | (exp > 28)
+    slow |= np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    # A mantissa of 1.000000 could also be a halfway case that rounded up from 9.999999
+    carry = mant == 1e6
+    below = scale(exp - 1)
+    slow |= carry & ((exp <= -16) | (np.abs(below - np.floor(below) - 0.5) < 1e-6))
+    mant[slow] = 0
+    return mant, exp, slow
+
+
+def format_e(v: NDArray) -> NDArray:
+    """Format a whole array like f'{x:E}'"""
+    x = np.asarray(v, dtype=float).ravel()
+    mant, exp, slow = split_e(x)
+    digits = mant.astype(np.int64)
+    out = np.char.add(
+        np.char.add(
+            np.char.add(
+                np.where(np.signbit(x), "-", ""), (digits // 10**6).astype(str)
+            ),
+            np.char.add(".", np.char.zfill((digits % 10**6).astype(str), 6)),
+        ),
+        np.char.add(
+            np.where(exp < 0, "E-", "E+"), np.char.zfill(np.abs(exp).astype(str), 2)
+        ),
+    ).astype("<U16")
+    out[slow] = [f"{val:E}" for val in x[slow]]
+    return out
+
+
+def format_f(v: NDArray) -> NDArray:
+    """Format a whole array like f'{x:.6f}'"""
+    x = np.asarray(v, dtype=float).ravel()
+    scaled = np.abs(x) * 1e6
+    slow = ~np.isfinite(scaled) | (scaled >= 1e15)
+    scaled[slow] = 0
+    slow |= np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    digits = np.rint(scaled).astype(np.int64)
+    out = np.char.add(
+        np.char.add(np.where(np.signbit(x), "-", ""), (digits // 10**6).astype(str)),
+        np.char.add(".", np.char.zfill((digits % 10**6).astype(str), 6)),
+    )
+    if np.any(slow):
+        out = out.astype(object)
+        out[slow] = [f"{val:.6f}" for val in x[slow]]
+        out = out.astype(str)
+    return out
+
+
+def format_rows(*columns: NDArray | str) -> list[str]:
+    """Join formatted columns (or a constant string) to rows ending with ' \\n'"""
+    rows = columns[0]
+    for column in columns[1:]:
+        rows = np.char.add(np.char.add(rows, " "), column)
+    return np.char.add(rows, " \n").tolist()
 
 
 def get_2dgrid(dic):
     """Create the 2D corner-point grid"""
-    grid = []
+    coord, zcorn = get_2dcorners(dic)
+    if dic["egrid"]:
+        write_egrid(dic, [coord], [zcorn])
+        return
+    grid = ["COORD\n"]
+    grid += compact_format(coord)
+    grid.append("/\n")
+    grid.append("ZCORN\n")
+    grid += compact_format(zcorn)
+    with open(
+        os.path.join(dic["fprep"], "GRID.INC"),
+        "w",
+        encoding="utf8",
+    ) as f:
+        f.write(HEADER)
+        f.write("".join(grid))
+        f.write("/\n")
+
+
+def get_2dcorners(dic) -> tuple[NDArray, NDArray]:
+    """COORD and ZCORN values of the 2D corner-point grid"""
     xcor = dic["xcor"]
     slope = dic["slope"]
     dims = dic["dims"]
-    grid.append("COORD\n")
 
     xx = np.tile(xcor, 2)
     yy = np.concatenate([-xcor * slope, xcor * slope])
@@ -923,9 +1277,7 @@ def get_2dgrid(dic):
             np.full_like(xx, dims[2]),
         )
     ).ravel()
-    grid += compact_format(round_like_e(values))
-    grid.append("/\n")
-    grid.append("ZCORN\n")
+    coord = round_like_e(values)
     mainfold = compile(dic["zxy"], "<string>", "eval")
     xf = eval(  # pylint: disable=eval-used
         mainfold,
@@ -954,33 +1306,77 @@ def get_2dgrid(dic):
     nrep = 2 * ny
     size = nrep * block.size
     grids[p : p + size] = np.tile(block, nrep)
-    grid += compact_format(round_like_e(grids))
-    with open(
-        os.path.join(dic["fprep"], "GRID.INC"),
-        "w",
-        encoding="utf8",
-    ) as f:
-        f.write(HEADER)
-        f.write("".join(grid))
-        f.write("/\n")
+    return coord, round_like_e(grids)
 
 
 def compact_format(v: NDArray) -> list[str]:
     "To 'n*x' notation"
+    return format_runs(*get_runs(v))
+
+
+def get_runs(v: NDArray) -> tuple[NDArray, NDArray]:
+    """Values and lengths of the runs of repeated values"""
     v = np.array(v)
     change_idx = np.flatnonzero(np.diff(v, prepend=v[0] - 1))
     counts = np.diff(np.append(change_idx, v.size))
-    vals = v[change_idx]
+    return v[change_idx], counts
 
-    out = []
-    for val, n in zip(vals, counts):
-        val_str = str(int(val)) if float(val).is_integer() else str(val)
-        out.append(f"{n}*{val_str} " if n > 1 else f"{val_str} ")
-    return out
+
+def format_runs(vals: NDArray, counts: NDArray) -> list[str]:
+    """Write the runs as 'n*x ' (or 'x ' for single values)"""
+    # Format each distinct value only once
+    uniques, inverse = np.unique(vals, return_inverse=True)
+    val_strs = np.array(
+        [str(int(val)) if float(val).is_integer() else str(val) for val in uniques],
+        dtype=str,
+    )[inverse.ravel()]
+    prefixes = np.where(counts > 1, np.char.add(counts.astype(str), "*"), "")
+    return np.char.add(np.char.add(prefixes, val_strs), " ").tolist()
+
+
+def write_compact(f, chunks: Iterable[NDArray]):
+    """Write consecutive chunks of an array in 'n*x' notation to a file
+
+    The output is the same as for compact_format on the concatenated array, i.e., runs
+    of repeated values continue over the chunk boundaries.
+    """
+    # The last run is only written once it cannot continue in the next chunk
+    last_val, last_count = np.empty(0), np.empty(0, dtype=int)
+    for chunk in chunks:
+        if chunk.size == 0:
+            continue
+        vals, counts = get_runs(chunk)
+        # Same comparison as np.diff in get_runs (e.g., nan never continues a run)
+        if last_count.size and vals[0] - last_val[0] == 0:
+            vals, counts = vals.copy(), counts.copy()
+            vals[0] = last_val[0]
+            counts[0] += last_count[0]
+        elif last_count.size:
+            vals = np.concatenate((last_val, vals))
+            counts = np.concatenate((last_count, counts))
+        f.write("".join(format_runs(vals[:-1], counts[:-1])))
+        last_val, last_count = vals[-1:], counts[-1:]
+    if last_count.size:
+        f.write("".join(format_runs(last_val, last_count)))
 
 
 def handle_core(dic):
     """Handle the core geometry"""
+    active = get_core_active(dic)
+    changes = np.flatnonzero(active[1:] != active[:-1]) + 1
+    starts = np.concatenate(([0], changes))
+    ends = np.concatenate((changes, [len(active)]))
+    dic["coregeometry"] = ["MULTPV\n"]
+    for start, end in zip(starts, ends):
+        count = end - start
+        dic["coregeometry"].append(f"{count}* " if active[start] else f"{count}*0 ")
+    dic["coregeometry"].append("/")
+    dic["dims"][1] = dic["dims"][2]
+    dic["nocells"][1] = dic["nocells"][2]
+
+
+def get_core_active(dic) -> NDArray:
+    """Cells of the core (and its input/output pipes), the others have no pore volume"""
     nocells = dic["nocells"]
     dims = dic["dims"]
     xcenters = (np.arange(nocells[0]) + 0.5) * dims[0] / nocells[0]
@@ -989,89 +1385,34 @@ def handle_core(dic):
     radius2 = zcenters[:, None] ** 2 + zcenters[None, :] ** 2
     small2 = (0.5 * dims[2] / nocells[2]) ** 2
     large2 = (0.5 * dims[2]) ** 2
-    active = np.where(
+    return np.where(
         edge[None, None, :],
         radius2[:, :, None] <= small2,
         radius2[:, :, None] <= large2,
     ).ravel()
-    changes = np.flatnonzero(active[1:] != active[:-1]) + 1
-    starts = np.concatenate(([0], changes))
-    ends = np.concatenate((changes, [len(active)]))
-    dic["coregeometry"] = ["MULTPV\n"]
-    for start, end in zip(starts, ends):
-        count = end - start
-        dic["coregeometry"].append(f"{count}* " if active[start] else f"{count}*0 ")
-    dic["coregeometry"].append("/")
-    dims[1] = dims[2]
-    nocells[1] = nocells[2]
 
 
 def d3_grids(dic, dxarray):
     """Handle the second part of the 3d grids"""
     grid_name = dic["grid"]
-    if grid_name == "cpg3d":
-        grid = []
-        xcorc = dic["xcorc"]
-        grid.append("COORD\n")
-        xx, yy = np.meshgrid(xcorc, xcorc, indexing="xy")
-        grid += compact_format(
-            np.column_stack(
-                (
-                    xx.ravel(),
-                    yy.ravel(),
-                    np.zeros(xx.size),
-                    xx.ravel(),
-                    yy.ravel(),
-                    np.zeros(xx.size),
-                )
-            ).ravel()
+    if grid_name == "cpg3d" and dic["egrid"]:
+        write_egrid(
+            dic,
+            cpg3d_coord(dic),
+            (round_like_e(layer) for layer in cpg3d_zcorn(dic)),
         )
-        grid.append("/\n")
-        grid.append("ZCORN\n")
-        mainfold_code = compile(dic["zxy"], "<string>", "eval")
-
-        def mainfold(x, y):
-            return eval(  # pylint: disable=eval-used
-                mainfold_code,
-                {"__builtins__": {}, "np": np},
-                {"x": x, "y": y},
-            )
-
-        x = np.asarray(dic["xcorc"])
-        nx, ny, nz = dic["nocells"]
-        dims = dic["dims"]
-        x0 = x[:-1]
-        x1 = x[1:]
-        y0 = x[:-1]
-        y1 = x[1:]
-        a0 = mainfold(x0[None, :], y0[:, None])
-        a1 = mainfold(x1[None, :], y0[:, None])
-        b0 = mainfold(x0[None, :], y1[:, None])
-        b1 = mainfold(x1[None, :], y1[:, None])
-        row0 = np.stack((a0, a1), axis=-1)
-        row1 = np.stack((b0, b1), axis=-1)
-        base = np.empty((ny, 2, nx, 2), dtype=row0.dtype)
-        base[:, 0, :, :] = row0
-        base[:, 1, :, :] = row1
-        bottom = base.reshape(-1)
-        if dic["model"] in ["co2eor", "foam"]:
-            zvals = np.asarray(dic["zcords"][1:])
-        else:
-            zvals = np.arange(1, nz) * dims[2] / nz
-        interior = base[None, None, :, :, :, :] + zvals[:, None, None, None, None, None]
-        interior = np.broadcast_to(interior, (nz - 1, 2, ny, 2, nx, 2)).reshape(-1)
-        top = (base + dims[2]).reshape(-1)
-        grids = np.concatenate([bottom, interior, top])
-
-        grid += compact_format(round_like_e(grids))
-
+    elif grid_name == "cpg3d":
         with open(
             os.path.join(dic["fprep"], "GRID.INC"),
             "w",
             encoding="utf8",
         ) as f:
             f.write(HEADER)
-            f.write("".join(grid))
+            f.write("COORD\n")
+            write_compact(f, cpg3d_coord(dic))
+            f.write("/\n")
+            f.write("ZCORN\n")
+            write_compact(f, (round_like_e(layer) for layer in cpg3d_zcorn(dic)))
             f.write("/\n")
     else:
         if dic["model"] in ["co2eor", "foam"]:
@@ -1103,6 +1444,84 @@ def d3_grids(dic, dxarray):
             f.write("/\n")
 
 
+def write_egrid(dic, coord: Iterable[NDArray], zcorn: Iterable[NDArray]):
+    """Write the corner-point grid as binary GRID.EGRID (read in the deck via GDFILE)
+
+    The chunks of the pillars and corner depths (e.g., one layer at a time) are copied
+    into the single precision keywords, i.e., only the keywords hold the whole grid.
+    """
+    nocells = dic["nocells"]
+    num_cells = nocells[0] * nocells[1] * nocells[2]
+    keywords = {
+        "SPECGRID": ResdataKW("SPECGRID", 4, ResDataType.RD_INT),
+        "ZCORN": ResdataKW("ZCORN", 8 * num_cells, ResDataType.RD_FLOAT),
+        "COORD": ResdataKW(
+            "COORD", 6 * (nocells[0] + 1) * (nocells[1] + 1), ResDataType.RD_FLOAT
+        ),
+        "ACTNUM": ResdataKW("ACTNUM", num_cells, ResDataType.RD_INT),
+    }
+    keywords["SPECGRID"].numpy_view()[:] = [nocells[0], nocells[1], nocells[2], 1]
+    keywords["ACTNUM"].numpy_view()[:] = 1
+    for name, chunks in [("ZCORN", zcorn), ("COORD", coord)]:
+        view = keywords[name].numpy_view()
+        start = 0
+        for chunk in chunks:
+            view[start : start + chunk.size] = chunk
+            start += chunk.size
+    Grid.create(
+        keywords["SPECGRID"], keywords["ZCORN"], keywords["COORD"], keywords["ACTNUM"]
+    ).save_EGRID(os.path.join(dic["fprep"], "GRID.EGRID"))
+
+
+def cpg3d_coord(dic) -> Iterator[NDArray]:
+    """Pillars of the cpg3d grid, one row along the x direction at a time"""
+    xcorc = np.asarray(dic["xcorc"])
+    zeros = np.zeros(xcorc.size)
+    for ycor in xcorc:
+        yy = np.full(xcorc.size, ycor)
+        yield np.column_stack((xcorc, yy, zeros, xcorc, yy, zeros)).ravel()
+
+
+def cpg3d_zcorn(dic) -> Iterator[NDArray]:
+    """Corner depths of the cpg3d grid, one layer of corners at a time"""
+    mainfold_code = compile(dic["zxy"], "<string>", "eval")
+
+    def mainfold(x, y):
+        return eval(  # pylint: disable=eval-used
+            mainfold_code,
+            {"__builtins__": {}, "np": np},
+            {"x": x, "y": y},
+        )
+
+    x = np.asarray(dic["xcorc"])
+    nx, ny, nz = dic["nocells"]
+    dims = dic["dims"]
+    x0 = x[:-1]
+    x1 = x[1:]
+    y0 = x[:-1]
+    y1 = x[1:]
+    a0 = mainfold(x0[None, :], y0[:, None])
+    a1 = mainfold(x1[None, :], y0[:, None])
+    b0 = mainfold(x0[None, :], y1[:, None])
+    b1 = mainfold(x1[None, :], y1[:, None])
+    row0 = np.stack((a0, a1), axis=-1)
+    row1 = np.stack((b0, b1), axis=-1)
+    base = np.empty((ny, 2, nx, 2), dtype=row0.dtype)
+    base[:, 0, :, :] = row0
+    base[:, 1, :, :] = row1
+    if dic["model"] in ["co2eor", "foam"]:
+        zvals = np.asarray(dic["zcords"][1:-1])
+    else:
+        zvals = np.arange(1, nz) * dims[2] / nz
+    yield base.reshape(-1)
+    for zval in zvals:
+        # Bottom and top corners of the cells above and below the interface
+        layer = (base + zval).reshape(-1)
+        yield layer
+        yield layer
+    yield (base + dims[2]).reshape(-1)
+
+
 def create_3dgrid(dic):
     """Handle the first part of the 3d grids"""
     xfac = dic["xfac"]
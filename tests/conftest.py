@@ -3,6 +3,7 @@
 import os
 import pathlib
 import shutil
+import sys
 from typing import Any
 
 import pytest
@@ -31,6 +32,18 @@ def abs_tol(request):
     return request.config.option.abs_tol
 
 
+@pytest.fixture(scope="session", autouse=True)
+def fixture_include_cache(tmp_path_factory: Any) -> pathlib.Path:
+    """Keep the include cache of the tests out of the home folder.
+
+    The environment variable is inherited by pyopmnearwell calls in subprocesses.
+
+    """
+    cache_dir: pathlib.Path = tmp_path_factory.mktemp("include_cache")
+    os.environ["PYOPMNEARWELL_CACHE_DIR"] = str(cache_dir)
+    return cache_dir
+
+
 @pytest.fixture(name="input_dict")
 def fixture_input_dict(tmp_path: pathlib.Path) -> dict[str, Any]:
     """Manually do what ``pyopmnearwell.py`` does.
@@ -52,6 +65,58 @@ def fixture_input_dict(tmp_path: pathlib.Path) -> dict[str, Any]:
     return process_input(base_dict, dirname / "models" / "co2store.toml")
 
 
+@pytest.fixture(scope="session", name="stub_flow")
+def fixture_stub_flow() -> str:
+    """Return the command of a stand-in for the flow executable.
+
+    The stub writes synthetic result files (see ``tests/utils/stub_flow.py``), so tests
+    of the run machinery do not need an OPM Flow installation.
+
+    """
+    return f"{sys.executable} {dirname / 'utils' / 'stub_flow.py'}"
+
+
+@pytest.fixture(name="stub_runspecs")
+def fixture_stub_runspecs() -> dict[str, Any]:
+    """Return the runspecs of a small ensemble of ``tests/test_ensemble.mako`` decks.
+
+    The three members differ in the pressure and are run one at a time. Tests can
+    replace the variables, as they take precedence over the constants.
+
+    """
+    return {
+        "npoints": 3,
+        "npruns": 1,
+        "variables": {"PRESSURE": (50.0, 70.0, 3)},
+        "constants": {
+            "FLOW": "flow",
+            "TEMPERATURE": 25.0,
+            "PERMX": 800.0,
+            "PERMZ": 1.3,
+            "INJECTION_RATE": 20,
+        },
+    }
+
+
+@pytest.fixture(name="co2store_dic")
+def fixture_co2store_dic(stub_flow: str, tmp_path: pathlib.Path) -> dict[str, Any]:
+    """Return the global dictionary of ``tests/models/co2store.toml``.
+
+    The runs are written to ``tmp_path`` and use the stub flow.
+
+    """
+    dic: dict[str, Any] = process_input(
+        {
+            "pat": dirname.parent / "src" / "pyopmnearwell",
+            "fol": str(tmp_path),
+            "runname": "test_run",
+        },
+        dirname / "models" / "co2store.toml",
+    )
+    dic["flow"] = stub_flow
+    return dic
+
+
 @pytest.fixture(scope="session", name="run_path")
 def fixture_create_path(tmp_path_factory: Any) -> pathlib.Path:
     """Create a temporary path for the run.
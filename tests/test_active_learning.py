@@ -0,0 +1,111 @@
+# pylint: disable=missing-function-docstring
+"""Tests for the ``pyopmnearwell.ml.active_learning`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+
+from pyopmnearwell.ml.active_learning import (
+    BootstrapSurrogate,
+    active_learning,
+    parameters_to_features,
+    select_candidates,
+)
+
+TEST_ENSEMBLE_MAKO: pathlib.Path = pathlib.Path(__file__).parent / "test_ensemble.mako"
+
+
+def test_bootstrap_surrogate():
+    features: np.ndarray = np.linspace(0, 1, 20)[..., None]
+    targets: np.ndarray = 3 * features[..., 0] + 1
+    surrogate = BootstrapSurrogate(LinearRegression(), num_models=10, seed=0)
+    surrogate.fit(features, targets)
+    mean, variance = surrogate.predict(np.array([[0.5], [2.0]]))
+    assert np.allclose(mean, [2.5, 7.0])
+    assert np.allclose(variance, 0.0)
+    assert surrogate.oob_error() < 1e-10
+
+
+def test_select_candidates():
+    rng: np.random.Generator = np.random.default_rng(0)
+    features: np.ndarray = rng.random((30, 1))
+    targets: np.ndarray = np.sin(6 * features[..., 0]) + 0.1 * rng.random(30)
+    surrogate = BootstrapSurrogate(KNeighborsRegressor(3), num_models=16, seed=0)
+    surrogate.fit(features, targets)
+    candidates: np.ndarray = np.array([[0.5], [-3.0], [0.2], [4.0]])
+    selected: np.ndarray = select_candidates(surrogate, candidates, 2)
+    assert len(selected) == 2
+    _, variance = surrogate.predict(candidates)
+    assert variance[selected[0]] >= variance[selected[1]]
+    assert variance[selected].min() >= np.delete(variance, selected).max()
+
+
+def test_parameters_to_features():
+    members: list[dict[str, Any]] = [
+        {"PERMX": 10.0, "PRESSURE": 50.0, "FLOW": "flow"},
+        {"PERMX": 100.0, "PRESSURE": 60.0, "FLOW": "flow"},
+    ]
+    features: np.ndarray = parameters_to_features(members, ["PERMX", "PRESSURE"])
+    assert np.allclose(features, [[np.log(10.0), 50.0], [np.log(100.0), 60.0]])
+
+
+def test_active_learning(stub_flow: str, tmp_path: pathlib.Path):
+    runspecs: dict[str, Any] = {
+        "npoints": 1,
+        "npruns": 2,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 1),
+            "TEMPERATURE": (20.0, 30.0, 1),
+        },
+        "constants": {"FLOW": "flow", "PERMX": 800, "PERMZ": 1.3, "INJECTION_RATE": 20},
+    }
+    result: dict[str, Any] = active_learning(
+        stub_flow,
+        tmp_path,
+        runspecs,
+        TEST_ENSEMBLE_MAKO,
+        ["PRESSURE"],
+        [],
+        ["WBHP:INJ0"],
+        target=lambda member_data: member_data["PRESSURE"][-1].mean(),
+        num_initial=4,
+        num_per_round=2,
+        num_rounds=2,
+        num_candidates=16,
+        surrogate=BootstrapSurrogate(LinearRegression(), num_models=4, seed=0),
+        seed=0,
+    )
+    assert [num_simulations for num_simulations, _ in result["history"]] == [4, 6, 8]
+    assert result["features"].shape == (8, 2)
+    assert result["targets"].shape == (8,)
+    assert (tmp_path / "active_learning.csv").exists()
+
+
+def test_active_learning_no_finished_members(
+    stub_flow: str, stub_runspecs: dict[str, Any], tmp_path: pathlib.Path
+):
+    result: dict[str, Any] = active_learning(
+        stub_flow,
+        tmp_path,
+        stub_runspecs,
+        TEST_ENSEMBLE_MAKO,
+        ["PRESSURE"],
+        [],
+        [],
+        target=lambda member_data: member_data["PRESSURE"][-1].mean(),
+        num_initial=2,
+        num_rounds=1,
+        seed=0,
+        # The runs end at report step 100, i.e., all members are disregarded.
+        num_report_steps=1000,
+    )
+    # Without finished members, the surrogate is not fitted and the next round runs a
+    # new initial design.
+    assert not result["history"]
+    assert result["features"].shape == (0, 1)
+    assert (tmp_path / "round_1" / "runfiles_0").exists()
@@ -0,0 +1,104 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``ml.autotune`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import pytest
+
+from pyopmnearwell.ml.autotune import (
+    grid_flag_sets,
+    merge_flags,
+    random_flag_sets,
+    representative_members,
+    tune_flags,
+)
+from pyopmnearwell.ml.ensemble import create_ensemble, setup_ensemble
+
+TEST_ENSEMBLE_MAKO: pathlib.Path = pathlib.Path(__file__).parent / "test_ensemble.mako"
+
+
+def test_merge_flags() -> None:
+    assert (
+        merge_flags("--linear-solver=cprw --enable-tuning", {"linear-solver": "ilu0"})
+        == "--linear-solver=ilu0 --enable-tuning"
+    )
+    assert merge_flags("", {"tolerance-mb": "1e-6"}) == "--tolerance-mb=1e-6"
+
+
+def test_flag_sets() -> None:
+    options: dict[str, list[str]] = {"a": ["1", "2"], "b": ["x", "y", "z"]}
+    sets: list[str] = grid_flag_sets(options, base="--a=0 --c=1")
+    assert len(sets) == 6
+    assert sets[0] == "--a=1 --c=1 --b=x"
+    assert set(random_flag_sets(options, 4, base="", seed=0)) <= set(
+        grid_flag_sets(options, base="")
+    )
+    assert len(set(random_flag_sets(options, 10, base="", seed=0))) == 6
+    assert representative_members(10, 4) == [0, 3, 6, 9]
+    assert representative_members(2, 4) == [0, 1]
+
+
+def test_tune_flags(
+    stub_flow: str,
+    stub_runspecs: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    setup_ensemble(tmp_path, create_ensemble(stub_runspecs, seed=0), TEST_ENSEMBLE_MAKO)
+    sets: list[str] = grid_flag_sets(
+        {"linear-solver": ["ilu0", "cprw", "cpr"]}, base="--tolerance-mb=1e-7"
+    )
+    # ilu0 fails and cprw is slower than cpr.
+    monkeypatch.setenv("STUB_FLOW_FAIL", "--linear-solver=ilu0")
+    monkeypatch.setenv("STUB_FLOW_SLOW", "--linear-solver=cprw")
+    result: dict[str, Any] = tune_flags(
+        stub_flow, tmp_path, sets, representative_members(3, 2)
+    )
+    assert result["best"] == "--tolerance-mb=1e-7 --linear-solver=cpr"
+    assert [row["failure_rate"] for row in result["table"]] == [1.0, 0.0, 0.0]
+    assert result["table"][1]["mean_walltime"] > result["table"][2]["mean_walltime"]
+    assert "--linear-solver=cpr\n" in (tmp_path / "autotune.txt").read_text(
+        encoding="utf-8"
+    )
+    assert not (tmp_path / "autotune").exists()
+
+    monkeypatch.setenv("STUB_FLOW_FAIL", "RUN_2")
+    result = tune_flags(stub_flow, tmp_path, sets[1:], [0, 2], max_failure_rate=0.2)
+    assert result["best"] is None
+    with pytest.raises(ValueError):
+        tune_flags(stub_flow, tmp_path, [], [0])
+
+
+def test_tune_flags_shared_initialization(
+    stub_flow: str,
+    stub_runspecs: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # The members only differ in the schedule.
+    stub_runspecs["variables"] = {"INJECTION_RATE": (10.0, 30.0, 3)}
+    stub_runspecs["constants"]["PRESSURE"] = 60.0
+    setup_ensemble(
+        tmp_path,
+        create_ensemble(stub_runspecs, seed=0),
+        TEST_ENSEMBLE_MAKO,
+        share_initialization=True,
+    )
+    log: pathlib.Path = tmp_path / "flow.log"
+    monkeypatch.setenv("STUB_FLOW_LOG", str(log))
+    sets: list[str] = grid_flag_sets({"linear-solver": ["ilu0", "cprw"]}, base="")
+    # The members are not run if their initialization fails.
+    monkeypatch.setenv("STUB_FLOW_FAIL", "--linear-solver=ilu0")
+    result: dict[str, Any] = tune_flags(stub_flow, tmp_path, sets, [0, 2])
+    assert result["best"] == "--linear-solver=cprw"
+    assert [row["failures"] for row in result["table"]] == [2, 0]
+    assert log.read_text(encoding="utf8").split() == [
+        "INIT_0",
+        "INIT_0",
+        "RUN_0",
+        "RUN_2",
+    ]
+    assert not (tmp_path / "initialization_0" / "output").exists()
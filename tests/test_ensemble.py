@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import itertools
+import json
 import pathlib
 from contextlib import nullcontext as does_not_raise
 from typing import Any, Optional
@@ -12,15 +13,22 @@ from unittest.mock import mock_open, patch
 import numpy as np
 import pytest
 
+from pyopmnearwell.ml import campaign
+from pyopmnearwell.ml.campaign import CampaignState
 from pyopmnearwell.ml.ensemble import (
+    INITIALIZATIONS,
+    LazyEnsemble,
+    Sampler,
     calculate_WI,
     create_ensemble,
+    extract_features,
     get_flags,
     integrate_fine_scale_value,
     memory_efficient_sample,
     run_ensemble,
     setup_ensemble,
 )
+from pyopmnearwell.ml.store import EnsembleStore
 
 TEST_ENSEMBLE_MAKO: pathlib.Path = pathlib.Path(__file__).parent / "test_ensemble.mako"
 
@@ -122,7 +130,7 @@ class TestEnsemble:
     @pytest.fixture(scope="class", name="fixture_create_ensemble")
     def fixture_create_ensemble(
         self, request, runspecs: dict[str, Any]
-    ) -> Optional[list[dict[str, Any]]]:
+    ) -> Optional[LazyEnsemble]:
         """Create and return ensemble.
 
         Args:
@@ -150,7 +158,7 @@ class TestEnsemble:
     def fixture_setup_ensemble(
         self,
         request,
-        fixture_create_ensemble: Optional[list[dict[str, Any]]],
+        fixture_create_ensemble: Optional[LazyEnsemble],
         tmp_path_factory,
     ) -> Optional[pathlib.Path]:
         """Setup ensemble and return the folder path.
@@ -188,7 +196,7 @@ class TestEnsemble:
     def test_create_ensemble(
         self,
         runspecs: dict[str, Any],
-        fixture_create_ensemble: Optional[list[dict[str, Any]]],
+        fixture_create_ensemble: Optional[LazyEnsemble],
         fixture_setup_ensemble: Optional[pathlib.Path],
     ) -> None:
         if fixture_create_ensemble is not None:
@@ -318,6 +326,137 @@ class TestEnsemble:
 # pylint: enable=unused-argument, invalid-name
 
 
+def test_create_ensemble_lazy():
+    # 20^8 members are never materialized.
+    runspecs: dict[str, Any] = {
+        "npoints": 50,
+        "variables": {f"PERMZ{i}": (1.0, 1000.0, 20) for i in range(8)},
+        "constants": {"FLOW": "flow"},
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    assert isinstance(ensemble, LazyEnsemble)
+    assert len(ensemble) == 50
+    assert len(np.unique(ensemble.indices)) == 50
+    members: list[dict[str, Any]] = list(ensemble)
+    assert all(1.0 <= member["PERMZ3"] <= 1000.0 for member in members)
+    assert members[-1] == ensemble[-1]
+    # Members are created on access and do not share the constants.
+    ensemble[0]["FLOW"] = "other"  # pylint: disable=unsupported-assignment-operation
+    assert ensemble[0]["FLOW"] == "flow"
+    assert len(ensemble[10:20]) == 10
+    assert ensemble[10:20][0] == ensemble[10]
+
+
+def test_lazy_ensemble_decode():
+    variables: dict[str, np.ndarray] = {
+        "A": np.arange(3.0),
+        "B": np.arange(4.0) * 10,
+        "C": np.arange(2.0) * 100,
+    }
+    meshed: list[np.ndarray] = [
+        array.flatten() for array in np.meshgrid(*variables.values(), indexing="ij")
+    ]
+    ensemble = LazyEnsemble(
+        {"D": 1}, variables, np.arange(24), {"E": np.arange(24) * 1000}
+    )
+    for i, member in enumerate(ensemble):
+        assert member == {
+            "D": 1,
+            "A": meshed[0][i],
+            "B": meshed[1][i],
+            "C": meshed[2][i],
+            "E": 1000 * i,
+        }
+    with pytest.raises(IndexError):
+        ensemble[24]  # pylint: disable=pointless-statement
+
+
+def test_create_ensemble_efficient_sampling():
+    runspecs: dict[str, Any] = {
+        "npoints": 12,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 3),
+            "PERMZ0": (1.0, 10.0, 4),
+            "PERMZ1": (1.0, 10.0, 4),
+        },
+        "constants": {},
+    }
+    ensemble = create_ensemble(runspecs, efficient_sampling=["PERMZ0", "PERMZ1"])
+    # All meshed values appear, even though the mesh is smaller than the ensemble.
+    assert len(ensemble) == 12
+    assert len({member["PRESSURE"] for member in ensemble}) == 3
+
+
+@pytest.mark.parametrize("sampler", ["lhs", "sobol", "halton"])
+def test_create_ensemble_sampler(sampler: Sampler):
+    runspecs: dict[str, Any] = {
+        "npoints": 32,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 1),
+            "PERMX": (1.0, 1000.0, 1),
+            "INTLAYERS": (1, 5, 1),
+        },
+        "constants": {"FLOW": "flow"},
+    }
+    ensemble = create_ensemble(runspecs, seed=0, sampler=sampler)
+    assert len(ensemble) == 32
+    pressures = np.array([member["PRESSURE"] for member in ensemble])
+    perms = np.array([member["PERMX"] for member in ensemble])
+    layers = np.array([member["INTLAYERS"] for member in ensemble])
+    assert np.all((pressures >= 50.0) & (pressures <= 70.0))
+    assert np.all((perms >= 1.0) & (perms <= 1000.0))
+    assert set(layers) == {1, 2, 3, 4}
+    # Space-filling: each of 4 equally sized bins (in log space for ``PERM``) is hit.
+    assert np.all(np.bincount(((pressures - 50.0) // 5.0).astype(int)) > 0)
+    assert np.all(np.bincount((np.log10(perms) // 0.75).astype(int)) > 0)
+
+
+def test_create_ensemble_unknown_sampler():
+    runspecs: dict[str, Any] = {
+        "npoints": 4,
+        "variables": {"PRESSURE": (50.0, 70.0, 1)},
+        "constants": {},
+    }
+    with pytest.raises(ValueError):
+        create_ensemble(runspecs, sampler="grid")  # type: ignore
+
+
+def test_setup_ensemble_parallel(tmp_path: pathlib.Path):
+    runspecs: dict[str, Any] = {
+        "npoints": 7,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 7),
+            "TEMPERATURE": (20.0, 30.0, 1),
+            "PERMX": (700.0, 950.0, 1),
+        },
+        "constants": {"FLOW": "flow", "PERMZ": 1.3, "INJECTION_RATE": 20},
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    decks: list[list[str]] = []
+    for num_workers in [1, 3]:
+        ensemble_path: pathlib.Path = tmp_path / f"workers_{num_workers}"
+        ensemble_path.mkdir()
+        setup_ensemble(
+            ensemble_path,
+            ensemble,
+            TEST_ENSEMBLE_MAKO,
+            recalc_tables=True,
+            num_setup_workers=num_workers,
+            chunk_size=2,
+        )
+        decks.append(
+            [
+                (
+                    ensemble_path / f"runfiles_{i}" / "preprocessing" / f"RUN_{i}.DATA"
+                ).read_text(encoding="utf8")
+                for i in range(runspecs["npoints"])
+            ]
+        )
+        # The rendered input files are not written to disk.
+        assert not list(ensemble_path.glob("runfiles_*/input.toml"))
+    assert decks[0] == decks[1]
+
+
 @pytest.mark.parametrize("num_members", [1, 5, 10])
 def test_memory_efficient_sample(num_members: int):
     # Create sample input data.
@@ -412,3 +551,244 @@ def test_get_flags(flags: str, expected_value: str, tmp_path):
         f.write(flags)
     flags = get_flags(makofile)
     assert flags == expected_value
+
+
+@pytest.mark.parametrize("npruns", [1, 3])
+def test_run_ensemble_stub_flow(npruns: int, stub_flow: str, tmp_path: pathlib.Path):
+    runspecs: dict[str, Any] = {
+        "npoints": 5,
+        "npruns": npruns,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 5),
+            "TEMPERATURE": (20.0, 30.0, 1),
+            "PERMX": (700.0, 950.0, 1),
+        },
+        "constants": {"FLOW": "flow", "PERMZ": 1.3, "INJECTION_RATE": 20},
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    setup_ensemble(tmp_path, ensemble, TEST_ENSEMBLE_MAKO)
+    data = run_ensemble(
+        stub_flow,
+        tmp_path,
+        runspecs,
+        ["PRESSURE"],
+        ["PERMX"],
+        ["WBHP:INJ0"],
+        num_report_steps=100,
+    )
+    # The deck has 100 report steps and 10 cells.
+    assert len(data["PRESSURE"]) == runspecs["npoints"]
+    assert all(array.shape == (100, 10) for array in data["PRESSURE"])
+    assert all(array.shape == (1, 10) for array in data["PERMX"])
+    assert all(array.shape == (100, 1) for array in data["WBHP:INJ0"])
+    # Only the results of the first member are kept.
+    assert (tmp_path / "results_0").exists()
+    assert not (tmp_path / "results_1").exists()
+
+
+def test_run_ensemble_store(stub_flow: str, tmp_path: pathlib.Path):
+    runspecs: dict[str, Any] = {
+        "npoints": 3,
+        "npruns": 2,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 3),
+            "TEMPERATURE": (20.0, 30.0, 1),
+            "PERMX": (700.0, 950.0, 1),
+        },
+        "constants": {"FLOW": "flow", "PERMZ": 1.3, "INJECTION_RATE": 20},
+    }
+    setup_ensemble(tmp_path, create_ensemble(runspecs, seed=0), TEST_ENSEMBLE_MAKO)
+    store = run_ensemble(
+        stub_flow,
+        tmp_path,
+        runspecs,
+        ["PRESSURE"],
+        [],
+        ["WBHP:INJ0"],
+        store_path=tmp_path / "store",
+    )
+    assert isinstance(store, EnsembleStore)
+    assert store["PRESSURE"].shape == (3, 100, 10)
+    assert np.all(store.valid)
+    assert extract_features(store, ["PRESSURE", "WBHP:INJ0"]).shape == (3, 100, 10, 2)
+
+
+def test_run_ensemble_resume(
+    stub_flow: str, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    runspecs: dict[str, Any] = {
+        "npoints": 4,
+        "npruns": 2,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 4),
+            "TEMPERATURE": (20.0, 30.0, 1),
+            "PERMX": (700.0, 950.0, 1),
+        },
+        "constants": {"FLOW": "flow", "PERMZ": 1.3, "INJECTION_RATE": 20},
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    state_file: pathlib.Path = tmp_path / "campaign.db"
+    log: pathlib.Path = tmp_path / "flow.log"
+    monkeypatch.setenv("STUB_FLOW_LOG", str(log))
+
+    # The first attempt fails for one member, which does not stop the campaign.
+    monkeypatch.setenv("STUB_FLOW_FAIL", "RUN_1")
+    setup_ensemble(tmp_path, ensemble, TEST_ENSEMBLE_MAKO, state_file=state_file)
+    data = run_ensemble(
+        stub_flow, tmp_path, runspecs, ["PRESSURE"], [], [], state_file=state_file
+    )
+    assert len(data["PRESSURE"]) == 3
+    assert CampaignState(state_file).statuses() == {
+        0: campaign.DONE,
+        1: campaign.FAILED,
+        2: campaign.DONE,
+        3: campaign.DONE,
+    }
+
+    # Resuming reruns only the failed member.
+    monkeypatch.delenv("STUB_FLOW_FAIL")
+    log.unlink()
+    setup_ensemble(tmp_path, ensemble, TEST_ENSEMBLE_MAKO, state_file=state_file)
+    data = run_ensemble(
+        stub_flow, tmp_path, runspecs, ["PRESSURE"], [], [], state_file=state_file
+    )
+    assert log.read_text(encoding="utf8").split() == ["RUN_1"]
+    assert len(data["PRESSURE"]) == 4
+    assert all(array.shape == (100, 10) for array in data["PRESSURE"])
+    assert all(CampaignState(state_file).is_finished(j) for j in range(4))
+
+
+# pylint: disable-next=too-many-locals
+def test_share_initialization(
+    stub_flow: str,
+    stub_runspecs: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    runspecs: dict[str, Any] = stub_runspecs | {
+        "npoints": 6,
+        "npruns": 2,
+        "variables": {
+            "PRESSURE": (50.0, 70.0, 2),
+            "INJECTION_RATE": (10.0, 30.0, 3),
+        },
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    log: pathlib.Path = tmp_path / "flow.log"
+    monkeypatch.setenv("STUB_FLOW_LOG", str(log))
+    setup_ensemble(
+        tmp_path,
+        ensemble,
+        TEST_ENSEMBLE_MAKO,
+        recalc_grid="auto",
+        recalc_tables="auto",
+        recalc_sections="auto",
+        share_initialization=True,
+    )
+    initializations: list[dict[str, Any]] = json.loads(
+        (tmp_path / INITIALIZATIONS).read_text(encoding="utf8")
+    )
+    # The members differ in the pressure (EQUIL) and the schedule.
+    assert len(initializations) == 2
+    for init in initializations:
+        assert len({ensemble[i]["PRESSURE"] for i in init["members"]}) == 1
+        assert len(init["members"]) == 3
+    deck: str = (tmp_path / "runfiles_1" / "preprocessing" / "RUN_1.DATA").read_text(
+        encoding="utf8"
+    )
+    assert "RESTART\n" in deck and "EQUIL" not in deck
+    assert "UNIFIN" in deck
+    init_deck: str = (
+        tmp_path / "initialization_0" / "preprocessing" / "INIT_0.DATA"
+    ).read_text(encoding="utf8")
+    assert "EQUIL" in init_deck and "TSTEP" not in init_deck
+
+    data = run_ensemble(
+        stub_flow,
+        tmp_path,
+        runspecs,
+        ["PRESSURE"],
+        [],
+        ["WBHP:INJ0"],
+        num_report_steps=100,
+    )
+    assert sorted(log.read_text(encoding="utf8").split()[:2]) == ["INIT_0", "INIT_1"]
+    assert len(data["PRESSURE"]) == 6
+    assert all(array.shape == (100, 10) for array in data["PRESSURE"])
+    assert not (tmp_path / "initialization_0" / "output").exists()
+
+    # The restarted members are aligned with members that run from scratch.
+    (tmp_path / "scratch").mkdir()
+    setup_ensemble(tmp_path / "scratch", ensemble, TEST_ENSEMBLE_MAKO)
+    scratch = run_ensemble(
+        stub_flow,
+        tmp_path / "scratch",
+        runspecs,
+        ["PRESSURE"],
+        [],
+        ["WBHP:INJ0"],
+        num_report_steps=100,
+    )
+    for key in ["PRESSURE", "WBHP:INJ0"]:
+        np.testing.assert_allclose(np.array(data[key]), np.array(scratch[key]))
+
+    # The members of a failed initialization are not run.
+    state_file: pathlib.Path = tmp_path / "campaign.db"
+    log.unlink()
+    monkeypatch.setenv("STUB_FLOW_FAIL", "INIT_1")
+    setup_ensemble(
+        tmp_path,
+        ensemble,
+        TEST_ENSEMBLE_MAKO,
+        share_initialization=True,
+        state_file=state_file,
+    )
+    data = run_ensemble(
+        stub_flow, tmp_path, runspecs, ["PRESSURE"], [], [], state_file=state_file
+    )
+    assert len(data["PRESSURE"]) == 3
+    statuses: dict[int, str] = CampaignState(state_file).statuses()
+    for j in initializations[1]["members"]:
+        assert statuses[j] == campaign.FAILED
+        assert f"RUN_{j}" not in log.read_text(encoding="utf8").split()
+
+
+def test_setup_ensemble_output(
+    stub_flow: str, stub_runspecs: dict[str, Any], tmp_path: pathlib.Path
+):
+    runspecs: dict[str, Any] = stub_runspecs | {
+        "npoints": 2,
+        "variables": {"PRESSURE": (50.0, 70.0, 2)},
+    }
+    ensemble = create_ensemble(runspecs, seed=0)
+    setup_ensemble(
+        tmp_path,
+        ensemble,
+        TEST_ENSEMBLE_MAKO,
+        ecl_keywords=["PRESSURE", "GAS_DEN"],
+        summary_keywords=["WBHP:INJ0"],
+        step_size_time=5,
+    )
+    deck: str = (tmp_path / "runfiles_1" / "preprocessing" / "RUN_1.DATA").read_text(
+        encoding="utf8"
+    )
+    assert "RPTRST\nBASIC=3 FREQ=5 DEN /" in deck
+    summary: list[str] = deck.split("SUMMARY")[1].split("SCHEDULE")[0].split()
+    assert [item for item in summary if not item.startswith("--")] == [
+        "WBHP",
+        "'INJ0'",
+        "/",
+    ]
+
+    data = run_ensemble(
+        stub_flow,
+        tmp_path,
+        runspecs,
+        ["PRESSURE"],
+        [],
+        ["WBHP:INJ0"],
+        num_report_steps=100,
+        step_size_time=5,
+    )
+    assert all(array.shape == (20, 10) for array in data["PRESSURE"])
+    assert all(array.shape == (20, 1) for array in data["WBHP:INJ0"])
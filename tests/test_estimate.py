@@ -0,0 +1,82 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.estimate`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import pytest
+
+from pyopmnearwell.core.pyopmnearwell import main
+from pyopmnearwell.utils.estimate import estimate_run, keyword_size
+from pyopmnearwell.utils.inputvalues import process_input
+from pyopmnearwell.utils.writefile import reservoir_files
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        "geometries/cake.toml",
+        "geometries/core.toml",
+        "geometries/cpg3d.toml",
+        "geometries/tensor3d.toml",
+        "models/saltprec.toml",
+    ],
+)
+def test_estimate_run(config: str, tmp_path: pathlib.Path) -> None:
+    """The estimated include files are the written ones, with similar sizes."""
+    dic: dict[str, Any] = process_input(
+        {
+            "pat": pathlib.Path(__file__).parents[1] / "src" / "pyopmnearwell",
+            "fol": tmp_path,
+            "runname": "test_run",
+        },
+        pathlib.Path(__file__).parent / config,
+    )
+    estimate: dict[str, Any] = estimate_run(dic)
+    assert not (tmp_path / "preprocessing").exists()
+    (tmp_path / "preprocessing").mkdir()
+    reservoir_files(dic)
+    assert (
+        estimate["cells"] == dic["nocells"][0] * dic["nocells"][1] * dic["nocells"][2]
+    )
+    assert 0 < estimate["active"] <= estimate["cells"]
+    written: dict[str, int] = {
+        path.name: path.stat().st_size
+        for path in (tmp_path / "preprocessing").iterdir()
+        if path.suffix == ".INC"
+    }
+    assert set(estimate["files"]) == set(written)
+    for name, size in written.items():
+        assert estimate["files"][name] == pytest.approx(size, rel=0.05)
+    assert estimate["unrst"] == (estimate["report_steps"] + 1) * estimate["unrst_step"]
+    assert estimate["unrst_step"] == len(estimate["restart_arrays"]) * keyword_size(
+        estimate["active"]
+    )
+
+
+def test_estimate_mode(
+    tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """The estimate mode prints the estimate without writing the output folder."""
+    main(
+        [
+            "-i",
+            str(pathlib.Path(__file__).parent / "models" / "co2store.toml"),
+            "-o",
+            str(tmp_path / "output"),
+            "-m",
+            "estimate",
+        ]
+    )
+    assert not (tmp_path / "output").exists()
+    output: str = capsys.readouterr().out
+    assert output.startswith("Cells: 240 (240 active)")
+    assert "TABLES.INC" in output and "UNRST" in output
+
+
+def test_keyword_size() -> None:
+    assert keyword_size(0) == 24
+    assert keyword_size(1000) == 24 + 4000 + 8
+    assert keyword_size(1001, itemsize=8) == 24 + 8008 + 16
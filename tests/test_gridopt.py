@@ -0,0 +1,68 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.gridopt`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import numpy as np
+import pytest
+
+from pyopmnearwell.utils.gridopt import (
+    grid_candidates,
+    optimize_grid,
+    relative_error,
+    summary_quantity,
+)
+
+
+def test_optimize_grid(co2store_dic: dict[str, Any], tmp_path: pathlib.Path) -> None:
+    """The stub flow converges as 10 / nx, i.e., 20 x cells are within 0.5%."""
+    result: dict[str, Any] = optimize_grid(
+        co2store_dic, grid_candidates([80, 5, 40, 20, 10], [3]), "WBHP:INJ0", tol=0.005
+    )
+    assert result["best"] == {"xcn": [20], "xfac": 3}
+    table: list[dict[str, Any]] = result["table"]
+    assert [row["values"]["xcn"][0] for row in table] == [5, 10, 20, 40, 80]
+    assert [row["status"] for row in table] == ["done"] * 5
+    errors: list[float] = [row["error"] for row in table]
+    assert errors == sorted(errors, reverse=True) and errors[-1] == 0
+    assert (tmp_path / "grid_2" / "output" / "TEST_RUN.SMSPEC").exists()
+    text: str = (tmp_path / "grid_convergence.txt").read_text(encoding="utf8")
+    assert len(text.splitlines()) == 6 and "xcn = [20], xfac = 3" in text
+
+
+def test_optimize_grid_failed(
+    co2store_dic: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("STUB_FLOW_FAIL", "TEST_RUN")
+    with pytest.raises(RuntimeError):
+        optimize_grid(co2store_dic, grid_candidates([5, 10], [3]))
+
+
+def test_optimize_grid_incomplete(co2store_dic: dict[str, Any]) -> None:
+    wbhp = summary_quantity("WBHP:INJ0")
+
+    def quantity(dic: dict[str, Any]) -> np.ndarray:
+        if dic["xcn"] == [5]:
+            # As for a run that stops early.
+            return wbhp(dic)[:-1]
+        if dic["xcn"] == [10]:
+            return summary_quantity("WGIR:MISSING")(dic)
+        return wbhp(dic)
+
+    result: dict[str, Any] = optimize_grid(
+        co2store_dic, grid_candidates([5, 10, 20], [3]), quantity, tol=1.0
+    )
+    assert result["best"] == {"xcn": [20], "xfac": 3}
+    table: list[dict[str, Any]] = result["table"]
+    assert [row["status"] for row in table] == ["failed", "failed", "done"]
+    assert np.isnan(table[0]["error"]) and np.isnan(table[1]["error"])
+
+
+def test_relative_error() -> None:
+    reference: np.ndarray = np.array([100.0, 200.0])
+    assert relative_error(np.array([102.0, 198.0]), reference) == pytest.approx(0.01)
+    with pytest.raises(ValueError):
+        relative_error(np.array([1.0]), reference)
@@ -0,0 +1,77 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.includecache`` module."""
+
+from __future__ import annotations
+
+import copy
+import pathlib
+from typing import Any
+
+import numpy as np
+import pytest
+
+from pyopmnearwell.utils.includecache import MUTATIONS, get_key
+from pyopmnearwell.utils.writefile import reservoir_files
+
+FILES: list[str] = [
+    "GRID.INC",
+    "TABLES.INC",
+    "GEOLOGY.INC",
+    "FLUXNUM.INC",
+    "MULTPV.INC",
+]
+
+
+def write_files(dic: dict[str, Any], fol: pathlib.Path) -> dict[str, Any]:
+    """Run ``reservoir_files`` on a copy of the dictionary in a new folder."""
+    dic = copy.deepcopy(dic)
+    dic["fol"] = fol
+    dic["fprep"] = f"{fol}/preprocessing"
+    (fol / "preprocessing").mkdir(parents=True)
+    reservoir_files(dic)
+    return dic
+
+
+def test_cache_hit(
+    input_dict: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYOPMNEARWELL_CACHE_DIR", str(tmp_path / "cache"))
+    miss: dict[str, Any] = write_files(input_dict, tmp_path / "miss")
+    assert len(list((tmp_path / "cache").glob(f"*/{MUTATIONS}"))) == len(FILES)
+    hit: dict[str, Any] = write_files(input_dict, tmp_path / "hit")
+    monkeypatch.setenv("PYOPMNEARWELL_CACHE", "0")
+    uncached: dict[str, Any] = write_files(input_dict, tmp_path / "uncached")
+
+    for name in FILES + ["TEST_RUN.DATA"]:
+        text: str = (tmp_path / "uncached" / "preprocessing" / name).read_text()
+        assert (tmp_path / "miss" / "preprocessing" / name).read_text() == text
+        assert (tmp_path / "hit" / "preprocessing" / name).read_text() == text
+    # The entries that are set while generating the files are restored from the cache.
+    for name in ["slope", "nocells", "whsp", "whnz"]:
+        assert np.all(hit[name] == uncached[name])
+        assert np.all(miss[name] == uncached[name])
+
+
+def test_eviction(
+    input_dict: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYOPMNEARWELL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("PYOPMNEARWELL_CACHE_SIZE", "0")
+    write_files(input_dict, tmp_path / "run")
+    assert not list((tmp_path / "cache").iterdir())
+    for name in FILES:
+        assert (tmp_path / "run" / "preprocessing" / name).exists()
+
+
+def test_get_key(input_dict: dict[str, Any]) -> None:
+    changed: dict[str, Any] = copy.deepcopy(input_dict)
+    changed["krw"] = "krw * sw"
+    assert get_key(changed, "grid") == get_key(input_dict, "grid")
+    assert get_key(changed, "tables") != get_key(input_dict, "tables")
+    # Output paths do not matter.
+    changed["fol"] = pathlib.Path("elsewhere")
+    assert get_key(changed, "geology") == get_key(input_dict, "geology")
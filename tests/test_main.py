@@ -4,6 +4,11 @@
 """Test the main framework."""
 
 import pathlib
+import shutil
+
+from pyopmnearwell.core.pyopmnearwell import main
+
+dirname: pathlib.Path = pathlib.Path(__file__).parent
 
 
 def test_main(run_main: pathlib.Path) -> None:
@@ -13,3 +18,29 @@ def test_main(run_main: pathlib.Path) -> None:
         lines = f.readlines()
     content = "".join(lines)
     assert "TUNING" in content
+
+
+def test_main_batch(tmp_path: pathlib.Path, monkeypatch) -> None:
+    for model in ["co2store", "h2store"]:
+        shutil.copy(dirname / "models" / f"{model}.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    main(["-i", "*.toml", "-o", "batch", "-m", "deck", "-j", "2"])
+    for model in ["co2store", "h2store"]:
+        name = tmp_path / "batch" / model / "preprocessing" / f"{model.upper()}.DATA"
+        assert name.exists()
+    with open(tmp_path / "batch" / "batch_status.txt", "r", encoding="utf8") as f:
+        lines = f.readlines()
+    assert len(lines) == 3
+    assert all("done" in line for line in lines[1:])
+
+
+def test_main_batch_error(tmp_path: pathlib.Path, monkeypatch) -> None:
+    shutil.copy(dirname / "models" / "co2store.toml", tmp_path)
+    (tmp_path / "broken.toml").write_text("model = 'co2store'\n", encoding="utf8")
+    monkeypatch.chdir(tmp_path)
+    main(["-i", "*.toml", "-o", "batch", "-m", "deck", "-j", "2"])
+    with open(tmp_path / "batch" / "batch_status.txt", "r", encoding="utf8") as f:
+        lines = f.readlines()
+    assert lines[0].split()[-1] == "error"
+    assert "failed" in lines[1] and "KeyError" in lines[1]
+    assert "done" in lines[2]
@@ -0,0 +1,34 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.mako`` module."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+
+import pytest
+
+from pyopmnearwell.utils.mako import fill_template, get_template
+
+
+def test_get_template(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Templates are compiled once per modification and to the cache folder."""
+    monkeypatch.setenv("PYOPMNEARWELL_CACHE_DIR", str(tmp_path / "cache"))
+    makofile: pathlib.Path = tmp_path / "deck.mako"
+    makofile.write_text("NX ${dic['nx']}", encoding="utf8")
+    template = get_template(filename=makofile)
+    assert get_template(filename=str(makofile)) is template
+    assert fill_template({"dic": {"nx": 5}}, filename=makofile) == "NX 5"
+    assert list((tmp_path / "cache" / "mako").rglob("deck.mako.py"))
+
+    makofile.write_text("NY ${dic['nx']}", encoding="utf8")
+    mtime: int = os.stat(makofile).st_mtime_ns + 10**9
+    os.utime(makofile, ns=(mtime, mtime))
+    assert get_template(filename=makofile) is not template
+    assert fill_template({"dic": {"nx": 5}}, filename=makofile) == "NY 5"
+
+
+def test_get_template_text() -> None:
+    text: str = "NX ${dic['nx']}"
+    assert get_template(text=text) is get_template(text=text)
+    assert fill_template({"dic": {"nx": 2}}, text=text) == "NX 2"
@@ -0,0 +1,56 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.output`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+from pyopmnearwell.utils.estimate import estimate_run
+from pyopmnearwell.utils.inputvalues import process_input
+from pyopmnearwell.utils.output import restart_mnemonics, summary_entry
+from pyopmnearwell.utils.writefile import reservoir_files
+
+
+def test_restart_mnemonics() -> None:
+    assert not restart_mnemonics(["PRESSURE", "SGAS", "RSW"])
+    assert restart_mnemonics(["GAS_DEN", "WAT_DEN", "FLOGASI+", "KRG"]) == [
+        "DEN",
+        "FLOWS",
+        "KRG",
+    ]
+
+
+def test_summary_entry() -> None:
+    assert summary_entry("FPR") == "FPR"
+    assert summary_entry("WBHP:INJ0") == "WBHP\n'INJ0' /"
+    assert summary_entry("WBHP") == "WBHP\n/"
+    assert summary_entry("RPR:1") == "RPR\n1 /"
+    assert summary_entry("BPR:1,2,3") == "BPR\n1 2 3 /\n/"
+    assert summary_entry("CGIR:INJ0:1,1,1") == "CGIR\n'INJ0' 1 1 1 /\n/"
+
+
+def test_selected_output(tmp_path: pathlib.Path) -> None:
+    """The deck only requests the selected output, as the estimate expects."""
+    (tmp_path / "preprocessing").mkdir()
+    dic: dict[str, Any] = process_input(
+        {
+            "pat": pathlib.Path(__file__).parents[1] / "src" / "pyopmnearwell",
+            "fol": tmp_path,
+            "runname": "test_run",
+        },
+        pathlib.Path(__file__).parent / "models" / "co2store.toml",
+    )
+    default: dict[str, Any] = estimate_run(dic)
+    dic.update({"rptrst": ["PRESSURE", "GAS_DEN"], "summary": ["FPR"], "rptfreq": 2})
+    reservoir_files(dic)
+    deck: str = (tmp_path / "preprocessing" / "TEST_RUN.DATA").read_text(
+        encoding="utf8"
+    )
+    assert "RPTRST\nBASIC=3 FREQ=2 DEN /" in deck
+    summary: list[str] = deck.split("\nSUMMARY")[1].split("\nSCHEDULE")[0].split()
+    assert [item for item in summary if not item.startswith("--")] == ["FPR"]
+    estimate: dict[str, Any] = estimate_run(dic)
+    assert "GAS_DEN" in estimate["restart_arrays"]
+    assert len(estimate["restart_arrays"]) < len(default["restart_arrays"])
+    assert estimate["unrst"] < default["unrst"]
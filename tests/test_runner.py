@@ -0,0 +1,110 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.runner`` module."""
+
+from __future__ import annotations
+
+import pathlib
+import subprocess
+from typing import Any
+
+import pytest
+
+from pyopmnearwell.utils.runner import FlowRunner, estimate_remaining
+
+DECK: str = "RUNSPEC\nDIMENS\n4 1 1 /\nSCHEDULE\nTSTEP\n5*1 /\n"
+
+
+@pytest.fixture(name="deck")
+def fixture_deck(tmp_path: pathlib.Path) -> pathlib.Path:
+    path: pathlib.Path = tmp_path / "RUN.DATA"
+    path.write_text(DECK, encoding="utf8")
+    return path
+
+
+def test_run(stub_flow: str, deck: pathlib.Path, tmp_path: pathlib.Path) -> None:
+    updates: list[dict[str, Any]] = []
+    result: dict[str, Any] = FlowRunner(stub_flow, progress=updates.append).run(
+        deck, tmp_path / "output"
+    )
+    assert result["status"] == "done" and result["returncode"] == 0
+    assert result["steps"] == result["report_steps"] == 5
+    assert result["walltime"] > 0
+    assert (tmp_path / "output" / "RUN.UNRST").exists()
+    log: str = pathlib.Path(result["log"]).read_text(encoding="utf8")
+    assert log.count("Report step") == 5
+    assert [update["steps"] for update in updates] == [0, 1, 2, 3, 4]
+    assert updates[0]["eta"] is None and updates[-1]["eta"] >= 0
+
+
+def test_run_failed(
+    stub_flow: str,
+    deck: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("STUB_FLOW_FAIL", "RUN")
+    runner: FlowRunner = FlowRunner(stub_flow)
+    result: dict[str, Any] = runner.run(deck, tmp_path / "output")
+    assert result["status"] == "failed" and result["returncode"] == 1
+    assert result["steps"] == 0 and result["report_steps"] is None
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.run(deck, tmp_path / "output", check=True)
+
+
+def test_run_timeout(
+    stub_flow: str,
+    deck: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("STUB_FLOW_SLEEP", "10")
+    result: dict[str, Any] = FlowRunner(stub_flow, timeout=2).run(
+        deck, tmp_path / "output"
+    )
+    assert result["status"] == "timeout" and result["returncode"] != 0
+    assert result["walltime"] < 10
+    assert result["steps"] == 0 and result["report_steps"] == 5
+
+
+def test_run_interrupted(
+    stub_flow: str,
+    deck: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    processes: list[subprocess.Popen] = []
+
+    class Popen(subprocess.Popen):
+        """Keep the launched processes"""
+
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            processes.append(self)
+
+    def interrupt(update: dict[str, Any]) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(subprocess, "Popen", Popen)
+    monkeypatch.setenv("STUB_FLOW_SLEEP", "10")
+    with pytest.raises(KeyboardInterrupt):
+        FlowRunner(stub_flow, progress=interrupt).run(deck, tmp_path / "output")
+    assert processes[0].poll() is not None
+
+
+def test_estimate_remaining() -> None:
+    assert estimate_remaining(0, 10, 5.0) is None
+    assert estimate_remaining(2, 10, 5.0) == pytest.approx(20.0)
+    assert estimate_remaining(10, 10, 5.0) == 0
+
+
+def test_run_relative_paths(
+    stub_flow: str,
+    deck: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    result: dict[str, Any] = FlowRunner(stub_flow).run(deck.name, "output")
+    assert result["status"] == "done"
+    assert (tmp_path / "output" / "RUN.UNRST").exists()
+    assert (tmp_path / "output" / "RUN.LOG").exists()
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import pathlib
+import subprocess
 from typing import Any
 
 import pytest
@@ -24,3 +25,20 @@ def test_simulations(input_dict: dict[str, Any], prepare_runfiles: None):
     # Check that the expected files were created.
     output_fol: pathlib.Path = input_dict["fol"] / "output"
     assert (output_fol / "TEST_RUN.EGRID").exists()
+
+
+def test_stub_flow_simulations(
+    input_dict: dict[str, Any],
+    prepare_runfiles: None,
+    stub_flow: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    input_dict["flow"] = stub_flow
+    result: dict[str, Any] = simulations(input_dict)
+    assert result["status"] == "done"
+    assert pathlib.Path(result["log"]).exists()
+
+    monkeypatch.setenv("STUB_FLOW_SLEEP", "10")
+    input_dict["timeout"] = 1
+    with pytest.raises(subprocess.CalledProcessError):
+        simulations(input_dict)
@@ -0,0 +1,87 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.schedules`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import numpy as np
+import pytest
+
+from pyopmnearwell.utils.schedules import (
+    plan_schedules,
+    restart_deck,
+    run_schedules,
+    schedule_summary,
+)
+
+GAS: list = [2, 1, 1, 100000]
+WATER: list = [2, 1, 0, 10000]
+SHUT: list = [1, 1, 1, 0]
+
+
+def test_plan_schedules() -> None:
+    nodes: list[dict[str, Any]] = plan_schedules(
+        [[GAS, WATER, GAS], [GAS, WATER, SHUT], [GAS, WATER], [WATER]]
+    )
+    assert [node["parent"] for node in nodes] == [None, None, 0, 0]
+    assert [node["members"] for node in nodes] == [[2], [3], [0], [1]]
+    assert nodes[0]["inj"] == [GAS, WATER] and nodes[0]["steps"] == 4
+    assert nodes[3]["inj"] == [GAS, WATER, SHUT]
+    assert [node["restart"] for node in nodes] == [0, 0, 4, 4]
+    with pytest.raises(ValueError):
+        plan_schedules([[GAS], []])
+
+
+def test_restart_deck() -> None:
+    deck: str = (
+        "RUNSPEC\nGRID\nSOLUTION\n---\nEQUIL\n0 100 /\n\nRTEMPVD\n0 40\n10 40 /\n"
+        + "RVW\n10*0 /\nSUMMARY\nFPR\nSCHEDULE\nTSTEP\n2*1 /\n"
+    )
+    restart: str = restart_deck(deck, "out/RUN", 4)
+    assert restart == (
+        "RUNSPEC\nUNIFIN\nGRID\nSOLUTION\nRESTART\n'out/RUN' 4 /\n\nRTEMPVD\n0 40\n"
+        + "10 40 /\nSUMMARY\nFPR\nSCHEDULE\nSKIPREST\n\nTSTEP\n2*1 /\n"
+    )
+    # Restarting a restart deck does not add UNIFIN twice.
+    assert restart_deck(restart, "out/RUN", 4).count("UNIFIN") == 1
+
+
+def test_run_schedules(
+    co2store_dic: dict[str, Any],
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The stitched summaries match the ones of the full schedules."""
+    dic: dict[str, Any] = co2store_dic | {"fol": str(tmp_path / "tree")}
+    monkeypatch.setenv("STUB_FLOW_LOG", str(tmp_path / "runs.log"))
+    schedules: list[list[list]] = [[GAS, WATER, GAS], [GAS, WATER, SHUT], [GAS]]
+    nodes: list[dict[str, Any]] = run_schedules(dic, schedules, jobs=2)
+    assert [node["status"] for node in nodes] == ["done"] * 4
+    assert len((tmp_path / "runs.log").read_text(encoding="utf8").splitlines()) == 4
+    deck: str = (
+        tmp_path / "tree" / "node_2" / "preprocessing" / "TEST_RUN.DATA"
+    ).read_text(encoding="utf8")
+    assert f"RESTART\n'{nodes[1]['root']}' 4 /" in deck and "EQUIL" not in deck
+
+    dic["fol"] = str(tmp_path / "full")
+    full: list[dict[str, Any]] = run_schedules(dic, [schedules[1]])
+    for member in [1, 2]:
+        days, values = schedule_summary(nodes, member, "WBHP:INJ0")
+        assert np.allclose(np.diff(days), 1)
+    days, values = schedule_summary(nodes, 1, "WBHP:INJ0")
+    full_days, full_values = schedule_summary(full, 0, "WBHP:INJ0")
+    assert np.allclose(days, full_days) and np.allclose(values, full_values)
+
+
+def test_run_schedules_failed(
+    co2store_dic: dict[str, Any], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("STUB_FLOW_FAIL", "TEST_RUN")
+    nodes: list[dict[str, Any]] = run_schedules(
+        co2store_dic, [[GAS, WATER], [GAS, SHUT]]
+    )
+    assert [node["status"] for node in nodes] == ["failed", "skipped", "skipped"]
+    with pytest.raises(RuntimeError):
+        schedule_summary(nodes, 0, "WBHP:INJ0")
@@ -0,0 +1,81 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.ml.store`` module."""
+
+from __future__ import annotations
+
+import pathlib
+
+import numpy as np
+import pytest
+
+from pyopmnearwell.ml.ensemble import extract_features
+from pyopmnearwell.ml.store import EnsembleStore
+
+rng: np.random.Generator = np.random.default_rng()
+
+
+@pytest.fixture(name="member_data")
+def fixture_member_data() -> list[dict[str, np.ndarray]]:
+    return [
+        {
+            "PRESSURE": rng.random((4, 6)),
+            "PERMX": rng.random((1, 6)),
+            "WBHP:INJ0": rng.random((4, 1)),
+        }
+        for _ in range(7)
+    ]
+
+
+def test_write_and_reopen(
+    member_data: list[dict[str, np.ndarray]], tmp_path: pathlib.Path
+) -> None:
+    store = EnsembleStore(tmp_path / "store", num_members=len(member_data))
+    for j, data in enumerate(member_data):
+        if j == 2:
+            store.invalidate(j)
+        else:
+            store.write_member(j, data)
+
+    reopened = EnsembleStore(tmp_path / "store")
+    assert set(reopened) == {"PRESSURE", "PERMX", "WBHP:INJ0"}
+    assert reopened["PRESSURE"].shape == (7, 4, 6)
+    assert np.array_equal(reopened.valid, [True, True, False] + [True] * 4)
+    assert np.allclose(reopened["PRESSURE"][3], member_data[3]["PRESSURE"])
+
+    indices = np.concatenate(
+        [chunk_indices for chunk_indices, _ in reopened.iter_chunks("PERMX", 3)]
+    )
+    assert np.array_equal(indices, [0, 1, 3, 4, 5, 6])
+
+    with pytest.raises(ValueError):
+        EnsembleStore(tmp_path / "store", num_members=8)
+    with pytest.raises(ValueError):
+        EnsembleStore(tmp_path / "missing")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 64])
+def test_extract_features_from_store(
+    member_data: list[dict[str, np.ndarray]],
+    tmp_path: pathlib.Path,
+    chunk_size: int,
+) -> None:
+    keywords: list[str] = ["PRESSURE", "PERMX", "WBHP:INJ0"]
+    store = EnsembleStore(tmp_path / "store", num_members=len(member_data))
+    for j, data in enumerate(member_data):
+        if j != 4:
+            store.write_member(j, data)
+    in_memory: dict[str, list[np.ndarray]] = {
+        keyword: [data[keyword] for j, data in enumerate(member_data) if j != 4]
+        for keyword in keywords
+    }
+    expected = extract_features(in_memory, keywords, {"PRESSURE": 2.0})
+    features = extract_features(
+        store,
+        keywords,
+        {"PRESSURE": 2.0},
+        chunk_size=chunk_size,
+        savepath=tmp_path / "features.npy",
+    )
+    assert features.shape == (6, 4, 6, 3)
+    assert np.allclose(features, expected)
+    assert np.allclose(np.load(tmp_path / "features.npy"), expected)
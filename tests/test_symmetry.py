@@ -0,0 +1,111 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``pyopmnearwell.utils.symmetry`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import numpy as np
+import pytest
+from resdata.grid import Grid
+
+from pyopmnearwell.utils.inputvalues import process_input
+from pyopmnearwell.utils.symmetry import unfold_cells, unfold_summary
+from pyopmnearwell.utils.writefile import reservoir_files
+
+
+def write_deck(grid: str, fol: pathlib.Path, **values: Any) -> dict[str, Any]:
+    """Write the deck of a geometry test configuration with changed values."""
+    (fol / "preprocessing").mkdir(parents=True)
+    dic: dict[str, Any] = process_input(
+        {
+            "pat": pathlib.Path(__file__).parents[1] / "src" / "pyopmnearwell",
+            "fol": fol,
+            "runname": "test_run",
+        },
+        pathlib.Path(__file__).parent / "geometries" / f"{grid}.toml",
+    )
+    dic.update(values)
+    reservoir_files(dic)
+    return dic
+
+
+def read_values(path: pathlib.Path) -> np.ndarray:
+    """Values of the (only) keyword in an include file, with the repeats expanded."""
+    values: list[float] = []
+    lines: list[str] = path.read_text(encoding="utf8").splitlines()
+    items: str = " ".join(line for line in lines if not line.startswith("--"))
+    for item in items.split()[1 : items.split().index("/")]:
+        count, _, value = item.rpartition("*")
+        values += [float(value)] * int(count or 1)
+    return np.array(values)
+
+
+def cell_areas(dic: dict[str, Any]) -> np.ndarray:
+    """Areas of the cells in the first layer, in (j, i) order."""
+    nx, ny, _ = dic["nocells"]
+    fprep: pathlib.Path = pathlib.Path(dic["fprep"])
+    if dic["grid"] == "cpg3d":
+        grid = Grid.load_from_file(str(fprep / "GRID.EGRID"))
+        volumes = grid.export_volume(grid.export_index())[: nx * ny]
+        return np.reshape(volumes, (ny, nx))
+    dx = read_values(fprep / "DX.INC")[: nx * ny]
+    dy = read_values(fprep / "DY.INC")[: nx * ny]
+    return np.reshape(dx * dy, (ny, nx))
+
+
+@pytest.mark.parametrize("grid", ["cartesian", "tensor3d", "coord3d", "cpg3d"])
+def test_quarter_grid(grid: str, tmp_path: pathlib.Path) -> None:
+    """The quadrant unfolds to the full grid."""
+    full = write_deck(grid, tmp_path / "full", egrid=1)
+    quarter = write_deck(grid, tmp_path / "quarter", egrid=1, symmetry=1)
+    assert full["nocells"][0] == 2 * quarter["nocells"][0] - 1
+    assert np.allclose(
+        unfold_cells(cell_areas(quarter), extensive=True), cell_areas(full)
+    )
+    deck: str = (tmp_path / "quarter" / "preprocessing" / "TEST_RUN.DATA").read_text(
+        encoding="utf8"
+    )
+    assert "INJ0 G1 1 1 1* GAS" in deck
+    assert f"WPIMULT\n'*' {quarter['wpimult']} /" in deck
+    assert 0 < quarter["wpimult"] < 0.25
+    assert f"RATE {quarter['inj'][0][3] / 4 / 1.86843:E}" in deck
+    multpv: str = (tmp_path / "quarter" / "preprocessing" / "MULTPV.INC").read_text(
+        encoding="utf8"
+    )
+    assert multpv.count("ENDBOX") == 2
+
+
+def test_check_symmetry(tmp_path: pathlib.Path) -> None:
+    with pytest.raises(ValueError):
+        write_deck("cake", tmp_path / "cake", symmetry=1)
+    with pytest.raises(ValueError):
+        write_deck("cartesian", tmp_path / "pvmult", symmetry=1, pvmult=0)
+
+
+def test_unfold_cells() -> None:
+    quarter: np.ndarray = np.arange(6.0).reshape(2, 3)
+    assert unfold_cells(quarter).tolist() == [
+        [5, 4, 3, 4, 5],
+        [2, 1, 0, 1, 2],
+        [5, 4, 3, 4, 5],
+    ]
+    assert unfold_cells(quarter, extensive=True).sum() == 4 * quarter.sum()
+
+
+def test_unfold_summary() -> None:
+    values: np.ndarray = np.array([1.0, 2.0])
+    for keyword in [
+        "FGIR",
+        "FGIT",
+        "FGIP",
+        "FGMIT",
+        "FRPV",
+        "WGIR:INJ0",
+        "RGIP:1",
+        "WPI:INJ0",
+    ]:
+        assert unfold_summary(keyword, values).tolist() == [4.0, 8.0]
+    for keyword in ["FPR", "WBHP:INJ0", "RPR:1", "TIME", "WWCT:INJ0", "WSTAT:INJ0"]:
+        assert unfold_summary(keyword, values).tolist() == [1.0, 2.0]
@@ -0,0 +1,102 @@
+# pylint: disable=missing-function-docstring
+"""Test the ``ml.telemetry`` module."""
+
+from __future__ import annotations
+
+import pathlib
+from typing import Any
+
+import numpy as np
+import pytest
+
+from pyopmnearwell.ml.ensemble import create_ensemble, run_ensemble, setup_ensemble
+from pyopmnearwell.ml.telemetry import (
+    read_infostep,
+    read_prt,
+    read_telemetry,
+    run_telemetry,
+    telemetry_report,
+    write_telemetry,
+)
+
+FIXTURES: pathlib.Path = pathlib.Path(__file__).parent / "telemetry"
+TEST_ENSEMBLE_MAKO: pathlib.Path = pathlib.Path(__file__).parent / "test_ensemble.mako"
+
+
+def test_read_infostep() -> None:
+    steps: dict[str, np.ndarray] = read_infostep(FIXTURES / "RUN_0.INFOSTEP")
+    assert list(steps)[:3] == ["time", "tstep", "assembly"]
+    assert steps["conv"].tolist() == [1, 0, 1, 1, 1]
+    assert steps["linit"].sum() == 228
+
+
+def test_read_prt() -> None:
+    telemetry: dict[str, float] = read_prt(FIXTURES / "RUN_0.PRT")
+    assert telemetry["chops"] == 1
+    assert telemetry["convergence_failures"] == 1
+    assert telemetry["well_failures"] == 1
+    assert telemetry["simulation_time"] == pytest.approx(0.31)
+    assert telemetry["newton_iterations"] == 32
+    assert telemetry["linear_iterations"] == 228
+
+
+def test_run_telemetry(tmp_path: pathlib.Path) -> None:
+    totals, steps = run_telemetry(FIXTURES, "RUN_0")
+    assert totals["timesteps"] == 5 and totals["cut_timesteps"] == 1
+    assert totals["newtit"] == 32 and totals["chops"] == 1
+    assert len(steps["time"]) == 5
+    totals, steps = run_telemetry(tmp_path, "RUN_0")
+    assert np.isnan(totals["timesteps"]) and np.isnan(totals["chops"])
+    assert not steps
+
+
+def test_write_telemetry(tmp_path: pathlib.Path) -> None:
+    totals, steps = run_telemetry(FIXTURES, "RUN_0")
+    runs: list[dict[str, Any]] = [
+        {"member": j, "status": "done", "walltime": 1.0 + j} | totals for j in [2, 0]
+    ]
+    write_telemetry(tmp_path, runs, {2: steps, 0: steps})
+    # A resumed campaign replaces the rows of the members that were run again.
+    write_telemetry(tmp_path, [runs[0] | {"walltime": 9.0}], {2: steps})
+    table, step_table = read_telemetry(tmp_path)
+    assert table["member"].tolist() == [0, 2]
+    assert table["walltime"].tolist() == [1.0, 9.0]
+    assert table["status"].tolist() == ["done", "done"]
+    assert step_table["member"].tolist() == [0] * 5 + [2] * 5
+    assert step_table["linit"][:5].tolist() == steps["linit"].tolist()
+
+
+def test_telemetry_report() -> None:
+    runs: dict[str, np.ndarray] = {
+        "member": np.array([0.0, 1.0, 2.0]),
+        "walltime": np.array([1.0, 10.0, 2.0]),
+        "chops": np.array([0.0, 4.0, 1.0]),
+    }
+    ensemble: list[dict[str, Any]] = [
+        {"PERMX": 100.0, "FLOW": "flow"},
+        {"PERMX": 1000.0, "FLOW": "flow"},
+        {"PERMX": 200.0, "FLOW": "flow"},
+    ]
+    report: str = telemetry_report(runs, ensemble, top=1)
+    assert "max 10 (5.0 x median) over 3 runs" in report
+    assert "member 1: walltime = 10, chops = 4.0; PERMX = 1000.0" in report
+    assert "PERMX: +1.00" in report and "FLOW:" not in report
+    # E.g., the iterations of runs without .INFOSTEP files
+    report = telemetry_report(runs | {"newtit": np.full(3, np.nan)}, ensemble, "newtit")
+    assert "newtit: median nan, max nan" in report and "PERMX:" not in report
+
+
+def test_run_ensemble_telemetry(
+    stub_flow: str, stub_runspecs: dict[str, Any], tmp_path: pathlib.Path
+) -> None:
+    ensemble = create_ensemble(stub_runspecs, seed=0)
+    setup_ensemble(tmp_path, ensemble, TEST_ENSEMBLE_MAKO)
+    run_ensemble(
+        stub_flow, tmp_path, stub_runspecs, ["PRESSURE"], [], [], telemetry=True
+    )
+    runs, steps = read_telemetry(tmp_path)
+    assert runs["member"].tolist() == [0, 1, 2]
+    assert runs["timesteps"].tolist() == [100] * 3
+    assert runs["report_steps"].tolist() == [100] * 3
+    assert len(steps["member"]) == 300
+    assert "Slowest" in telemetry_report(runs, ensemble)
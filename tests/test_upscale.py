@@ -161,3 +161,17 @@ def test_get_data_WI(test_upscaler: MockUpscaler) -> None:
         features, pressure_index, inj_rate_index, angle
     )
     assert data_WI.shape == (10, 20, 30, 40)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_apply_in_chunks(test_upscaler: MockUpscaler, chunk_size: int) -> None:
+    features: np.ndarray = rng.random((10, 10, 10, 3, 11, 2))
+    expected: np.ndarray = test_upscaler.get_vertically_averaged_values(features, 1)
+    result: np.ndarray = test_upscaler.apply_in_chunks(
+        test_upscaler.get_vertically_averaged_values,
+        features,
+        1,
+        chunk_size=chunk_size,
+    )
+    assert np.allclose(result, expected)
+    assert test_upscaler.single_feature_shape == (10, 10, 10, 10)
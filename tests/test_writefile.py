@@ -3,12 +3,36 @@
 
 from __future__ import annotations
 
+import copy
+import io
 import pathlib
+import re
 from typing import Any
 
+import numpy as np
 import pytest
+from resdata.grid import Grid
 
-from pyopmnearwell.utils.writefile import reservoir_files
+from pyopmnearwell.utils.inputvalues import process_input
+from pyopmnearwell.utils.writefile import (
+    adapt_table,
+    compact_format,
+    format_e,
+    format_f,
+    get_satfun_tables,
+    reservoir_files,
+    round_like_e,
+    write_compact,
+)
+
+VALUES: np.ndarray = np.concatenate(
+    (
+        np.random.default_rng(0).lognormal(0, 8, 1000)
+        * np.random.default_rng(1).choice([-1, 1], 1000),
+        [0.0, -0.0, 1.0, 999999.95, 0.99999995, 1.0000005, 2.5e-7, 1e-300, 1e300],
+        [np.inf, -np.inf, np.nan],
+    )
+)
 
 
 @pytest.mark.parametrize("recalc_grid", [True, False])
@@ -44,3 +68,204 @@ def test_reservoir_files(
     else:
         assert not (preprocessing_fol / "GEOLOGY.INC").exists()
         assert not (preprocessing_fol / "MULTPV.INC").exists()
+
+
+def test_format_e_f() -> None:
+    assert format_e(VALUES).tolist() == [f"{value:E}" for value in VALUES]
+    assert format_f(VALUES).tolist() == [f"{value:.6f}" for value in VALUES]
+
+
+def test_round_like_e() -> None:
+    finite: np.ndarray = VALUES[np.isfinite(VALUES)]
+    assert round_like_e(finite).tolist() == [float(f"{value:E}") for value in finite]
+
+
+def test_compact_format() -> None:
+    values: np.ndarray = np.array([1.0, 1.0, 1.0, 2.5, 3.0, 3.0, 2.5])
+    assert compact_format(values) == ["3*1 ", "2.5 ", "2*3 ", "2.5 "]
+
+
+@pytest.mark.parametrize("splits", [[], [2], [3], [1, 2, 7], [4, 4, 9]])
+def test_write_compact(splits: list[int]) -> None:
+    values: np.ndarray = np.array(
+        [1.0, 1.0, 1.0, 2.5, 2.5, 2.5, 2.5, np.nan, np.nan, 3.0, 3.0, 0.5]
+    )
+    file = io.StringIO()
+    write_compact(file, np.split(values, splits))
+    assert file.getvalue() == "".join(compact_format(values))
+
+
+@pytest.mark.parametrize("grid", ["cake", "tensor2d", "coord2d", "cpg3d"])
+def test_egrid(grid: str, tmp_path: pathlib.Path) -> None:
+    """The binary grid has the same cells as the COORD/ZCORN include file."""
+    grids: list[Grid] = []
+    for egrid in [0, 1]:
+        (tmp_path / f"{egrid}" / "preprocessing").mkdir(parents=True)
+        dic: dict[str, Any] = process_input(
+            {
+                "pat": pathlib.Path(__file__).parents[1] / "src" / "pyopmnearwell",
+                "fol": tmp_path / f"{egrid}",
+                "runname": "test_run",
+            },
+            pathlib.Path(__file__).parent / "geometries" / f"{grid}.toml",
+        )
+        dic["egrid"] = egrid
+        reservoir_files(dic)
+        preprocessing_fol: pathlib.Path = tmp_path / f"{egrid}" / "preprocessing"
+        if egrid:
+            assert not (preprocessing_fol / "GRID.INC").exists()
+            assert "GDFILE\nGRID.EGRID /" in (
+                preprocessing_fol / "GEOLOGY.INC"
+            ).read_text(encoding="utf8")
+            grids.append(Grid.load_from_file(str(preprocessing_fol / "GRID.EGRID")))
+        else:
+            nocells: list[int] = dic["nocells"]
+            grdecl: pathlib.Path = tmp_path / "GRID.GRDECL"
+            grdecl.write_text(
+                f"SPECGRID\n{nocells[0]} {nocells[1]} {nocells[2]} 1 F /\n"
+                + (preprocessing_fol / "GRID.INC").read_text(encoding="utf8"),
+                encoding="utf8",
+            )
+            grids.append(Grid.load_from_grdecl(str(grdecl)))
+    assert grids[0].get_dims() == grids[1].get_dims()
+    index = grids[0].export_index()
+    assert np.array_equal(
+        grids[0].export_corners(index), grids[1].export_corners(index)
+    )
+
+
+def resolve_deck(deck: pathlib.Path) -> str:
+    """Deck with the content of the include files instead of their names.
+
+    As in OPM Flow, the include paths are relative to the folder of the deck.
+
+    """
+
+    def include(match: re.Match) -> str:
+        return (deck.parent / match.group(1).strip("'")).read_text(encoding="utf8")
+
+    text: str = deck.read_text(encoding="utf8")
+    while re.search(r"^INCLUDE\n(\S+) /", text, flags=re.M):
+        text = re.sub(r"^INCLUDE\n(\S+) /", include, text, flags=re.M)
+    return text
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        "models/co2store.toml",
+        "models/h2store.toml",
+        "models/saltprec.toml",
+        "models/biofilm.toml",
+        "geometries/cpg3d.toml",
+        "geometries/core.toml",
+        "geometries/radial.toml",
+    ],
+)
+def test_reservoir_files_auto(config: str, tmp_path: pathlib.Path) -> None:
+    """Members with ``recalc_*="auto"`` include the unchanged files of the reference."""
+    base: dict[str, Any] = process_input(
+        {
+            "pat": pathlib.Path(__file__).parents[1] / "src" / "pyopmnearwell",
+            "runname": "test_run",
+        },
+        pathlib.Path(__file__).parent / config,
+    )
+    decks: dict[str, pathlib.Path] = {}
+    for name, changes, kwargs in [
+        ("reference", {}, {}),
+        ("full", {"krw": "krw * sw"}, {}),
+        ("auto", {"krw": "krw * sw"}, {"recalc_tables": "auto"}),
+    ]:
+        dic: dict[str, Any] = copy.deepcopy(base) | changes
+        dic["fol"] = tmp_path / name
+        (tmp_path / name / "preprocessing").mkdir(parents=True)
+        reservoir_files(
+            dic,
+            inc_folder=pathlib.Path("..") / ".." / "reference" / "preprocessing",
+            recalc_grid="auto",
+            recalc_sections="auto",
+            **kwargs,
+        )
+        decks[name] = tmp_path / name / "preprocessing" / "TEST_RUN.DATA"
+    # Only the tables (and the geology file, which names the included grid files) are
+    # written again.
+    assert {path.name for path in decks["auto"].parent.iterdir()} <= {
+        "INCLUDES.pkl",
+        "TABLES.INC",
+        "GEOLOGY.INC",
+        "TEST_RUN.DATA",
+    }
+    assert (decks["auto"].parent / "TABLES.INC").exists()
+    assert resolve_deck(decks["auto"]) == resolve_deck(decks["full"])
+    assert resolve_deck(decks["auto"]) != resolve_deck(decks["reference"])
+
+
+def test_satfun_tables(input_dict: dict[str, Any]) -> None:
+    """Regions with the same saturation functions share one table."""
+    safu: list[list[float]] = input_dict["safu"]
+    # Make the third drainage table equal to the first one.
+    safu[2] = list(safu[0])
+    assert get_satfun_tables(input_dict) == [1, 2, 1, 3, 4, 5, 6, 7, 8, 4]
+    reservoir_files(input_dict)
+    preprocessing_fol: pathlib.Path = input_dict["fol"] / "preprocessing"
+    tables: str = (preprocessing_fol / "TABLES.INC").read_text(encoding="utf8")
+    assert tables.count("/\n") == 2 * 8
+    deck: str = (preprocessing_fol / "TEST_RUN.DATA").read_text(encoding="utf8")
+    assert "TABDIMS\n8 /" in deck
+    assert "EQUALREG\nSATNUM 1 3 F /\nSATNUM 3 4 F /\n" in deck
+    # The SATNUM regions also select the PERMFACT tables in saltprec.
+    input_dict["model"] = "saltprec"
+    assert get_satfun_tables(input_dict) == list(range(1, 11))
+
+
+def read_tables(path: pathlib.Path) -> list[np.ndarray]:
+    """Numeric rows of each table in a TABLES.INC file."""
+    tables: list[np.ndarray] = []
+    rows: list[list[float]] = []
+    for line in path.read_text(encoding="utf8").splitlines():
+        if line.startswith("/"):
+            tables.append(np.array(rows))
+            rows = []
+        elif line[:1].isdigit():
+            rows.append([float(value) for value in line.split()])
+    return tables
+
+
+def test_adaptive_tables(input_dict: dict[str, Any], tmp_path: pathlib.Path) -> None:
+    """The adaptive tables interpolate the uniform ones within the tolerance."""
+    reservoir_files(input_dict)
+    uniform: pathlib.Path = input_dict["fol"] / "preprocessing" / "TABLES.INC"
+    input_dict["safutol"] = 1e-3
+    input_dict["fprep"] = str(tmp_path)
+    reservoir_files(input_dict)
+    adaptive: pathlib.Path = tmp_path / "TABLES.INC"
+    points: list[int] = input_dict["satfun_points"]
+    assert points[0] < points[1] / 10
+    assert adaptive.read_text(encoding="utf8").startswith(
+        f"-- {points[0]} of {points[1]} points"
+    )
+    for full, reduced in zip(read_tables(uniform), read_tables(adaptive), strict=True):
+        assert len(reduced) < len(full)
+        for column in range(1, full.shape[1]):
+            interpolated = np.interp(full[:, 0], reduced[:, 0], reduced[:, column])
+            # The tolerance is relative to the range of each column.
+            assert np.allclose(
+                interpolated,
+                full[:, column],
+                rtol=1e-6,
+                atol=1e-3 * (np.ptp(full[:, column]) or 1.0),
+            )
+
+
+def test_adapt_table_scale() -> None:
+    """The error is relative to the range of each column, i.e., the kept points do not
+    depend on the units of the capillary pressure."""
+    x: np.ndarray = np.linspace(0, 1, 101)
+    krw: np.ndarray = x**2
+    pcap: np.ndarray = (1 - x) ** 3
+    dic: dict[str, Any] = {"safutol": 1e-3}
+    kept: np.ndarray = adapt_table(dic, x, krw, pcap)[0]
+    assert len(kept) < len(x)
+    for factor in [1e-3, 1e3]:
+        assert np.array_equal(adapt_table(dic, x, krw, factor * pcap)[0], kept)
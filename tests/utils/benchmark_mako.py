@@ -0,0 +1,53 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+# pylint: disable=C0116
+
+"""Benchmark loading the bundled deck templates with and without the template cache.
+
+Run with ``python tests/utils/benchmark_mako.py``. For each template, the time to
+compile it from scratch (as before the cache), to load the compiled module from the
+module directory (as in a new worker process), and to take it from the in-process cache
+is printed.
+"""
+
+import pathlib
+import tempfile
+import timeit
+
+from mako.template import Template
+
+from pyopmnearwell.utils.mako import get_template
+
+TEMPLATES: pathlib.Path = (
+    pathlib.Path(__file__).parents[2] / "src" / "pyopmnearwell" / "templates"
+)
+
+
+def time_template(filename: str, module_directory: str, number: int) -> list[float]:
+    """Milliseconds to compile, import and take a template from the cache"""
+    Template(filename=filename, module_directory=module_directory)
+    times = [
+        timeit.timeit(lambda: Template(filename=filename), number=number),
+        timeit.timeit(
+            lambda: Template(filename=filename, module_directory=module_directory),
+            number=number,
+        ),
+        timeit.timeit(lambda: get_template(filename=filename), number=number),
+    ]
+    return [1e3 * time / number for time in times]
+
+
+def main(number: int = 20) -> None:
+    with tempfile.TemporaryDirectory() as module_directory:
+        print(f"{'':<36} {'compile':>9} {'module':>9} {'cached':>9}")
+        totals = [0.0, 0.0, 0.0]
+        for path in sorted(TEMPLATES.glob("*/*.mako")):
+            times = time_template(str(path), module_directory, number)
+            totals = [total + time for total, time in zip(totals, times)]
+            name = str(path.relative_to(TEMPLATES))
+            print(f"{name:<36} " + " ".join(f"{time:7.3f}ms" for time in times))
+        print(f"{'total':<36} " + " ".join(f"{time:7.3f}ms" for time in totals))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+# pylint: disable=C0116
+
+"""Benchmark the bulk formatting of the include files against the per-value loops.
+
+Run with ``python tests/utils/benchmark_writefile.py``. The reference functions are the
+former implementations in ``pyopmnearwell.utils.writefile``; the outputs are checked to
+be identical before timing.
+"""
+
+import timeit
+
+import numpy as np
+from numpy.typing import NDArray
+
+from pyopmnearwell.utils.writefile import (
+    compact_format,
+    format_e,
+    format_f,
+    format_rows,
+    round_like_e,
+)
+
+
+def reference_round_like_e(v: NDArray) -> NDArray:
+    return np.asarray([float(f"{x:E}") for x in v])
+
+
+def reference_compact_format(v: NDArray) -> list[str]:
+    v = np.array(v)
+    change_idx = np.flatnonzero(np.diff(v, prepend=v[0] - 1))
+    counts = np.diff(np.append(change_idx, v.size))
+    vals = v[change_idx]
+    out = []
+    for val, n in zip(vals, counts):
+        val_str = str(int(val)) if float(val).is_integer() else str(val)
+        out.append(f"{n}*{val_str} " if n > 1 else f"{val_str} ")
+    return out
+
+
+def reference_table(sw: NDArray, kr: NDArray, pc: NDArray) -> list[str]:
+    return [f"{s:E} {k:E} {p:E} \n" for s, k, p in zip(sw, kr, pc)]
+
+
+def reference_table_format_1(sw: NDArray, kr: NDArray, pc: NDArray) -> list[str]:
+    return [f"{s:E} {k:.6f} {k:.6f} {p:E} \n" for s, k, p in zip(sw, kr, pc)]
+
+
+def zcorn(nxy: int = 200, nz: int = 50) -> NDArray:
+    """ZCORN-like values of a cpg3d grid with a folded top"""
+    x = np.linspace(0, 400, nxy + 1)
+    top = 5 * np.sin(x / 40)[None, :] + 2 * np.cos(x / 60)[:, None]
+    base = np.repeat(np.repeat(top, 2, axis=0)[1:-1], 2, axis=1)[:, 1:-1]
+    layers = [base + k * 100 / nz for k in range(nz + 1)]
+    return np.concatenate(
+        [layers[0].ravel()]
+        + [np.tile(layer.ravel(), 2) for layer in layers[1:-1]]
+        + [layers[-1].ravel()]
+    )
+
+
+def compare(name: str, reference, bulk, number: int = 1) -> None:
+    assert reference() == bulk(), name
+    time_reference = timeit.timeit(reference, number=number) / number
+    time_bulk = timeit.timeit(bulk, number=number) / number
+    print(
+        f"{name:<28} {time_reference:9.3f} s {time_bulk:9.3f} s "
+        + f"{time_reference / time_bulk:7.1f}x"
+    )
+
+
+def main() -> None:
+    values = zcorn()
+    sw = np.linspace(0.1, 1, 10000)
+    kr = sw**2
+    pc = 0.1 * sw ** (-0.5)
+    print(f"{'':<28} {'reference':>11} {'bulk':>11} {'speedup':>8}")
+    compare(
+        f"round_like_e ({values.size})",
+        lambda: reference_round_like_e(values).tolist(),
+        lambda: round_like_e(values).tolist(),
+    )
+    rounded = round_like_e(values)
+    compare(
+        f"compact_format ({values.size})",
+        lambda: reference_compact_format(rounded),
+        lambda: compact_format(rounded),
+    )
+    compare(
+        "SWFN table (10000 rows)",
+        lambda: reference_table(sw, kr, pc),
+        lambda: format_rows(format_e(sw), format_e(kr), format_e(pc)),
+        number=10,
+    )
+    compare(
+        "SGOF table (10000 rows)",
+        lambda: reference_table_format_1(sw, kr, pc),
+        lambda: format_rows(format_e(sw), format_f(kr), format_f(kr), format_e(pc)),
+        number=10,
+    )
+
+
+if __name__ == "__main__":
+    main()
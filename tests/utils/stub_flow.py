@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2023-2026, NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Stand-in for the flow executable in the tests that do not need OPM Flow.
+
+Reads the cell dimensions (DIMENS) and the report steps (TSTEP) from the deck and
+writes synthetic ``*.UNRST``, ``*.INIT`` and ``*.SMSPEC``/``*.UNSMRY`` files with the
+PRESSURE/SGAS, PERMX and WBHP:INJ0 values of a decaying well pressure. A deck with
+RESTART needs UNIFIN (to read the unified restart file) and the restart file. As Flow,
+it does not write the restart step again, i.e., the ``*.UNRST`` and summary files of a
+restart from step n start at step n + 1.
+With ``RPTRST`` ``BASIC=3 FREQ=n``, the restart arrays are written every n-th step.
+
+Environment variables to control the stub:
+
+- STUB_FLOW_FAIL: Comma-separated deck names (e.g., RUN_1) or flags (e.g.,
+  --linear-solver=ilu0) that exit with an error without writing any output.
+- STUB_FLOW_LOG: File to which the name of each run deck is appended.
+- STUB_FLOW_SLEEP: Seconds to wait at each report step (to test timeouts).
+- STUB_FLOW_SLOW: Comma-separated flags with which the stub waits 0.01 s more at each
+  report step.
+
+With ``--output-extra-convergence-info=steps``, a ``*.INFOSTEP`` file with one converged
+time step per report step is written as well.
+
+"""
+
+import datetime
+import os
+import pathlib
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+from resdata import ResDataType
+from resdata.resfile import FortIO, ResdataKW, openFortIO
+from resdata.summary import Summary
+
+
+def read_deck(
+    deck: pathlib.Path,
+) -> tuple[list[int], list[float], Optional[int], int]:
+    """Return the grid dimensions, report step sizes, restart step (None without
+    RESTART), and restart frequency of the deck"""
+    lines = [line.split("--")[0].strip() for line in deck.read_text().splitlines()]
+    dimens: list[int] = [1, 1, 1]
+    tsteps: list[float] = []
+    restart: Optional[int] = None
+    freq: int = 1
+    for i, line in enumerate(lines):
+        if line == "DIMENS":
+            dimens = [int(value) for value in lines[i + 1].split()[:3]]
+        elif line == "RESTART":
+            root, step = lines[i + 1].removesuffix("/").split()
+            if "UNIFIN" not in lines:
+                sys.exit(f"Missing UNIFIN to restart from {root}.UNRST")
+            if not pathlib.Path(f"{root.strip(chr(39))}.UNRST").exists():
+                sys.exit(f"Missing restart file of {root}")
+            restart = int(step)
+        elif line == "TSTEP":
+            for value in lines[i + 1].replace("/", "").split():
+                num, _, size = value.rpartition("*")
+                tsteps += [float(size)] * int(num or 1)
+        elif line.startswith("BASIC=3"):
+            freq = int(line.split("FREQ=")[1].split()[0])
+    return dimens, tsteps, restart, freq
+
+
+def write_kw(fortio: FortIO, name: str, values: np.ndarray) -> None:
+    """Write one keyword to an open binary file"""
+    dtype = ResDataType.RD_INT if values.dtype.kind == "i" else ResDataType.RD_FLOAT
+    kw = ResdataKW(name, len(values), dtype)
+    for i, value in enumerate(values):
+        kw[i] = value
+    kw.fwrite(fortio)
+
+
+def main() -> None:
+    """Write the synthetic output files of the deck given in the command line"""
+    deck = pathlib.Path(next(arg for arg in sys.argv[1:] if arg.endswith(".DATA")))
+    name = str(
+        pathlib.Path(
+            next(arg for arg in sys.argv if arg.startswith("--output-dir")).split("=")[
+                1
+            ]
+        )
+        / deck.stem
+    )
+    if "STUB_FLOW_LOG" in os.environ:
+        with open(os.environ["STUB_FLOW_LOG"], "a", encoding="utf8") as file:
+            file.write(f"{deck.stem}\n")
+    if {deck.stem, *sys.argv} & set(os.environ.get("STUB_FLOW_FAIL", "").split(",")):
+        sys.exit(1)
+    pathlib.Path(name).parent.mkdir(parents=True, exist_ok=True)
+    dimens, tsteps, restart, freq = read_deck(deck)
+    ncells = int(np.prod(dimens))
+    times = np.cumsum([0.0] + tsteps)
+    wbhp = 100.0 + 10.0 / dimens[0] + 5.0 * np.exp(-times)
+
+    with openFortIO(f"{name}.UNRST", mode=FortIO.WRITE_MODE) as fortio:
+        for step, day in enumerate(times):
+            # The initial state is only written without RESTART.
+            if (restart is not None and step <= restart) or step % freq:
+                continue
+            write_kw(fortio, "SEQNUM", np.array([step]))
+            write_kw(fortio, "PRESSURE", np.linspace(wbhp[step], 100.0, ncells))
+            write_kw(
+                fortio, "SGAS", np.full(ncells, day / times[-1] if day > 0 else 0.0)
+            )
+    with openFortIO(f"{name}.INIT", mode=FortIO.WRITE_MODE) as fortio:
+        write_kw(fortio, "PERMX", np.full(ncells, 100.0))
+    summary = Summary.writer(name, datetime.datetime(2000, 1, 1), *dimens)
+    summary.add_variable("WBHP", wgname="INJ0", unit="BARSA")
+    for step, day in enumerate(times[1:]):
+        if restart is not None and step < restart:
+            continue
+        tstep = summary.add_t_step(step + 1, sim_days=day)
+        tstep["WBHP:INJ0"] = wbhp[step + 1]
+    summary.fwrite()
+    if "--output-extra-convergence-info=steps" in sys.argv:
+        write_infostep(name, times, restart or 0)
+    report(times, restart or 0)
+
+
+def write_infostep(name: str, times: np.ndarray, restart: int) -> None:
+    """Write the INFOSTEP file of the time steps after the restart step"""
+    with open(f"{name}.INFOSTEP", "w", encoding="utf8") as file:
+        file.write("Time(day) TStep(day) Assembly LSolve WellIt NewtIt LinIt Conv\n")
+        for step in range(restart, len(times) - 1):
+            file.write(
+                f"{times[step]:g} {times[step + 1] - times[step]:g} 0.01 0.01 1 3 10 1\n"
+            )
+
+
+def report(times: np.ndarray, restart: int) -> None:
+    """Print the progress lines of the report steps as Flow does"""
+    slow = (
+        0.01
+        if set(sys.argv) & set(os.environ.get("STUB_FLOW_SLOW", "").split(","))
+        else 0
+    )
+    for step in range(restart, len(times) - 1):
+        print(
+            f"Report step {step:>3}/{len(times) - 1} at day {times[step]:g}/"
+            + f"{times[-1]:g}",
+            flush=True,
+        )
+        time.sleep(float(os.environ.get("STUB_FLOW_SLEEP", "0")) + slow)
+
+
+if __name__ == "__main__":
+    main()